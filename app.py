@@ -1,43 +1,48 @@
-import pandas as pd
 import requests
 import json
 import time
 from dotenv import load_dotenv
-import os
+
+from github_api import GitHubClient, iter_search_items, tokens_do_ambiente
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
-# Obtém o valor do token
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+# Obtém o token (GITHUB_TOKEN) ou o pool de tokens (GITHUB_TOKENS=a,b,c)
+GITHUB_TOKENS = tokens_do_ambiente()
 
 # Verifica se o token foi encontrado
-if GITHUB_TOKEN:
-    print(f"Token encontrado: {GITHUB_TOKEN}")
+if GITHUB_TOKENS:
+    print(f"Tokens encontrados: {len(GITHUB_TOKENS)}")
 else:
     print("Token não encontrado no arquivo .env")
 
 
 # --- 1. Configuração da API do GitHub ---
-HEADERS = {
-    'Authorization': f'token {GITHUB_TOKEN}',
-    'Accept': 'application/vnd.github.v3+json'
-}
+# Sessão keep-alive reutilizada por todas as buscas, com cache de ETags para requisições condicionais
+github_client = GitHubClient(GITHUB_TOKENS)
 
 # --- 2. Funções Auxiliares (mantidas as mesmas) ---
 
-def get_github_repos(query, per_page=100):
-    url = f"https://api.github.com/search/repositories?q={query}&sort=stars&order=desc&per_page={per_page}"
+def get_github_page(query, page=1, per_page=100):
+    params = {'q': query, 'sort': 'stars', 'order': 'desc', 'per_page': per_page, 'page': page}
     try:
-        response = requests.get(url, headers=HEADERS)
+        response = github_client.get("/search/repositories", params=params)
         response.raise_for_status()
-        return response.json().get('items', [])
+        return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"Erro ao buscar no GitHub para '{query}': {e}")
-        return []
+        print(f"Erro ao buscar no GitHub para '{query}' (página {page}): {e}")
+        return None
     except json.JSONDecodeError:
         print(f"Erro ao decodificar JSON para '{query}'. Resposta: {response.text}")
-        return []
+        return None
+
+def get_github_repos(query, per_page=100):
+    """
+    Gera todos os repositórios da busca, seguindo a paginação até o teto de 1000
+    resultados da API (com divisão automática por data de criação acima disso).
+    """
+    return iter_search_items(get_github_page, query, per_page=per_page)
 
 def get_repo_details(repo):
     """
@@ -56,6 +61,8 @@ def get_repo_details(repo):
     }
 
 def load_institutions_data(file_path):
+    import pandas as pd # Import tardio: só a leitura dos CSVs precisa do pandas
+
     try:
         df = pd.read_csv(file_path)
         return df
@@ -89,20 +96,21 @@ def generate_institutions_repos_json(institutions_df, search_column):
             'Repositorios': []
         }
 
-        if not repos:
-            print(f"Nenhum repositório encontrado para {institution_acronym} ou erro na busca.")
-            json_output_data.append(institution_data)
-            time.sleep(1)
-            continue
-
         repositorios_unicos_para_instituicao = {} # Usar um dict para desduplicação (chave: (nome, link), valor: repo_details)
 
+        # 'repos' é um gerador: as páginas são consumidas à medida que chegam
         for repo in repos:
             repo_details = get_repo_details(repo)
             chave_repo = (repo_details['Nome do Repositório'], repo_details['Link de Acesso'])
             # Adiciona ou substitui (se for uma atualização, o que não é o caso aqui)
             # Garante que cada combinação (Nome, Link) seja única para esta instituição
             repositorios_unicos_para_instituicao[chave_repo] = repo_details
+
+        if not repositorios_unicos_para_instituicao:
+            print(f"Nenhum repositório encontrado para {institution_acronym} ou erro na busca.")
+            json_output_data.append(institution_data)
+            time.sleep(1)
+            continue
         
         # Converte de volta para lista
         institution_data['Repositorios'] = list(repositorios_unicos_para_instituicao.values())
@@ -184,4 +192,7 @@ if __name__ == "__main__":
         json.dump(final_json_output_data, f, ensure_ascii=False, indent=2)
     
     print(f"\nDados consolidados e desduplicados salvos em '{output_json_filename}'")
+
+    github_client.save_cache()
+    print(f"Requisições ao GitHub: {github_client.stats['requests']} ({github_client.stats['not_modified']} servidas do cache via 304)")
     print("\nProcesso concluído.")
\ No newline at end of file
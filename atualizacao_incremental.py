@@ -0,0 +1,268 @@
+import argparse
+import json
+
+from diario_coleta import DiarioColeta
+from filtrar_idioma import filtrar_instituicoes
+from clusterizador import atribuir_clusters_existentes
+from remove_duplicadas import desduplicar_global
+from banco_repositorios import BANCO_PATH, BancoRepositorios
+from metricas import METRICAS_PATH, metricas
+from enriquecimento import ENRIQUECIMENTO_PADRAO, Enriquecedor, opcoes_enriquecimento
+
+# === 1. Arquivos do pipeline ===
+ARQUIVO_SNAPSHOT = 'repositorios_federais_desduplicados_melhorado.json'
+ARQUIVO_FILTRADO = 'repositorios_federais_filtrado_idioma.json'
+ARQUIVO_CLUSTERS = 'repositorios_federais_com_clusters_visualizado.json'
+ARQUIVOS_INSTITUICOES = ['dados/institutos_federais.csv', 'dados/universidades_federais.csv']
+
+
+# === 2. Funções auxiliares ===
+
+def carregar_json(caminho):
+    """
+    Carrega um JSON do pipeline. Retorna {"institutions_data": []} se o arquivo não existir.
+    """
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Aviso: O arquivo '{caminho}' não foi encontrado. Ele será criado a partir dos deltas.")
+        return {"institutions_data": []}
+
+
+def salvar_json(caminho, dados):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+    metricas.registrar_arquivo(caminho)
+
+
+def chave_repositorio(repo):
+    return (repo.get('Nome do Repositório'), repo.get('Link de Acesso'))
+
+
+def obter_ultima_execucao(full_data):
+    """
+    Usa o maior 'Ultima Atualizacao' do snapshot como marca da última execução.
+    Datas ISO 8601 em UTC ("2025-07-03T18:03:19Z") podem ser comparadas como texto.
+    """
+    datas = [
+        repo.get('Ultima Atualizacao')
+        for institution in full_data.get('institutions_data', [])
+        for repo in institution.get('Repositorios', [])
+        if repo.get('Ultima Atualizacao') not in (None, 'N/A')
+    ]
+    return max(datas) if datas else None
+
+
+def remover_repositorios(institutions_list, chaves):
+    """
+    Remove (in-place) os repositórios cujas chaves (nome, link) estão em 'chaves'.
+    Instituições que ficarem sem repositórios são descartadas.
+    """
+    for institution in institutions_list:
+        institution['Repositorios'] = [
+            repo for repo in institution.get('Repositorios', [])
+            if chave_repositorio(repo) not in chaves
+        ]
+    institutions_list[:] = [inst for inst in institutions_list if inst['Repositorios']]
+
+
+def mesclar_instituicoes(institutions_list, deltas):
+    """
+    Mescla (in-place) os repositórios de 'deltas' em 'institutions_list'.
+
+    Repositórios já existentes em qualquer instituição são atualizados no lugar,
+    mantendo a desduplicação global por (nome, link); os novos são anexados à
+    instituição correspondente, criada se ainda não existir.
+    """
+    indice_repos = {}
+    indice_instituicoes = {}
+    for institution in institutions_list:
+        indice_instituicoes[institution.get('Sigla')] = institution
+        for repo in institution.get('Repositorios', []):
+            indice_repos[chave_repositorio(repo)] = repo
+
+    novos = 0
+    atualizados = 0
+    for delta in deltas:
+        for repo in delta.get('Repositorios', []):
+            chave = chave_repositorio(repo)
+            if chave in indice_repos:
+                indice_repos[chave].update(repo)
+                atualizados += 1
+                continue
+
+            institution = indice_instituicoes.get(delta['Sigla'])
+            if institution is None:
+                institution = {
+                    'Sigla': delta['Sigla'],
+                    'Nome Completo': delta['Nome Completo'],
+                    'URL Oficial': delta['URL Oficial'],
+                    'Repositorios': []
+                }
+                institutions_list.append(institution)
+                indice_instituicoes[delta['Sigla']] = institution
+            novo_repo = dict(repo)
+            institution['Repositorios'].append(novo_repo)
+            indice_repos[chave] = novo_repo
+            novos += 1
+    return novos, atualizados
+
+
+# === 3. Atualização incremental ===
+
+def estrategias_do_snapshot(instituicoes):
+    """
+    {Sigla: índice da estratégia de busca} das instituições com repositórios no
+    snapshot (veja consulta_if.estrategia_do_snapshot). Vale para todas as linhas
+    da sigla: os campi repetem a query org: da instituição e a sigla na busca por
+    nome, e no snapshot ficam sem repositórios próprios após a desduplicação.
+    Sem alterações, a instituição custa uma única busca, e um 'org:' vazio não
+    cai nas buscas amplas por sigla/nome, que trariam repositórios que o crawl
+    completo nunca coletou.
+    """
+    from consulta_if import estrategia_do_snapshot
+
+    estrategias = {}
+    for institution in instituicoes:
+        estrategia = estrategia_do_snapshot(institution.get('Sigla'), institution.get('Nome Completo'),
+                                            institution.get('Repositorios', []))
+        if estrategia is not None:
+            estrategias.setdefault(institution.get('Sigla'), estrategia)
+    return estrategias
+
+
+def atualizar_incremental(desde=None, max_workers=1, banco=None, retomar=False, backend_busca='rest',
+                          enriquecimento=None, siglas=None, simular=False):
+    """
+    Busca apenas os repositórios com push após a última execução e propaga os
+    deltas pelo pipeline: snapshot desduplicado → filtro de idioma → clusters.
+    Só os repositórios alterados passam pelo langdetect e pela atribuição de cluster.
+
+    Com 'banco' (BancoRepositorios), a marca da última execução e a mesclagem do
+    snapshot são consultas indexadas na base SQLite, e o snapshot JSON é
+    regerado a partir dela em vez de ser relido. Cada instituição do snapshot é
+    buscada só com a estratégia que trouxe os seus repositórios (veja
+    estrategias_do_snapshot), e as que não têm repositórios, só com org:. Com retomar=True, uma busca
+    interrompida com o mesmo 'desde' continua do diário da coleta. Com
+    'enriquecimento' (opções do Enriquecedor), os deltas filtrados ganham
+    linguagens e atividade de commits. 'siglas' restringe a busca a algumas
+    instituições; com simular=True os deltas só são listados, sem gravar nada.
+    """
+    # Import tardio: --help e --dry-run sem busca não carregam o cliente HTTP
+    from consulta_if import generate_institutions_repos_json, load_institutions_data, obter_github_client
+
+    snapshot = None if banco is not None else carregar_json(ARQUIVO_SNAPSHOT)
+    desde = desde or (banco.ultima_atualizacao() if banco is not None else obter_ultima_execucao(snapshot))
+    if not desde:
+        print("❌ Snapshot sem datas de atualização. Rode o crawl completo (consulta_if.py) primeiro.")
+        return
+
+    print(f"🔄 Atualização incremental: buscando repositórios com push após {desde}")
+    filtro = f"pushed:>{desde}"
+    github_client = obter_github_client()
+    estrategias = estrategias_do_snapshot((banco.exportar_documento() if banco is not None else snapshot)['institutions_data'])
+    # Na simulação nada vai para .cache/: um diário gravado faria um --resume posterior pular instituições
+    diario = None if simular else DiarioColeta(filtro=filtro, retomar=retomar, budget=github_client.budget)
+    deltas = []
+    with metricas.etapa('busca'):
+        for caminho in ARQUIVOS_INSTITUICOES:
+            df = load_institutions_data(caminho)
+            if siglas and not df.empty:
+                df = df[df['Sigla'].str.lower().isin({sigla.lower() for sigla in siglas})]
+            if not df.empty:
+                # Siglas sem repositórios no snapshot: só org: (uma organização criada desde então);
+                # as buscas amplas por sigla/nome ficam para o crawl completo
+                for sigla in df['Sigla']:
+                    estrategias.setdefault(sigla, 0)
+                deltas.extend(generate_institutions_repos_json(df, max_workers=max_workers, filtro_extra=filtro,
+                                                               diario=diario, backend=backend_busca,
+                                                               estrategias_fixas=estrategias))
+    if not simular:
+        diario.finalizar()
+        github_client.save_cache()
+    deltas = list(desduplicar_global(deltas))
+
+    chaves_alteradas = {chave_repositorio(repo) for inst in deltas for repo in inst['Repositorios']}
+    if not chaves_alteradas:
+        print("✅ Nenhum repositório alterado desde a última execução.")
+        return
+    if simular:
+        for inst in deltas:
+            print(f"  {inst['Sigla']}: {len(inst['Repositorios'])} repositórios alterados")
+        print(f"🧪 Simulação: {len(chaves_alteradas)} repositórios seriam propagados; nenhum arquivo foi alterado.")
+        return
+
+    # --- 1. Snapshot desduplicado ---
+    if banco is not None:
+        execucao_id = banco.iniciar_execucao('incremental', filtro)
+        novos = sum(not banco.existe(repo['Link de Acesso']) for inst in deltas for repo in inst['Repositorios'])
+        atualizados = len(chaves_alteradas) - novos
+        banco.salvar_instituicoes(deltas, execucao_id)
+        salvar_json(ARQUIVO_SNAPSHOT, banco.exportar_documento())
+    else:
+        novos, atualizados = mesclar_instituicoes(snapshot['institutions_data'], deltas)
+        salvar_json(ARQUIVO_SNAPSHOT, snapshot)
+    print(f"📦 Snapshot: {novos} repositórios novos, {atualizados} atualizados.")
+
+    # --- 2. Filtro de idioma apenas sobre os deltas ---
+    with metricas.etapa('filtro_idioma'):
+        deltas_filtrados, processados, mantidos = filtrar_instituicoes(deltas)
+    print(f"🔤 Filtro de idioma: {mantidos} de {processados} repositórios alterados mantidos.")
+    if enriquecimento is not None:
+        with metricas.etapa('enriquecimento'), Enriquecedor(**{**ENRIQUECIMENTO_PADRAO, **enriquecimento}) as enriquecedor:
+            enriquecedor.enriquecer(deltas_filtrados)
+        enriquecedor.relatorio()
+
+    filtrado = carregar_json(ARQUIVO_FILTRADO)
+    remover_repositorios(filtrado['institutions_data'], chaves_alteradas)
+    mesclar_instituicoes(filtrado['institutions_data'], deltas_filtrados)
+    salvar_json(ARQUIVO_FILTRADO, filtrado)
+
+    # --- 3. Clusters: atribui os deltas aos clusters existentes, sem reajustar o KMeans ---
+    clusters = carregar_json(ARQUIVO_CLUSTERS)
+    remover_repositorios(clusters['institutions_data'], chaves_alteradas)
+    with metricas.etapa('clusterizacao'):
+        atribuir_clusters_existentes(clusters['institutions_data'], deltas_filtrados)
+    mesclar_instituicoes(clusters['institutions_data'], deltas_filtrados)
+    salvar_json(ARQUIVO_CLUSTERS, clusters)
+    if banco is not None:
+        banco.remover_atribuicoes(link for _, link in chaves_alteradas)
+        for institution in deltas_filtrados:
+            banco.salvar_atribuicoes(institution['Repositorios'], execucao_id)
+        banco.finalizar_execucao(execucao_id)
+
+    print(f"✅ Atualização incremental concluída: {len(chaves_alteradas)} repositórios alterados propagados.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualiza os JSONs do mapa apenas com os repositórios alterados.")
+    parser.add_argument("--desde", help="Data ISO 8601 usada em 'pushed:>' (padrão: maior 'Ultima Atualizacao' do snapshot).")
+    parser.add_argument("--workers", type=int, default=1, help="Número de instituições buscadas em paralelo.")
+    parser.add_argument("--banco", nargs='?', const=BANCO_PATH,
+                        help=f"Usa a base SQLite como snapshot desduplicado (padrão: {BANCO_PATH}).")
+    parser.add_argument("--resume", action="store_true", help="Retoma uma busca interrompida (diário em .cache/).")
+    parser.add_argument("--backend-busca", choices=('rest', 'graphql'), default='rest', help="API usada na busca no GitHub.")
+    parser.add_argument("--instituicao", action="append", dest="siglas", metavar="SIGLA",
+                        help="Atualiza apenas esta instituição (pode ser repetido).")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Só busca e lista os repositórios alterados, sem gravar arquivos nem a base.")
+    parser.add_argument("--enriquecer", action="store_true", help="Adiciona linguagens e atividade de commits aos deltas.")
+    parser.add_argument("--workers-enriquecimento", type=int, default=ENRIQUECIMENTO_PADRAO['workers'])
+    parser.add_argument("--metricas", default=METRICAS_PATH, help="JSONL onde as métricas da execução são acrescentadas.")
+    parser.add_argument("--perfil", help="Diretório onde gravar o cProfile de cada etapa.")
+    args = parser.parse_args(argv)
+    metricas.configurar(args.perfil)
+
+    opcoes = dict(desde=args.desde, max_workers=args.workers, retomar=args.resume, backend_busca=args.backend_busca,
+                  enriquecimento=opcoes_enriquecimento(args), siglas=args.siglas, simular=args.dry_run)
+    if args.banco:
+        with BancoRepositorios(args.banco) as banco:
+            atualizar_incremental(banco=banco, **opcoes)
+    else:
+        atualizar_incremental(**opcoes)
+    metricas.salvar(args.metricas, 'atualizacao_incremental')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Base local em SQLite com instituições, repositórios, execuções de coleta e
+atribuições de cluster.
+
+Os scripts do pipeline usam JSONs como "banco": carregam tudo, alteram os dicts
+e regravam o arquivo inteiro, e cada desduplicação remonta o seu conjunto de
+chaves do zero. Aqui cada repositório é uma linha única por 'Link de Acesso'
+(a desduplicação global passa a ser o índice UNIQUE) e a ingestão é um upsert
+da saída de consulta_if.get_repo_details. Os JSONs no formato 'institutions_data'
+são gerados por consulta (exportar_documento), na ordem de ingestão.
+
+    python banco_repositorios.py importar repositorios_federais_com_clusters_visualizado.json
+    python banco_repositorios.py exportar saida.json --clusterizados
+    python banco_repositorios.py estatisticas
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+BANCO_PATH = os.getenv("BANCO_REPOSITORIOS_PATH", os.path.join('dados', 'repositorios.sqlite'))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS instituicoes (
+    id            INTEGER PRIMARY KEY,
+    sigla         TEXT NOT NULL,
+    nome_completo TEXT,
+    url_oficial   TEXT,
+    UNIQUE (sigla, nome_completo)
+);
+CREATE TABLE IF NOT EXISTS execucoes (
+    id            INTEGER PRIMARY KEY,
+    tipo          TEXT NOT NULL,
+    filtro        TEXT,
+    inicio        TEXT NOT NULL,
+    fim           TEXT,
+    repositorios  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS repositorios (
+    id                INTEGER PRIMARY KEY,
+    link              TEXT NOT NULL UNIQUE,
+    nome              TEXT,
+    descricao         TEXT,
+    linguagem         TEXT,
+    estrelas          INTEGER,
+    licenca           TEXT,
+    updated_at        TEXT,
+    instituicao_id    INTEGER NOT NULL REFERENCES instituicoes (id),
+    primeira_execucao INTEGER REFERENCES execucoes (id),
+    ultima_execucao   INTEGER REFERENCES execucoes (id)
+);
+CREATE TABLE IF NOT EXISTS clusters (
+    id        INTEGER PRIMARY KEY,
+    descricao TEXT
+);
+CREATE TABLE IF NOT EXISTS atribuicoes_cluster (
+    repositorio_id INTEGER PRIMARY KEY REFERENCES repositorios (id) ON DELETE CASCADE,
+    cluster_id     INTEGER NOT NULL,
+    execucao_id    INTEGER REFERENCES execucoes (id)
+);
+CREATE INDEX IF NOT EXISTS idx_instituicoes_sigla ON instituicoes (sigla);
+CREATE INDEX IF NOT EXISTS idx_repositorios_instituicao ON repositorios (instituicao_id);
+CREATE INDEX IF NOT EXISTS idx_repositorios_linguagem ON repositorios (linguagem);
+CREATE INDEX IF NOT EXISTS idx_repositorios_updated_at ON repositorios (updated_at);
+CREATE INDEX IF NOT EXISTS idx_atribuicoes_cluster ON atribuicoes_cluster (cluster_id);
+"""
+
+# Colunas da tabela 'repositorios' <-> chaves de get_repo_details (na mesma ordem)
+CAMPOS_REPOSITORIO = (
+    ('nome', 'Nome do Repositório'),
+    ('descricao', 'Descricao'),
+    ('linguagem', 'Linguagem Principal'),
+    ('estrelas', 'Estrelas'),
+    ('licenca', 'Licenca'),
+    ('updated_at', 'Ultima Atualizacao'),
+    ('link', 'Link de Acesso'),
+)
+
+# A instituição do repositório não muda no upsert: quem o viu primeiro fica com
+# ele, como em remove_duplicadas.desduplicar_global
+UPSERT_REPOSITORIO = f"""
+INSERT INTO repositorios ({', '.join(coluna for coluna, _ in CAMPOS_REPOSITORIO)},
+                          instituicao_id, primeira_execucao, ultima_execucao)
+VALUES ({', '.join('?' for _ in CAMPOS_REPOSITORIO)}, ?, ?, ?)
+ON CONFLICT (link) DO UPDATE SET
+    {', '.join(f'{coluna} = excluded.{coluna}' for coluna, _ in CAMPOS_REPOSITORIO if coluna != 'link')},
+    ultima_execucao = excluded.ultima_execucao
+"""
+
+
+def agora():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class BancoRepositorios:
+    """
+    Conexão com a base SQLite. Pode ser usada como gerenciador de contexto
+    (with BancoRepositorios() as banco: ...), que confirma a transação na saída.
+    """
+
+    def __init__(self, caminho=BANCO_PATH):
+        self.caminho = caminho
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA foreign_keys = ON")
+        self.conexao.execute("PRAGMA journal_mode = WAL")
+        self.conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        self.conexao.commit()
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # --- Ingestão ---
+
+    def iniciar_execucao(self, tipo, filtro=None):
+        cursor = self.conexao.execute("INSERT INTO execucoes (tipo, filtro, inicio) VALUES (?, ?, ?)",
+                                      (tipo, filtro, agora()))
+        return cursor.lastrowid
+
+    def finalizar_execucao(self, execucao_id):
+        self.conexao.execute(
+            "UPDATE execucoes SET fim = ?, "
+            "repositorios = (SELECT COUNT(*) FROM repositorios WHERE ultima_execucao = ?) WHERE id = ?",
+            (agora(), execucao_id, execucao_id))
+        self.conexao.commit()
+
+    def id_instituicao(self, sigla, nome_completo=None, url_oficial=None):
+        # 'IS' em vez de '=' para que um nome ausente (NULL) também seja encontrado
+        linha = self.conexao.execute("SELECT id FROM instituicoes WHERE sigla = ? AND nome_completo IS ?",
+                                     (sigla, nome_completo)).fetchone()
+        if linha is not None:
+            self.conexao.execute("UPDATE instituicoes SET url_oficial = ? WHERE id = ?", (url_oficial, linha[0]))
+            return linha[0]
+        cursor = self.conexao.execute("INSERT INTO instituicoes (sigla, nome_completo, url_oficial) VALUES (?, ?, ?)",
+                                      (sigla, nome_completo, url_oficial))
+        return cursor.lastrowid
+
+    def salvar_instituicao(self, institution, execucao_id=None):
+        """
+        Upsert de uma instituição no formato do pipeline ('Sigla', 'Nome Completo',
+        'URL Oficial', 'Repositorios' com os dicts de get_repo_details).
+        Atribuições de cluster ('Cluster_ID') presentes nos repositórios também são gravadas.
+        """
+        instituicao_id = self.id_instituicao(institution.get('Sigla'), institution.get('Nome Completo'),
+                                             institution.get('URL Oficial'))
+        repos = institution.get('Repositorios', [])
+        self.conexao.executemany(UPSERT_REPOSITORIO, [
+            tuple(repo.get(chave) for _, chave in CAMPOS_REPOSITORIO) + (instituicao_id, execucao_id, execucao_id)
+            for repo in repos
+        ])
+        self.salvar_atribuicoes(repos, execucao_id)
+
+    def remover_nao_vistos(self, execucao_id):
+        """
+        Ao fim de uma execução completa, remove os repositórios que ela não gravou
+        (apagados no GitHub ou barrados pelos filtros) e, em cascata, as suas
+        atribuições de cluster, para que exportar_documento não os devolva.
+        Retorna quantos foram removidos.
+        """
+        cursor = self.conexao.execute("DELETE FROM repositorios WHERE ultima_execucao IS NOT ?", (execucao_id,))
+        return cursor.rowcount
+
+    def salvar_instituicoes(self, instituicoes, execucao_id=None):
+        for institution in instituicoes:
+            self.salvar_instituicao(institution, execucao_id)
+        self.conexao.commit()
+
+    def salvar_atribuicoes(self, repos, execucao_id=None):
+        """
+        Grava o 'Cluster_ID' dos repositórios que o têm (pelo link).
+        """
+        self.conexao.executemany(
+            "INSERT INTO atribuicoes_cluster (repositorio_id, cluster_id, execucao_id) "
+            "SELECT id, ?, ? FROM repositorios WHERE link = ? "
+            "ON CONFLICT (repositorio_id) DO UPDATE SET cluster_id = excluded.cluster_id, "
+            "execucao_id = excluded.execucao_id",
+            [(repo['Cluster_ID'], execucao_id, repo.get('Link de Acesso'))
+             for repo in repos if repo.get('Cluster_ID') is not None])
+
+    def remover_atribuicoes(self, links):
+        self.conexao.executemany(
+            "DELETE FROM atribuicoes_cluster WHERE repositorio_id = (SELECT id FROM repositorios WHERE link = ?)",
+            [(link,) for link in links])
+
+    def substituir_clusters(self, instituicoes, cluster_descriptions, execucao_id=None):
+        """
+        Troca todas as atribuições e descrições de cluster pelas de uma nova
+        clusterização (repositórios fora de 'instituicoes' ficam sem cluster).
+        """
+        self.conexao.execute("DELETE FROM atribuicoes_cluster")
+        for institution in instituicoes:
+            self.salvar_atribuicoes(institution.get('Repositorios', []), execucao_id)
+        self.salvar_clusters(cluster_descriptions)
+
+    def salvar_clusters(self, cluster_descriptions):
+        """
+        Substitui as descrições dos clusters ([{"id": ..., "description": ...}]).
+        """
+        self.conexao.execute("DELETE FROM clusters")
+        self.conexao.executemany("INSERT INTO clusters (id, descricao) VALUES (?, ?)",
+                                 [(c['id'], c['description']) for c in cluster_descriptions])
+        self.conexao.commit()
+
+    def importar_documento(self, full_data, tipo='importacao'):
+        """
+        Ingere um documento {"institutions_data": [...], "cluster_descriptions": [...]} inteiro.
+        """
+        execucao_id = self.iniciar_execucao(tipo)
+        self.salvar_instituicoes(full_data.get('institutions_data', []), execucao_id)
+        if full_data.get('cluster_descriptions'):
+            self.salvar_clusters(full_data['cluster_descriptions'])
+        self.finalizar_execucao(execucao_id)
+        return execucao_id
+
+    # --- Consultas ---
+
+    def existe(self, link):
+        return self.conexao.execute("SELECT 1 FROM repositorios WHERE link = ?", (link,)).fetchone() is not None
+
+    def ultima_atualizacao(self):
+        """
+        Maior 'Ultima Atualizacao' da base (índice em updated_at), usado como marca
+        da última execução pela atualização incremental.
+        """
+        return self.conexao.execute(
+            "SELECT MAX(updated_at) FROM repositorios WHERE updated_at IS NOT NULL AND updated_at != 'N/A'"
+        ).fetchone()[0]
+
+    def contagem_por(self, coluna, limite=10):
+        if coluna not in ('linguagem', 'licenca'):
+            raise ValueError(f"Coluna de agrupamento inválida: {coluna}")
+        return self.conexao.execute(
+            f"SELECT {coluna}, COUNT(*) AS total FROM repositorios GROUP BY {coluna} "
+            f"ORDER BY total DESC, {coluna} LIMIT ?", (limite,)).fetchall()
+
+    def contagem_por_instituicao(self, limite=10):
+        return self.conexao.execute(
+            "SELECT i.sigla, COUNT(*) AS total FROM repositorios r JOIN instituicoes i ON i.id = r.instituicao_id "
+            "GROUP BY i.sigla ORDER BY total DESC, i.sigla LIMIT ?", (limite,)).fetchall()
+
+    def exportar_documento(self, clusterizados=False):
+        """
+        Monta o documento {"institutions_data": [...]} a partir da base, na ordem de
+        ingestão. Com clusterizados=True, apenas repositórios com cluster atribuído
+        (o conteúdo de repositorios_federais_com_clusters_visualizado.json) e as
+        descrições dos clusters.
+        """
+        juncao = "JOIN" if clusterizados else "LEFT JOIN"
+        consulta = f"""
+            SELECT i.id, i.sigla, i.nome_completo, i.url_oficial,
+                   {', '.join(f'r.{coluna}' for coluna, _ in CAMPOS_REPOSITORIO)}, a.cluster_id
+            FROM repositorios r
+            JOIN instituicoes i ON i.id = r.instituicao_id
+            {juncao} atribuicoes_cluster a ON a.repositorio_id = r.id
+            ORDER BY i.id, r.id
+        """
+        full_data = {"institutions_data": []}
+        institution = None
+        instituicao_atual = None
+        for linha in self.conexao.execute(consulta):
+            if institution is None or linha[0] != instituicao_atual:
+                instituicao_atual = linha[0]
+                institution = {'Sigla': linha[1], 'Nome Completo': linha[2], 'URL Oficial': linha[3],
+                               'Repositorios': []}
+                full_data['institutions_data'].append(institution)
+            valores = linha[4:4 + len(CAMPOS_REPOSITORIO)]
+            repo = {chave: valor for (_, chave), valor in zip(CAMPOS_REPOSITORIO, valores)}
+            if linha[-1] is not None:
+                repo['Cluster_ID'] = linha[-1]
+            institution['Repositorios'].append(repo)
+
+        if clusterizados:
+            full_data['cluster_descriptions'] = [
+                {'id': cluster_id, 'description': descricao}
+                for cluster_id, descricao in self.conexao.execute("SELECT id, descricao FROM clusters ORDER BY id")
+            ]
+        return full_data
+
+
+def main(argv=None):
+    from snapshot_colunar import carregar_dados
+
+    parser = argparse.ArgumentParser(description="Base SQLite de repositórios do mapa de código público.")
+    parser.add_argument("--banco", default=BANCO_PATH, help="Arquivo SQLite.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+    importar = subcomandos.add_parser("importar", help="Ingere um JSON 'institutions_data' (ou snapshot .parquet/.arrow).")
+    importar.add_argument("entrada")
+    exportar = subcomandos.add_parser("exportar", help="Gera um JSON 'institutions_data' a partir da base.")
+    exportar.add_argument("saida")
+    exportar.add_argument("--clusterizados", action="store_true",
+                          help="Apenas repositórios com cluster, com as descrições dos clusters.")
+    subcomandos.add_parser("estatisticas", help="Resumo da base.")
+    args = parser.parse_args(argv)
+
+    with BancoRepositorios(args.banco) as banco:
+        if args.comando == "importar":
+            banco.importar_documento(carregar_dados(args.entrada))
+            total = banco.conexao.execute("SELECT COUNT(*) FROM repositorios").fetchone()[0]
+            print(f"🗄️ '{args.entrada}' importado em '{args.banco}' ({total} repositórios na base).")
+        elif args.comando == "exportar":
+            with open(args.saida, 'w', encoding='utf-8') as f:
+                json.dump(banco.exportar_documento(args.clusterizados), f, indent=2, ensure_ascii=False)
+            print(f"💾 Documento exportado para '{args.saida}'")
+        else:
+            print("Linguagens mais usadas:", banco.contagem_por('linguagem'))
+            print("Licenças mais usadas:", banco.contagem_por('licenca'))
+            print("Instituições com mais repositórios:", banco.contagem_por_instituicao())
+            print("Última atualização:", banco.ultima_atualizacao())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Benchmark das etapas do pipeline sobre datasets sintéticos (dados_sinteticos.py)
+e sobre o GitHub simulado (github_simulado.py).
+
+Cada etapa roda em um processo novo, que carrega o dataset, mede o tempo de
+parede da etapa, o pico de memória residente (RSS) do processo e a vazão em
+repositórios por segundo. Cada execução acrescenta uma linha ao arquivo de
+resultados (JSONL) com o commit atual, para comparar commits:
+
+    python benchmark.py --repos 1000 10000 100000
+    python benchmark.py --repos 10000 --estagios busca --instituicoes 50 --latencia 0.05
+    python benchmark.py --repos 10000 --comparar          # compara com a execução anterior
+    python benchmark.py --repos 10000 --comparar a1b2c3d  # compara com um commit
+
+Com --comparar, o código de saída é 1 se alguma etapa ficou mais lenta (ou
+usou mais memória) do que a tolerância.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from dados_sinteticos import salvar_dataset
+
+RESULTADOS_PATH = 'resultados_benchmark.jsonl'
+DIRETORIO_DATASETS = os.path.join('.cache', 'benchmark')
+ESTAGIOS = ('desduplicacao', 'quase_duplicatas', 'filtro_idioma', 'clusterizacao', 'frontend', 'busca')
+ESTAGIOS_PADRAO = ('desduplicacao', 'quase_duplicatas', 'filtro_idioma', 'clusterizacao', 'frontend')
+
+
+def rss_pico_mb():
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if platform.system() == 'Darwin' else pico / 1024
+
+
+def contar_repositorios(instituicoes):
+    return sum(len(institution.get('Repositorios', [])) for institution in instituicoes)
+
+
+# === 1. Etapas (executadas no processo filho) ===
+
+def _desduplicacao(instituicoes, opcoes):
+    from remove_duplicadas import desduplicar_global
+    return list(desduplicar_global(instituicoes))
+
+
+def _quase_duplicatas(instituicoes, opcoes):
+    from quase_duplicatas import DetectorQuaseDuplicatas, desduplicar_similares
+    return list(desduplicar_similares(instituicoes, DetectorQuaseDuplicatas()))
+
+
+def _filtro_idioma(instituicoes, opcoes):
+    from filtrar_idioma import DetectorIdiomas, filtrar_instituicoes
+    # Sem cache persistente: mede a detecção de fato
+    with DetectorIdiomas(cache_path=None, workers=opcoes['workers']) as detector:
+        filtradas, _, _ = filtrar_instituicoes(instituicoes, detector)
+    return filtradas
+
+
+def _clusterizacao(instituicoes, opcoes):
+    from clusterizador import clusterizar_instituicoes
+    clusterizar_instituicoes(instituicoes, opcoes['clusters'], opcoes['backend'], modelo_path=None)
+    return instituicoes
+
+
+def _frontend(instituicoes, opcoes):
+    from exportar_frontend import exportar_frontend
+    with tempfile.TemporaryDirectory() as diretorio:
+        exportar_frontend({'institutions_data': instituicoes, 'cluster_descriptions': []}, diretorio)
+    return instituicoes
+
+
+def _busca(instituicoes, opcoes):
+    """
+    Crawl completo contra o GitHub simulado, com latência e rate limit configuráveis.
+    'instituicoes' (do dataset) é ignorado: a busca parte dos CSVs.
+    """
+    import threading
+    from github_simulado import iniciar_servidor
+
+    servidor = iniciar_servidor(0, opcoes['limite'], opcoes['janela'], opcoes['latencia'])
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    os.environ['GITHUB_API_URL'] = f"http://127.0.0.1:{servidor.server_address[1]}"
+    os.environ.setdefault('GITHUB_TOKEN', 'falso')
+    os.environ['GITHUB_HTTP_CACHE'] = ''
+
+    import consulta_if
+    df = consulta_if.load_institutions_data('dados/institutos_federais.csv').head(opcoes['instituicoes'])
+    resultado = consulta_if.generate_institutions_repos_json(df, max_workers=opcoes['workers'],
+                                                            backend=opcoes['backend_busca'])
+    servidor.shutdown()
+    return resultado
+
+
+# Módulos importados antes de iniciar o cronômetro (o tempo de importação é medido à parte)
+MODULOS_ESTAGIOS = {
+    'desduplicacao': ['remove_duplicadas'],
+    'quase_duplicatas': ['quase_duplicatas'],
+    'filtro_idioma': ['filtrar_idioma'],
+    'clusterizacao': ['clusterizador'],
+    'frontend': ['exportar_frontend'],
+    'busca': ['github_simulado'],
+}
+
+FUNCOES_ESTAGIOS = {
+    'desduplicacao': _desduplicacao,
+    'quase_duplicatas': _quase_duplicatas,
+    'filtro_idioma': _filtro_idioma,
+    'clusterizacao': _clusterizacao,
+    'frontend': _frontend,
+    'busca': _busca,
+}
+
+
+def _executar_estagio(estagio, caminho_dataset, opcoes, fila):
+    """
+    Corpo do processo filho: carrega o dataset, executa a etapa e devolve as medidas.
+    """
+    import contextlib
+    import importlib
+    import io
+
+    from snapshot_colunar import carregar_dados
+
+    inicio = time.perf_counter()
+    instituicoes = [] if estagio == 'busca' else carregar_dados(caminho_dataset)['institutions_data']
+    segundos_carga = time.perf_counter() - inicio
+    entrada = contar_repositorios(instituicoes)
+
+    inicio = time.perf_counter()
+    for modulo in MODULOS_ESTAGIOS[estagio]:
+        importlib.import_module(modulo)
+    segundos_importacao = time.perf_counter() - inicio
+    rss_inicio = rss_pico_mb()
+
+    saida_texto = io.StringIO()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(saida_texto):
+        resultado = FUNCOES_ESTAGIOS[estagio](instituicoes, opcoes)
+    segundos = time.perf_counter() - inicio
+
+    saida = contar_repositorios(resultado)
+    processados = saida if estagio == 'busca' else entrada
+    fila.put({
+        'estagio': estagio,
+        'repos_entrada': entrada,
+        'repos_saida': saida,
+        'segundos': round(segundos, 4),
+        'segundos_carga': round(segundos_carga, 4),
+        'segundos_importacao': round(segundos_importacao, 4),
+        'repos_por_segundo': round(processados / segundos, 1) if segundos > 0 else None,
+        'rss_inicio_mb': round(rss_inicio, 1),
+        'rss_pico_mb': round(rss_pico_mb(), 1),
+    })
+
+
+def medir_estagio(estagio, caminho_dataset, opcoes):
+    """
+    Executa uma etapa em um processo novo ('spawn'), para que o pico de RSS de
+    uma etapa não contamine a seguinte.
+    """
+    contexto = multiprocessing.get_context('spawn')
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar_estagio, args=(estagio, caminho_dataset, opcoes, fila))
+    processo.start()
+    processo.join()
+    if processo.exitcode != 0:
+        return {'estagio': estagio, 'erro': f"processo terminou com código {processo.exitcode}"}
+    return fila.get()
+
+
+# === 2. Registro e comparação de resultados ===
+
+def commit_atual():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        sujo = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+    return f"{commit}-modificado" if sujo else commit
+
+
+def carregar_resultados(caminho):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def comparar(atual, anteriores, referencia=None, tolerancia=0.2, minimo_segundos=0.05):
+    """
+    Compara cada etapa de uma execução com a medida mais recente da mesma etapa
+    e do mesmo tamanho (ou do commit 'referencia'). Diferenças de tempo abaixo de
+    'minimo_segundos' são ruído. Imprime a tabela e retorna as etapas com regressão.
+    """
+    candidatos = [r for r in anteriores if r['repos'] == atual['repos'] and r['semente'] == atual['semente']]
+    if referencia:
+        candidatos = [r for r in candidatos if r['commit'].startswith(referencia)]
+    medidas_base = {}
+    for registro in candidatos:
+        for medida in registro['estagios']:
+            if 'erro' not in medida:
+                medidas_base[medida['estagio']] = (registro['commit'], medida)
+    if not medidas_base:
+        print(f"Sem execução anterior com {atual['repos']} repositórios para comparar.")
+        return []
+
+    print(f"\n📊 {atual['repos']} repositórios (commit atual: {atual['commit']})")
+    print(f"{'etapa':<18}{'commit base':<20}{'antes (s)':>11}{'agora (s)':>11}{'Δ tempo':>9}"
+          f"{'antes (MB)':>12}{'agora (MB)':>12}")
+    regressoes = []
+    for medida in atual['estagios']:
+        if medida['estagio'] not in medidas_base or 'erro' in medida:
+            continue
+        commit_base, anterior = medidas_base[medida['estagio']]
+        diferenca = medida['segundos'] - anterior['segundos']
+        delta_tempo = diferenca / anterior['segundos'] if anterior['segundos'] else 0
+        delta_rss = medida['rss_pico_mb'] / anterior['rss_pico_mb'] - 1 if anterior['rss_pico_mb'] else 0
+        mais_lenta = delta_tempo > tolerancia and diferenca > minimo_segundos
+        alerta = ' ⚠️' if mais_lenta or delta_rss > tolerancia else ''
+        if alerta:
+            regressoes.append(medida['estagio'])
+        print(f"{medida['estagio']:<18}{commit_base:<20}{anterior['segundos']:>11.2f}{medida['segundos']:>11.2f}"
+              f"{delta_tempo:>+9.0%}{anterior['rss_pico_mb']:>12.0f}{medida['rss_pico_mb']:>12.0f}{alerta}")
+    return regressoes
+
+
+# === 3. Execução ===
+
+def executar_benchmark(tamanhos, estagios=ESTAGIOS_PADRAO, semente=0, opcoes=None, resultados=RESULTADOS_PATH):
+    """
+    Mede as etapas para cada tamanho de dataset e grava uma linha por tamanho
+    em 'resultados'. Retorna a lista de registros.
+    """
+    opcoes = opcoes or {}
+    registros = []
+    for tamanho in tamanhos:
+        caminho = os.path.join(DIRETORIO_DATASETS, f"sintetico_{tamanho}_{semente}.json")
+        if not os.path.exists(caminho):
+            print(f"🧪 Gerando dataset sintético com {tamanho} repositórios...")
+            salvar_dataset(caminho, tamanho, semente)
+
+        registro = {
+            'commit': commit_atual(),
+            'data': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'repos': tamanho,
+            'semente': semente,
+            'opcoes': opcoes,
+            'estagios': [],
+        }
+        for estagio in estagios:
+            medida = medir_estagio(estagio, caminho, opcoes)
+            registro['estagios'].append(medida)
+            if 'erro' in medida:
+                print(f"❌ {estagio}: {medida['erro']}")
+            else:
+                print(f"⏱️ {tamanho} repos | {estagio:<17} {medida['segundos']:>9.2f}s "
+                      f"{medida['repos_por_segundo'] or 0:>12.0f} repos/s  pico {medida['rss_pico_mb']:.0f} MB")
+
+        with open(resultados, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        registros.append(registro)
+    print(f"💾 Resultados acrescentados a '{resultados}'")
+    return registros
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do pipeline com dados sintéticos.")
+    parser.add_argument("--repos", type=int, nargs='+', default=[1000, 10000],
+                        help="Tamanhos dos datasets sintéticos (número de repositórios).")
+    parser.add_argument("--estagios", nargs='+', choices=ESTAGIOS, default=list(ESTAGIOS_PADRAO))
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--resultados", default=RESULTADOS_PATH, help="Arquivo JSONL de resultados.")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do filtro de idioma e da busca.")
+    parser.add_argument("--clusters", type=int, default=15)
+    parser.add_argument("--backend", choices=('tfidf', 'hashing'), default='tfidf', help="Backend de clusterização.")
+    parser.add_argument("--instituicoes", type=int, default=20, help="Instituições buscadas na etapa 'busca'.")
+    parser.add_argument("--backend-busca", choices=('rest', 'graphql'), default='rest')
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latência do GitHub simulado, em segundos.")
+    parser.add_argument("--limite", type=int, default=5000, help="Requisições por janela no GitHub simulado.")
+    parser.add_argument("--janela", type=int, default=60, help="Janela de rate limit do GitHub simulado, em segundos.")
+    parser.add_argument("--comparar", nargs='?', const='', metavar='COMMIT',
+                        help="Compara com a execução anterior (ou com a do commit indicado).")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Piora relativa aceita em --comparar.")
+    args = parser.parse_args(argv)
+
+    anteriores = carregar_resultados(args.resultados)
+    opcoes = {
+        'workers': args.workers, 'clusters': args.clusters, 'backend': args.backend,
+        'instituicoes': args.instituicoes, 'backend_busca': args.backend_busca,
+        'latencia': args.latencia, 'limite': args.limite, 'janela': args.janela,
+    }
+    registros = executar_benchmark(args.repos, args.estagios, args.semente, opcoes, args.resultados)
+
+    if args.comparar is not None:
+        regressoes = [estagio for registro in registros
+                      for estagio in comparar(registro, anteriores, args.comparar or None, args.tolerancia)]
+        if regressoes:
+            print(f"\n⚠️ Regressões acima de {args.tolerancia:.0%}: {', '.join(regressoes)}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
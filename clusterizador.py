@@ -1,51 +1,587 @@
 import json
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-import re
-import nltk
-from nltk.corpus import stopwords
+import numpy as np
+import argparse
+import multiprocessing
+import time
 import os
 
-# --- O código de preprocess_text e stopwords PERSONALIZADAS é o mesmo que antes ---
-try:
-    stopwords.words('portuguese')
-    stopwords.words('english')
-except LookupError:
-    print("Baixando NLTK stopwords...")
-    nltk.download('stopwords')
-    nltk.download('punkt')
-
-custom_stopwords = [
-    'projeto', 'disciplina', 'desenvolvimento', 'sistema', 'sistemas',
-    'computação', 'ciência', 'federal', 'universidade', 'trabalho',
-    'dados', 'estrutura', 'web', 'aplicação', 'implementação', 'gestão',
-    'curso', 'repositório', 'ufam', 'tcc', 'site', 'código', 'api', 'app',
-    'base', 'uso', 'para', 'com', 'um', 'uma', 'este', 'esta', 'disponibiliza',
-    'Toad_-3-Blooket', 'IFRS 9','l10n_tw_standard_ifrss', 'unbound', '.config',
-    'durante','FBA port to iOS'
-]
-portuguese_stopwords = set(stopwords.words('portuguese'))
-english_stopwords = set(stopwords.words('english'))
-all_stopwords = portuguese_stopwords.union(english_stopwords).union(set(custom_stopwords))
-
-def preprocess_text(text):
-    if text is None:
-        return ""
-    text = text.lower()
-    text = re.sub(r'\W', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    words = text.split()
-    filtered_words = [word for word in words if word not in all_stopwords]
-    return ' '.join(filtered_words)
-
-# --- Fim do código de preprocess_text ---
-
-
-def cluster_and_visualize_repositories(input_file, output_file, num_clusters=15):
+# sklearn, scipy, pandas e joblib são importados dentro das funções que os usam:
+# importar este módulo (pipeline.py --help, --modo assign sem novos repositórios) fica rápido
+from snapshot_colunar import FORMATOS, caminho_snapshot, carregar_dados, salvar_snapshot
+from fluxo_json import EscritorInstituicoes, iterar_instituicoes
+from metricas import METRICAS_PATH, metricas
+
+# Stopwords e pré-processamento ficam em texto.py (também usados pelo índice de busca do front-end)
+from texto import preprocess_textos
+
+
+def coletar_repositorios(institutions_data_list):
+    """
+    Achata a lista de instituições em um DataFrame com uma linha por
+    repositório, já com o texto pré-processado usado na vetorização.
+
+    Retorna (df, repos): 'repos' é a lista dos dicts originais na mesma ordem
+    das linhas de df, usada para gravar o Cluster_ID de volta nos dados. O
+    DataFrame guarda só colunas simples, sem referências aos objetos.
+    """
+    import pandas as pd
+
+    repos = []
+    instituicoes = []
+    for institution in institutions_data_list:
+        institution_repos = institution.get('Repositorios', [])
+        repos.extend(institution_repos)
+        instituicoes.extend([institution.get('Sigla', 'N/A')] * len(institution_repos))
+
+    df = pd.DataFrame({
+        'Nome do Repositório': [repo.get('Nome do Repositório', 'N/A') for repo in repos],
+        'Descricao': [repo.get('Descricao', 'N/A') for repo in repos],
+        'Linguagem Principal': [repo.get('Linguagem Principal', 'N/A') for repo in repos],
+        'Estrelas': [repo.get('Estrelas', 0) for repo in repos],
+        'Link de Acesso': [repo.get('Link de Acesso', '#') for repo in repos],
+        'Instituicao': instituicoes,
+    })
+    # Mesmo texto combinado de antes (f"{nome} {descricao}", inclusive "None")
+    combinados = [f"{repo.get('Nome do Repositório', '')} {repo.get('Descricao', '')}" for repo in repos]
+    df['processed_text'] = preprocess_textos(combinados)
+    return df, repos
+
+
+# --- Backends de clusterização ---
+# 'tfidf': TfidfVectorizer com vocabulário completo + KMeans (comportamento original)
+# 'minibatch': HashingVectorizer + TfidfTransformer + MiniBatchKMeans, com memória
+#              constante em relação ao vocabulário e ajuste incremental (partial_fit)
+BACKENDS = ('tfidf', 'minibatch')
+HASH_N_FEATURES = 2 ** 20
+MINIBATCH_TAMANHO_LOTE = 1024
+MINIBATCH_EPOCAS = 5
+
+
+def criar_vetorizador_hash():
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # alternate_sign=False mantém as contagens não negativas, como o TF-IDF espera
+    return HashingVectorizer(ngram_range=(1,3), n_features=HASH_N_FEATURES,
+                             alternate_sign=False, norm=None)
+
+
+def nomes_features_hash(vectorizer, texts, indices):
+    """
+    Recupera o n-grama correspondente a cada índice do espaço de hash.
+    O HashingVectorizer não guarda vocabulário, então o corpus é reanalisado
+    uma vez, registrando apenas os índices pedidos (ex.: os termos mais
+    pesados de cada centróide).
+    """
+    from sklearn.utils import murmurhash3_32
+
+    pendentes = set(int(i) for i in indices)
+    nomes = {}
+    analyzer = vectorizer.build_analyzer()
+    for text in texts:
+        if not pendentes:
+            break
+        for termo in analyzer(text):
+            # Mesmo cálculo de índice usado internamente pelo HashingVectorizer
+            indice = abs(murmurhash3_32(termo, seed=0)) % vectorizer.n_features
+            if indice in pendentes:
+                nomes[indice] = termo
+                pendentes.discard(indice)
+    return nomes
+
+
+def filtrar_frequencia_documentos(contagens, min_df=2, max_df=0.85):
+    """
+    Equivalente a min_df/max_df do TfidfVectorizer para a matriz do espaço de hash.
+    Retorna a máscara booleana das colunas mantidas (as que não aparecem em poucos
+    documentos nem em quase todos); aplique-a com aplicar_mascara().
+    """
+    contagens = contagens.tocsr()
+    df = np.bincount(contagens.indices, minlength=contagens.shape[1])
+    return (df >= min_df) & (df <= max_df * contagens.shape[0])
+
+
+def aplicar_mascara(contagens, mascara):
+    import scipy.sparse as sp
+
+    return contagens @ sp.diags(mascara.astype(contagens.dtype))
+
+
+def vetorizar_ajuste(texts, backend='tfidf'):
+    """
+    Ajusta o vetorizador do backend e devolve (modelo_parcial, X). A mesma matriz
+    X é reaproveitada pela varredura de k (--auto-k) e pelo ajuste final.
+    """
+    from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+
+    if backend == 'minibatch':
+        vectorizer = criar_vetorizador_hash()
+        contagens = vectorizer.transform(texts)
+        mascara = filtrar_frequencia_documentos(contagens)
+        transformer = TfidfTransformer()
+        X = transformer.fit_transform(aplicar_mascara(contagens, mascara))
+        return {'backend': 'minibatch', 'vectorizer': vectorizer, 'mascara': mascara,
+                'transformer': transformer}, X
+
+    vectorizer = TfidfVectorizer(min_df=2, max_df=0.85, ngram_range=(1,3))
+    X = vectorizer.fit_transform(texts)
+    return {'backend': 'tfidf', 'vectorizer': vectorizer}, X
+
+
+def ajustar_minibatch_kmeans(X, num_clusters, random_state=42):
+    from sklearn.cluster import MiniBatchKMeans
+
+    # n_init não se aplica: partial_fit inicializa os centróides uma única vez, no primeiro lote
+    kmeans = MiniBatchKMeans(n_clusters=num_clusters, random_state=random_state, batch_size=MINIBATCH_TAMANHO_LOTE)
+    # O ajuste é feito lote a lote: o mesmo laço serve para dados que chegam em partes
+    rng = np.random.RandomState(random_state)
+    for _ in range(MINIBATCH_EPOCAS):
+        ordem = rng.permutation(X.shape[0])
+        for inicio in range(0, X.shape[0], MINIBATCH_TAMANHO_LOTE):
+            lote = X[ordem[inicio:inicio + MINIBATCH_TAMANHO_LOTE]]
+            # O primeiro partial_fit precisa de pelo menos num_clusters amostras
+            if lote.shape[0] >= num_clusters or hasattr(kmeans, 'cluster_centers_'):
+                kmeans.partial_fit(lote)
+    return kmeans
+
+
+def ajustar_clusters(modelo, X, texts, num_clusters):
+    """
+    Ajusta o KMeans do backend sobre X e completa o modelo com os termos mais
+    representativos de cada cluster. Retorna (modelo, rótulos).
+    """
+    num_clusters = min(num_clusters, X.shape[0])
+    if num_clusters == 0:
+        return None, None
+
+    if modelo['backend'] == 'minibatch':
+        kmeans = ajustar_minibatch_kmeans(X, num_clusters)
+        cluster_labels = kmeans.predict(X)
+        centros = kmeans.cluster_centers_
+        order_centroids = centros.argsort()[:, ::-1][:, :5]
+        nomes = nomes_features_hash(modelo['vectorizer'], texts, order_centroids.ravel())
+        termos = [
+            [nomes.get(int(ind), f"#{ind}") for ind in order_centroids[i] if centros[i, ind] > 0]
+            for i in range(num_clusters)
+        ]
+    else:
+        from sklearn.cluster import KMeans
+        kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init='auto')
+        cluster_labels = kmeans.fit_predict(X)
+        order_centroids = kmeans.cluster_centers_.argsort()[:, ::-1]
+        terms = modelo['vectorizer'].get_feature_names_out()
+        termos = [[terms[ind] for ind in order_centroids[i, :5]] for i in range(num_clusters)]
+
+    return {**modelo, 'kmeans': kmeans, 'termos': termos}, cluster_labels
+
+
+# --- Escolha automática do número de clusters (--auto-k) ---
+# Cada k é ajustado com MiniBatchKMeans (rápido) sobre a mesma matriz X, em um
+# pool de processos, e pontuado em uma amostra. Só os k avaliados dentro do
+# orçamento de tempo entram na escolha; o ajuste final usa o backend escolhido.
+METRICAS_K = ('silhouette', 'davies_bouldin')
+AUTO_K_PADRAO = {'k_min': 5, 'k_max': 40, 'passo': 5, 'metrica': 'silhouette',
+                 'orcamento_segundos': 300, 'workers': os.cpu_count() or 1, 'amostra': 3000}
+
+_X_VARREDURA = None
+_AMOSTRA_VARREDURA = None
+
+
+def _iniciar_worker_varredura(X, amostra):
+    # A matriz é enviada uma única vez para cada processo, não a cada k
+    global _X_VARREDURA, _AMOSTRA_VARREDURA
+    _X_VARREDURA = X
+    _AMOSTRA_VARREDURA = amostra
+
+
+def _avaliar_k(k, metrica):
+    kmeans = ajustar_minibatch_kmeans(_X_VARREDURA, k)
+    X_amostra = _X_VARREDURA[_AMOSTRA_VARREDURA]
+    rotulos = kmeans.predict(X_amostra)
+    if len(np.unique(rotulos)) < 2:
+        return k, None
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.metrics import davies_bouldin_score, silhouette_score
+
+    if metrica == 'davies_bouldin':
+        # Davies-Bouldin exige matriz densa: reduz a amostra com SVD antes
+        componentes = min(100, X_amostra.shape[1] - 1, X_amostra.shape[0] - 1)
+        reduzida = TruncatedSVD(n_components=componentes, random_state=42).fit_transform(X_amostra)
+        return k, float(davies_bouldin_score(reduzida, rotulos))
+    return k, float(silhouette_score(X_amostra, rotulos, metric='cosine'))
+
+
+def escolher_k(X, k_min=5, k_max=40, passo=5, metrica='silhouette', orcamento_segundos=300,
+               workers=1, amostra=3000):
+    """
+    Varre k em [k_min, k_max] em paralelo e devolve o dict 'k_selection' com o k
+    escolhido e a curva de pontuação (silhouette: maior é melhor; Davies-Bouldin:
+    menor é melhor). Retorna None se nenhum k puder ser avaliado.
+    """
+    n = X.shape[0]
+    valores_k = [k for k in range(k_min, k_max + 1, passo) if 2 <= k < n]
+    if not valores_k:
+        return None
+    rng = np.random.RandomState(42)
+    indices_amostra = np.sort(rng.choice(n, size=min(amostra, n), replace=False))
+
+    inicio = time.monotonic()
+    curva = {}
+    prazo = inicio + orcamento_segundos
+    pool = multiprocessing.Pool(processes=max(workers, 1), initializer=_iniciar_worker_varredura,
+                                initargs=(X, indices_amostra))
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            full_data = json.load(f) # Carrega o dicionário completo
+        resultados = [pool.apply_async(_avaliar_k, (k, metrica)) for k in valores_k]
+        pendentes = 0
+        for resultado in resultados:
+            resultado.wait(max(prazo - time.monotonic(), 0))
+            if not resultado.ready():
+                pendentes += 1
+                continue
+            k, score = resultado.get()
+            if score is not None:
+                curva[k] = score
+        if pendentes:
+            print(f"⏱️ Orçamento de {orcamento_segundos}s esgotado: {pendentes} valores de k não avaliados.")
+    finally:
+        # Encerra os processos: ajustes ainda em andamento não seguem consumindo CPU após o orçamento
+        pool.terminate()
+        pool.join()
+
+    if not curva:
+        return None
+    melhor = max if metrica == 'silhouette' else min
+    k_escolhido = melhor(curva, key=curva.get)
+    print(f"🔢 k escolhido: {k_escolhido} ({metrica} = {curva[k_escolhido]:.4f}), "
+          f"{len(curva)} valores avaliados em {time.monotonic() - inicio:.1f}s.")
+    return {
+        "metric": metrica,
+        "chosen_k": int(k_escolhido),
+        "scores": [{"k": int(k), "score": curva[k]} for k in sorted(curva)],
+    }
+
+
+# --- Persistência do modelo ---
+# O modelo ajustado (vetorizador, centróides, termos e o mapa rótulo -> Cluster_ID)
+# é salvo em disco. Assim novos repositórios podem ser atribuídos sem reajuste e um
+# reajuste explícito reaproveita os IDs antigos, mantendo o filtro de clusters do
+# front-end com o mesmo significado entre execuções.
+MODELO_PATH = os.path.join('modelos', 'clusterizador.joblib')
+MODELO_VERSAO = 1
+MODOS = ('refit', 'assign')
+
+
+def salvar_modelo(modelo, caminho=MODELO_PATH):
+    import joblib
+
+    directory = os.path.dirname(caminho)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    joblib.dump({**modelo, 'versao': MODELO_VERSAO}, caminho)
+    metricas.registrar_arquivo(caminho)
+    print(f"💾 Modelo de clusterização salvo em '{caminho}'.")
+
+
+def carregar_modelo(caminho=MODELO_PATH):
+    """
+    Carrega o modelo persistido. Retorna None se não existir ou se tiver sido
+    salvo por uma versão incompatível deste script.
+    """
+    if not caminho or not os.path.exists(caminho):
+        return None
+    import joblib
+    modelo = joblib.load(caminho)
+    if modelo.get('versao') != MODELO_VERSAO:
+        print(f"Aviso: Modelo '{caminho}' tem versão {modelo.get('versao')} (esperada {MODELO_VERSAO}) e será ignorado.")
+        return None
+    return modelo
+
+
+def vetorizar(modelo, texts):
+    if modelo['backend'] == 'minibatch':
+        contagens = aplicar_mascara(modelo['vectorizer'].transform(texts), modelo['mascara'])
+        return modelo['transformer'].transform(contagens)
+    return modelo['vectorizer'].transform(texts)
+
+
+def prever_clusters(modelo, texts):
+    """
+    Cluster_IDs estáveis para 'texts' usando um modelo já ajustado (sem reajuste).
+    """
+    rotulos = modelo['kmeans'].predict(vetorizar(modelo, texts))
+    return np.asarray(modelo['ids'])[rotulos]
+
+
+def _centroides_alinhados(antigo, novo):
+    """
+    Centróides do modelo antigo expressos no espaço de features do modelo novo.
+    No backend 'minibatch' o espaço de hash é o mesmo; no 'tfidf' os vocabulários
+    diferem e os pesos são realocados termo a termo. Retorna None se os
+    backends não forem compatíveis.
+    """
+    if antigo['backend'] != novo['backend']:
+        return None
+    centros_antigos = antigo['kmeans'].cluster_centers_
+    if novo['backend'] == 'minibatch':
+        if centros_antigos.shape[1] != novo['kmeans'].cluster_centers_.shape[1]:
+            return None
+        return centros_antigos
+
+    vocabulario_novo = novo['vectorizer'].vocabulary_
+    alinhados = np.zeros((centros_antigos.shape[0], len(vocabulario_novo)))
+    for j, termo in enumerate(antigo['vectorizer'].get_feature_names_out()):
+        indice = vocabulario_novo.get(termo)
+        if indice is not None:
+            alinhados[:, indice] = centros_antigos[:, j]
+    return alinhados
+
+
+def remapear_ids(antigo, novo):
+    """
+    Associa cada cluster novo ao ID de um cluster antigo pela similaridade de
+    cosseno entre centróides (atribuição ótima, um para um). Clusters sem par
+    recebem IDs novos, após o maior ID já usado.
+    """
+    num_novos = novo['kmeans'].cluster_centers_.shape[0]
+    alinhados = _centroides_alinhados(antigo, novo) if antigo else None
+    if alinhados is None:
+        return np.arange(num_novos)
+
+    from scipy.optimize import linear_sum_assignment
+    from sklearn.preprocessing import normalize
+
+    ids_antigos = np.asarray(antigo['ids'])
+    similaridade = normalize(novo['kmeans'].cluster_centers_) @ normalize(alinhados).T
+    linhas, colunas = linear_sum_assignment(-similaridade)
+
+    ids = np.full(num_novos, -1)
+    ids[linhas] = ids_antigos[colunas]
+    proximo_id = int(ids_antigos.max()) + 1
+    for i in np.where(ids < 0)[0]:
+        ids[i] = proximo_id
+        proximo_id += 1
+    return ids
+
+
+def descricoes_clusters(modelo):
+    return [
+        {"id": int(cluster_id), "description": f"Cluster {int(cluster_id)}: {', '.join(cluster_terms)}"}
+        for cluster_id, cluster_terms in sorted(zip(modelo['ids'], modelo['termos']), key=lambda par: par[0])
+    ]
+
+
+def clusterizar_instituicoes(institutions_data_list, num_clusters=15, backend='tfidf',
+                             modo='refit', modelo_path=MODELO_PATH, auto_k=None, relatorio=None):
+    """
+    Clusteriza em memória os repositórios de 'institutions_data', gravando o
+    Cluster_ID em cada repositório. Retorna a lista de descrições dos clusters
+    (ou None se não houver o que clusterizar). Veja clusterizar_textos.
+    """
+    with metricas.cronometrar('clusterizacao.preprocessamento'):
+        df, repos = coletar_repositorios(institutions_data_list)
+
+    ids, generated_cluster_descriptions = clusterizar_textos(
+        df['processed_text'].tolist(), [repo.get('Cluster_ID') for repo in repos], num_clusters, backend,
+        modo=modo, modelo_path=modelo_path, auto_k=auto_k, relatorio=relatorio)
+    if ids is None:
+        return None
+
+    # Grava o Cluster_ID nos repositórios originais (mesma ordem das linhas de df)
+    # Isso modifica diretamente a estrutura 'data' (que é a lista de instituições original)
+    for repo, cluster_id in zip(repos, ids):
+        repo['Cluster_ID'] = cluster_id
+    return generated_cluster_descriptions
+
+
+def clusterizar_textos(texts, ids_existentes, num_clusters=15, backend='tfidf',
+                       modo='refit', modelo_path=MODELO_PATH, auto_k=None, relatorio=None):
+    """
+    Clusteriza os textos já pré-processados (um por repositório). 'ids_existentes'
+    traz o Cluster_ID atual de cada repositório (ou None). Retorna (ids, descrições):
+    o Cluster_ID de cada texto, na mesma ordem, e a lista de descrições dos
+    clusters; (None, None) se não houver o que clusterizar. 'backend' é um de BACKENDS.
+
+    modo='refit' ajusta um novo modelo e, se houver um modelo salvo em
+    modelo_path, remapeia os clusters novos para os IDs antigos.
+    modo='assign' usa o modelo salvo e só prevê o cluster dos repositórios que
+    ainda não têm Cluster_ID (novos ou alterados), sem reajuste.
+    modelo_path=None desativa a persistência.
+
+    auto_k (dict com as chaves de AUTO_K_PADRAO) ativa a escolha automática do
+    número de clusters no refit; o resultado vai para relatorio['k_selection'].
+    """
+    metricas.definir('clusterizacao.repos', len(texts))
+
+    if not texts:
+        print("Nenhum repositório encontrado para clusterizar.")
+        return None, None
+
+    modelo_antigo = carregar_modelo(modelo_path)
+
+    if modo == 'assign':
+        if modelo_antigo is None:
+            print("Aviso: Nenhum modelo salvo encontrado; fazendo o ajuste completo (refit).")
+        else:
+            ids = list(ids_existentes)
+            pendentes = [i for i, cluster_id in enumerate(ids) if cluster_id is None]
+            if pendentes:
+                with metricas.cronometrar('clusterizacao.predicao'):
+                    previstos = prever_clusters(modelo_antigo, [texts[i] for i in pendentes])
+                for i, cluster_id in zip(pendentes, previstos):
+                    ids[i] = int(cluster_id)
+            print(f"Atribuição concluída: {len(pendentes)} repositórios novos/alterados, "
+                  f"{len(ids) - len(pendentes)} mantidos.")
+            return ids, descricoes_clusters(modelo_antigo)
+
+    # Verifica se há clusters suficientes para o número de repositórios
+    if len(texts) < num_clusters:
+        print(f"Aviso: O número de repositórios ({len(texts)}) é menor que o número de clusters desejado ({num_clusters}). Ajustando num_clusters para {len(texts)}.")
+
+    with metricas.cronometrar('clusterizacao.vetorizacao'):
+        modelo, X = vetorizar_ajuste(texts, backend)
+    metricas.definir('clusterizacao.features', int(X.shape[1]))
+
+    if auto_k is not None:
+        with metricas.cronometrar('clusterizacao.escolha_k'):
+            selecao = escolher_k(X, **{**AUTO_K_PADRAO, **auto_k})
+        if selecao is not None:
+            num_clusters = selecao['chosen_k']
+            if relatorio is not None:
+                relatorio['k_selection'] = selecao
+
+    with metricas.cronometrar('clusterizacao.ajuste'):
+        modelo, cluster_labels = ajustar_clusters(modelo, X, texts, num_clusters)
+    metricas.definir('clusterizacao.k', int(min(num_clusters, X.shape[0])))
+    if modelo is None:
+        print("Nenhum repositório para clusterizar após o pré-processamento.")
+        return None, None
+
+    # IDs estáveis: clusters novos herdam o ID do cluster antigo mais parecido
+    modelo['ids'] = remapear_ids(modelo_antigo, modelo)
+    ids = [int(cluster_id) for cluster_id in modelo['ids'][cluster_labels]]
+
+    if modelo_path:
+        salvar_modelo(modelo, modelo_path)
+
+    print("\nTermos Mais Representativos por Cluster:")
+
+    # --- NOVO: Coletar as descrições dos clusters para o JSON ---
+    generated_cluster_descriptions = descricoes_clusters(modelo)
+    for descricao in generated_cluster_descriptions:
+        print(descricao['description']) # Ainda imprime para saída no console
+
+    return ids, generated_cluster_descriptions
+
+
+def atribuir_clusters_existentes(dados_clusterizados, institutions_novas, modelo_path=MODELO_PATH):
+    """
+    Atribui Cluster_IDs a repositórios novos/alterados sem reajustar o KMeans.
+
+    Usa o modelo persistido quando ele existe. Caso contrário, o TF-IDF é
+    ajustado sobre os repositórios já clusterizados e cada cluster é
+    representado pelo centróide dos seus membros; cada repositório novo recebe o
+    cluster de maior similaridade de cosseno. Usado pela atualização incremental.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.preprocessing import normalize
+
+    df_novos, repos_novos = coletar_repositorios(institutions_novas)
+    if not repos_novos:
+        return
+
+    modelo = carregar_modelo(modelo_path)
+    if modelo is not None:
+        ids = prever_clusters(modelo, df_novos['processed_text'].tolist())
+        for repo, cluster_id in zip(repos_novos, ids):
+            repo['Cluster_ID'] = int(cluster_id)
+        return
+
+    df_existentes, repos_existentes = coletar_repositorios(dados_clusterizados)
+    com_cluster = np.array([repo.get('Cluster_ID') is not None for repo in repos_existentes], dtype=bool)
+    if not com_cluster.any():
+        print("Aviso: Nenhum repositório clusterizado anteriormente; os novos repositórios ficam sem Cluster_ID.")
+        return
+
+    vectorizer = TfidfVectorizer(min_df=2, max_df=0.85, ngram_range=(1,3))
+    X = vectorizer.fit_transform(df_existentes.loc[com_cluster, 'processed_text'])
+    labels = np.array([repo['Cluster_ID'] for repo in repos_existentes if repo.get('Cluster_ID') is not None])
+
+    cluster_ids = np.unique(labels)
+    centroids = np.vstack([np.asarray(X[labels == cid].mean(axis=0)) for cid in cluster_ids])
+    centroids = normalize(centroids)
+
+    X_novos = vectorizer.transform(df_novos['processed_text'])
+    similaridades = X_novos @ centroids.T
+    melhores = np.asarray(similaridades).argmax(axis=1)
+    for repo, indice in zip(repos_novos, melhores):
+        repo['Cluster_ID'] = int(cluster_ids[indice])
+
+
+def chave_repositorio(repo):
+    return (repo.get('Link de Acesso'), repo.get('Nome do Repositório'), repo.get('Descricao'))
+
+
+def clusters_anteriores(caminho_anterior):
+    """
+    Cluster_ID de cada repositório da saída anterior, indexado por
+    (link, nome, descrição). Vazio se a saída não existir ou for inválida.
+    """
+    try:
+        # Em snapshots colunares só as quatro colunas usadas aqui são lidas
+        anterior = carregar_dados(caminho_anterior, colunas=['Link de Acesso', 'Nome do Repositório',
+                                                              'Descricao', 'Cluster_ID'])
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    return {
+        chave_repositorio(repo): repo['Cluster_ID']
+        for institution in anterior.get('institutions_data', [])
+        for repo in institution.get('Repositorios', [])
+        if repo.get('Cluster_ID') is not None
+    }
+
+
+def reaproveitar_clusters(institutions_data_list, caminho_anterior):
+    """
+    Copia o Cluster_ID da saída anterior para os repositórios que não mudaram
+    (mesmo link, nome e descrição). Os demais ficam sem Cluster_ID e são
+    atribuídos no modo 'assign'.
+    """
+    conhecidos = clusters_anteriores(caminho_anterior)
+    reaproveitados = 0
+    for institution in institutions_data_list:
+        for repo in institution.get('Repositorios', []):
+            chave = chave_repositorio(repo)
+            if chave in conhecidos:
+                repo['Cluster_ID'] = conhecidos[chave]
+                reaproveitados += 1
+            else:
+                repo.pop('Cluster_ID', None)
+    return reaproveitados
+
+
+def cluster_and_visualize_repositories(input_file, output_file, num_clusters=15, backend='tfidf',
+                                       modo='refit', modelo_path=MODELO_PATH, auto_k=None, formato_snapshot=None):
+    """
+    Clusteriza 'input_file' em duas passadas incrementais (fluxo_json): a
+    primeira guarda só o texto pré-processado e o Cluster_ID reaproveitado de
+    cada repositório; a segunda relê as instituições, grava o Cluster_ID e as
+    escreve na saída uma a uma. As instituições nunca ficam todas em memória.
+    """
+    # Repositórios inalterados mantêm o Cluster_ID da execução anterior (modo 'assign')
+    conhecidos = clusters_anteriores(output_file) if modo == 'assign' else {}
+
+    texts = []
+    ids_existentes = []
+    total_instituicoes = 0
+    try:
+        with metricas.cronometrar('clusterizacao.preprocessamento'):
+            for institution in iterar_instituicoes(input_file): # JSON, .parquet ou .arrow
+                total_instituicoes += 1
+                repos = institution.get('Repositorios', [])
+                # Mesmo texto combinado de coletar_repositorios (f"{nome} {descricao}")
+                texts.extend(preprocess_textos([f"{repo.get('Nome do Repositório', '')} {repo.get('Descricao', '')}"
+                                                for repo in repos]))
+                ids_existentes.extend(conhecidos.get(chave_repositorio(repo)) for repo in repos)
     except FileNotFoundError:
         print(f"Erro: O arquivo '{input_file}' não foi encontrado.")
         return
@@ -53,92 +589,89 @@ def cluster_and_visualize_repositories(input_file, output_file, num_clusters=15)
         print(f"Erro: O arquivo '{input_file}' não é um JSON válido.")
         return
 
-    # AQUI ESTÁ A CORREÇÃO: Acesse a lista de instituições corretamente
-    institutions_data_list = full_data.get('institutions_data', [])
-    if not institutions_data_list:
+    if not total_instituicoes:
         print(f"Aviso: Não foram encontradas informações de instituições na chave 'institutions_data' em '{input_file}'.")
         return
 
-    all_repos_list = []
-    
-    # Itere sobre a lista de dicionários de instituições
-    for institution in institutions_data_list: # <-- LINHA CORRIGIDA
-        # Use .get() para acessar 'Repositorios' com segurança
-        for repo in institution.get('Repositorios', []):
-            combined_text = f"{repo.get('Nome do Repositório', '')} {repo.get('Descricao', '')}"
-            processed_text = preprocess_text(combined_text)
-            
-            all_repos_list.append({
-                'Nome do Repositório': repo.get('Nome do Repositório', 'N/A'),
-                'Descricao': repo.get('Descricao', 'N/A'),
-                'Linguagem Principal': repo.get('Linguagem Principal', 'N/A'),
-                'Estrelas': repo.get('Estrelas', 0),
-                'Link de Acesso': repo.get('Link de Acesso', '#'),
-                'Instituicao': institution.get('Sigla', 'N/A'), # Use .get() para 'Sigla' também
-                'processed_text': processed_text,
-                'original_repo_obj': repo # Manter referência para atualizar depois
-            })
-
-    if not all_repos_list:
-        print("Nenhum repositório encontrado para clusterizar.")
+    relatorio = {}
+    with metricas.etapa('clusterizacao'):
+        ids, generated_cluster_descriptions = clusterizar_textos(texts, ids_existentes, num_clusters, backend,
+                                                                 modo=modo, modelo_path=modelo_path,
+                                                                 auto_k=auto_k, relatorio=relatorio)
+    del texts, ids_existentes
+    if ids is None:
         return
 
-    df = pd.DataFrame(all_repos_list)
-    texts = df['processed_text'].tolist()
-
-    vectorizer = TfidfVectorizer(min_df=2, max_df=0.85, ngram_range=(1,3))
-    X = vectorizer.fit_transform(texts)
-
-    # Verifica se há clusters suficientes para o número de repositórios
-    if X.shape[0] < num_clusters:
-        print(f"Aviso: O número de repositórios ({X.shape[0]}) é menor que o número de clusters desejado ({num_clusters}). Ajustando num_clusters para {X.shape[0]}.")
-        num_clusters = X.shape[0]
-        if num_clusters == 0:
-            print("Nenhum repositório para clusterizar após o pré-processamento.")
-            return
-
-    kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init='auto')
-    cluster_labels = kmeans.fit_predict(X)
-    df['Cluster_ID'] = cluster_labels
-
-    # Atualiza o 'original_repo_obj' com o Cluster_ID
-    # Isso modifica diretamente a estrutura 'data' (que é a lista de instituições original)
-    for i, row in df.iterrows():
-        row['original_repo_obj']['Cluster_ID'] = int(row['Cluster_ID'])
-
-    print("\nTermos Mais Representativos por Cluster:")
-    order_centroids = kmeans.cluster_centers_.argsort()[:, ::-1]
-    terms = vectorizer.get_feature_names_out()
-    
-    # --- NOVO: Coletar as descrições dos clusters para o JSON ---
-    generated_cluster_descriptions = []
-    for i in range(num_clusters):
-        cluster_terms = [terms[ind] for ind in order_centroids[i, :5]]
-        description_text = f"Cluster {i}: {', '.join(cluster_terms)}"
-        print(description_text) # Ainda imprime para saída no console
-        generated_cluster_descriptions.append({"id": i, "description": description_text})
-    
     # --- FINAL: Salvar os dados atualizados em um novo arquivo JSON (NOVO FORMATO) ---
-    final_output_data = {
-        "institutions_data": full_data.get('institutions_data', []), # 'full_data' já foi atualizada com os Cluster_IDs nos repositórios
-        "cluster_descriptions": generated_cluster_descriptions # A nova lista de descrições
-    }
+    extras = {"cluster_descriptions": generated_cluster_descriptions} # A nova lista de descrições
+    if 'k_selection' in relatorio:
+        extras['k_selection'] = relatorio['k_selection'] # k escolhido e curva de pontuação (--auto-k)
 
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(final_output_data, f, indent=2, ensure_ascii=False)
+        # Segunda passada: os IDs seguem a ordem dos repositórios da primeira
+        proximos_ids = iter(ids)
+        with EscritorInstituicoes(output_file, extras) as escritor:
+            for institution in iterar_instituicoes(input_file):
+                for repo in institution.get('Repositorios', []):
+                    repo['Cluster_ID'] = next(proximos_ids)
+                escritor.escrever(institution)
+        metricas.registrar_arquivo(output_file)
         print(f"\nProcessamento concluído. Repositórios e descrições de clusters salvos em '{output_file}' no novo formato.")
     except IOError as e:
         print(f"Erro ao escrever o arquivo '{output_file}': {e}")
+        return
+
+    if formato_snapshot:
+        salvar_snapshot(carregar_dados(output_file), caminho_snapshot(output_file, formato_snapshot))
+
+
+def opcoes_auto_k(args):
+    """
+    Converte os argumentos --auto-k/--k-* da linha de comando no dict de auto_k.
+    """
+    if not args.auto_k:
+        return None
+    return {'k_min': args.k_min, 'k_max': args.k_max, 'passo': args.k_passo, 'metrica': args.metrica,
+            'orcamento_segundos': args.orcamento_segundos, 'workers': args.workers_k}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clusteriza os repositórios por similaridade de nome/descrição.")
+    parser.add_argument("--backend", choices=BACKENDS, default='tfidf',
+                        help="'tfidf' (vocabulário completo + KMeans) ou 'minibatch' (hashing + MiniBatchKMeans).")
+    parser.add_argument("--modo", choices=MODOS, default='refit',
+                        help="'refit' reajusta o modelo mantendo os IDs antigos; 'assign' só atribui repositórios novos/alterados.")
+    parser.add_argument("--modelo", default=MODELO_PATH, help="Arquivo do modelo de clusterização persistido.")
+    parser.add_argument("--auto-k", action="store_true", help="Escolhe o número de clusters por varredura paralela de k.")
+    parser.add_argument("--k-min", type=int, default=AUTO_K_PADRAO['k_min'])
+    parser.add_argument("--k-max", type=int, default=AUTO_K_PADRAO['k_max'])
+    parser.add_argument("--k-passo", type=int, default=AUTO_K_PADRAO['passo'])
+    parser.add_argument("--metrica", choices=METRICAS_K, default=AUTO_K_PADRAO['metrica'])
+    parser.add_argument("--orcamento-segundos", type=float, default=AUTO_K_PADRAO['orcamento_segundos'],
+                        help="Tempo máximo da varredura de k.")
+    parser.add_argument("--workers-k", dest="workers_k", type=int, default=AUTO_K_PADRAO['workers'],
+                        help="Processos da varredura de k.")
+    parser.add_argument("--snapshot", choices=FORMATOS,
+                        help="Grava também um snapshot colunar da saída (requer pyarrow).")
+    parser.add_argument("--metricas", default=METRICAS_PATH, help="JSONL onde as métricas da execução são acrescentadas.")
+    parser.add_argument("--perfil", help="Diretório onde gravar o cProfile de cada etapa.")
+    args = parser.parse_args(argv)
+    metricas.configurar(args.perfil)
+
+    # --- Configurações para rodar ---
+    # O arquivo de entrada deve ser o JSON original que você tinha,
+    # ANTES de adicionar Cluster_ID (ou seja, o repositorios_federais.json)
+    input_json_file = 'repositorios_federais_filtrado_idioma.json' # <-- VERIFIQUE ESTE NOME DE ARQUIVO
+    output_json_file = 'repositorios_federais_com_clusters_visualizado.json'
+    N_CLUSTERS = 15 # Ajuste conforme sua análise
 
+    # Chama a função para clusterizar e visualizar
+    cluster_and_visualize_repositories(input_json_file, output_json_file,
+                                       num_clusters=N_CLUSTERS, backend=args.backend,
+                                       modo=args.modo, modelo_path=args.modelo,
+                                       auto_k=opcoes_auto_k(args), formato_snapshot=args.snapshot)
+    metricas.salvar(args.metricas, 'clusterizador')
 
-# --- Configurações para rodar ---
-# O arquivo de entrada deve ser o JSON original que você tinha,
-# ANTES de adicionar Cluster_ID (ou seja, o repositorios_federais.json)
-input_json_file = 'repositorios_federais_filtrado_idioma.json' # <-- VERIFIQUE ESTE NOME DE ARQUIVO
-output_json_file = 'repositorios_federais_com_clusters_visualizado.json'
-N_CLUSTERS = 15 # Ajuste conforme sua análise
 
-# Chama a função para clusterizar e visualizar
-cluster_and_visualize_repositories(input_json_file, output_json_file, 
-                                   num_clusters=N_CLUSTERS)
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
-python app.py
-sleep 2
-python filtrar_idiomas.py
-sleep 2 
-python clusterizador.py
-sleep 2
+# Uso: ./consulta.sh            -> reconstrói todo o dataset
+#      ./consulta.sh --incremental -> busca apenas os repositórios alterados desde o último snapshot
+# Para no primeiro erro (ex.: GITHUB_TOKEN ausente) em vez de commitar dados incompletos
+set -e
+if [ "$1" = "--incremental" ] && [ -f repositorios_federais_desduplicados_melhorado.json ]; then
+    python atualizacao_incremental.py --workers 4
+    python exportar_frontend.py
+else
+    # Busca, desduplicação, filtro de idioma e clusterização em uma única passada
+    python pipeline.py --workers 4 --salvar-intermediarios --frontend
+fi
 git add .
 git commit -m "Atualização automática do mapa de código público"
-git push origin main
\ No newline at end of file
+git push origin main
@@ -1,129 +1,211 @@
-import pandas as pd
 import requests
 import json
 import time
+import argparse
+import functools
+import itertools
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import os
 
-# === 1. Carrega token do arquivo .env ===
+from github_api import GitHubClient, iter_search_items, tokens_do_ambiente
+from github_graphql import GitHubGraphQL
+from filtros import filtrar_ruins
+from diario_coleta import DIARIO_COLETA_PATH, DiarioColeta
+from metricas import METRICAS_PATH, metricas
+
+# === 1. Token e clientes do GitHub ===
 # Certifique-se de ter um arquivo .env no mesmo diretório com GITHUB_TOKEN=SEU_TOKEN_AQUI
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+# (ou GITHUB_TOKENS=token1,token2,... para distribuir as buscas entre vários tokens).
+# O .env só é lido e os clientes só são criados no primeiro uso: este módulo também é
+# importado por pipeline.py e atualizacao_incremental.py, que nem sempre buscam no GitHub.
+BACKENDS_BUSCA = ('rest', 'graphql')
+_clientes = {}
+_lock_clientes = threading.Lock()
+
+def carregar_tokens():
+    """
+    Lê o token (ou o pool de tokens) do ambiente/.env. Sem nenhum, encerra com
+    status 1, para que consulta.sh não siga para o commit com dados vazios.
+    """
+    load_dotenv()
+    tokens = tokens_do_ambiente()
+    if not tokens:
+        print("Erro: GITHUB_TOKEN não encontrado no arquivo .env. Por favor, crie um arquivo .env com 'GITHUB_TOKEN=SEU_TOKEN_AQUI'.")
+        sys.exit(1)
+    return tokens
 
-# Verifica se o token foi carregado
-if not GITHUB_TOKEN:
-    print("Erro: GITHUB_TOKEN não encontrado no arquivo .env. Por favor, crie um arquivo .env com 'GITHUB_TOKEN=SEU_TOKEN_AQUI'.")
-    exit()
+def obter_github_client():
+    """
+    Cliente único (sessão keep-alive + cache de ETags), compartilhado por todos os workers
+    do crawler. Ele também carrega o orçamento de rate limit comum a todas as threads,
+    com o saldo de cada token do pool.
+    """
+    with _lock_clientes:
+        if 'rest' not in _clientes:
+            _clientes['rest'] = GitHubClient(carregar_tokens())
+        return _clientes['rest']
 
-HEADERS = {
-    'Authorization': f'token {GITHUB_TOKEN}',
-    'Accept': 'application/vnd.github.v3+json'
-}
+def obter_github_graphql():
+    """
+    Backend GraphQL (--backend graphql): cliente próprio, pois a cota GraphQL é
+    separada da cota de busca REST.
+    """
+    with _lock_clientes:
+        if 'graphql' not in _clientes:
+            _clientes['graphql'] = GitHubGraphQL(GitHubClient(carregar_tokens(), cache_path=None))
+        return _clientes['graphql']
 
 # === 2. Funções auxiliares ===
 
-def get_github_repos(query, per_page=100, retries=3, backoff_factor=0.5):
+def buscar_pagina_github(query, page=1, per_page=100, retries=3, backoff_factor=0.5, falhas=None):
     """
-    Busca repositórios no GitHub com tratamento de rate limit e retentativas aprimoradas.
+    Busca uma página da API de busca do GitHub com tratamento de rate limit e
+    retentativas aprimoradas. Retorna o JSON da página ou None em caso de erro.
+    Erros que não significam "sem resultados" (401, rede, retentativas esgotadas)
+    são acrescentados à lista 'falhas', para que a instituição não entre no diário.
     """
-    url = f"https://api.github.com/search/repositories?q={query}&sort=stars&order=desc&per_page={per_page}"
+    params = {'q': query, 'sort': 'stars', 'order': 'desc', 'per_page': per_page, 'page': page}
     for attempt in range(retries):
         try:
-            response = requests.get(url, headers=HEADERS)
+            # O cliente reserva um token do orçamento compartilhado antes de cada requisição
+            # e serve respostas 304 (não modificadas) do cache local de ETags
+            response = obter_github_client().get("/search/repositories", params=params)
             response.raise_for_status() # Lança um HTTPError para respostas de erro (4xx ou 5xx)
 
-            # --- Tratamento de Rate Limit ---
-            remaining_requests = int(response.headers.get('X-RateLimit-Remaining', 0))
-            reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
-            current_time = int(time.time())
-
-            if remaining_requests == 0:
-                sleep_duration = max(reset_time - current_time + 1, 0) # Adiciona +1 segundo para segurança
-                print(f"🚨 Rate limit atingido. Dormindo por {sleep_duration} segundos até o reset.")
-                time.sleep(sleep_duration)
-                continue # Tenta novamente após a pausa
-
-            return response.json().get('items', [])
+            # O tratamento de "X-RateLimit-Remaining == 0" fica a cargo do orçamento compartilhado:
+            # a próxima chamada a acquire() aguarda o reset, sem descartar esta resposta válida.
+            return response.json()
 
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 403 and "rate limit exceeded" in str(e).lower():
-                # Tratamento específico para 403 quando o rate limit é excedido
-                remaining_requests = int(e.response.headers.get('X-RateLimit-Remaining', 0))
-                reset_time = int(e.response.headers.get('X-RateLimit-Reset', 0))
-                current_time = int(time.time())
-                sleep_duration = max(reset_time - current_time + 1, 0) # Adiciona +1 segundo para segurança
-                print(f"🚨 Rate limit atingido (HTTP 403). Dormindo por {sleep_duration} segundos até o reset.")
-                time.sleep(sleep_duration)
+                # Tratamento específico para 403 quando o rate limit é excedido.
+                # O orçamento já foi zerado pelos cabeçalhos da resposta em release(),
+                # então a próxima tentativa aguarda o reset dentro de acquire().
+                print(f"🚨 Rate limit atingido (HTTP 403) para '{query}'. Aguardando o reset da janela.")
+                metricas.incrementar('github.retentativas')
                 continue # Tenta novamente após a pausa
             elif e.response.status_code == 422: # Tratamento específico para 422 (Unprocessable Entity)
                 print(f"🚫 Erro HTTP 422 (Entidade Não Processável) para a query '{query}'. Isso pode indicar que a organização não existe no GitHub ou o formato da query 'org:' não é aplicável. Não será retentado para este tipo de erro.")
-                return [] # Não retenta para 422, apenas retorna vazio para que o fallback funcione
+                return None # Não retenta para 422, apenas retorna vazio para que o fallback funcione
             elif e.response.status_code >= 500: # Erros de servidor (5xx), tentam novamente
                 sleep_time = backoff_factor * (2 ** attempt)
                 print(f"⚠️ Erro de servidor ({e.response.status_code}). Tentando novamente em {sleep_time:.1f} segundos...")
+                metricas.incrementar('github.retentativas')
+                metricas.incrementar('github.backoff_segundos', sleep_time)
                 time.sleep(sleep_time)
                 continue
             else: # Outros erros HTTP, não tentam novamente
                 print(f"Erro HTTP inesperado ({e.response.status_code}) em '{query}': {e}")
-                return []
+                if falhas is not None:
+                    falhas.append(query)
+                return None
         except requests.exceptions.RequestException as e: # Erros gerais de requisição (conexão, DNS, etc.)
             sleep_time = backoff_factor * (2 ** attempt)
             print(f"⚠️ Erro de requisição em '{query}': {e}. Tentando novamente em {sleep_time:.1f} segundos...")
+            metricas.incrementar('github.retentativas')
+            metricas.incrementar('github.erros_conexao')
+            metricas.incrementar('github.backoff_segundos', sleep_time)
             time.sleep(sleep_time)
             continue
-    print(f"❌ Falha ao buscar repositórios para '{query}' após {retries} tentativas.")
-    return []
+    print(f"❌ Falha ao buscar repositórios para '{query}' (página {page}) após {retries} tentativas.")
+    metricas.incrementar('github.falhas')
+    if falhas is not None:
+        falhas.append(query)
+    return None
 
-def filtrar_ruins(lista_repos, palavras_excluir=None):
+def get_github_repos(query, per_page=100, max_workers=4, falhas=None):
     """
-    Filtra repositórios com base em palavras-chave a serem excluídas e popularidade mínima.
+    Gera todos os repositórios de uma busca, seguindo a paginação até o teto de
+    1000 resultados da API (e dividindo por data de criação acima disso).
+    Os itens são entregues sob demanda, sem manter a organização inteira em memória.
+    As páginas que falharem são registradas em 'falhas' (veja buscar_pagina_github).
     """
-    # Expandindo a lista de palavras a excluir para melhorar a precisão
-    ruins = ["test", "template", "hello", "starter", "bot", "demo", "example", "tutorial", 
-             "boilerplate", "awesome", "curso", "aula", "my-repo", "repositorio-exemplo"]
-    if palavras_excluir:
-        ruins.extend(palavras_excluir)
-    return [
-        repo for repo in lista_repos
-        if all(p not in (repo.get('name') or "").lower() for p in ruins) and
-           all(p not in (repo.get('description') or "").lower() for p in ruins) and # Também filtra na descrição
-           (repo.get('stargazers_count', 0) > 0 or repo.get('forks_count', 0) > 0 or repo.get('watchers_count', 0) > 0) # Adiciona critério de popularidade mínima
-    ]
+    metricas.incrementar('busca.queries')
+    buscar = functools.partial(buscar_pagina_github, falhas=falhas)
+    return iter_search_items(buscar, query, per_page=per_page, max_workers=max_workers)
 
-def buscar_repositorios_instituicao(sigla, nome_completo):
+def _com_resultados(repos):
     """
-    Busca repositórios para uma dada instituição usando múltiplas estratégias.
+    Retorna um iterador equivalente a 'repos' se houver ao menos um item, ou None.
+    Permite testar se a busca trouxe resultados sem consumir o gerador inteiro.
+    """
+    repos = iter(repos)
+    primeiro = next(repos, None)
+    if primeiro is None:
+        return None
+    return itertools.chain([primeiro], repos)
+
+def estrategias_busca(sigla, nome_completo, filtro_extra=None, estrategia=None):
+    """
+    Queries de busca de uma instituição, na ordem em que são tentadas, cada uma
+    com a mensagem exibida quando é ela que traz os resultados.
+    filtro_extra (ex.: "pushed:>2025-01-01T00:00:00Z") é anexado a todas as queries.
+    Com 'estrategia' (índice), só essa query é devolvida, sem as de fallback.
     """
     sigla_lower = sigla.lower()
-    
+    sufixo = f" {filtro_extra}" if filtro_extra else ""
+
     # 1. Tenta buscar via organização (mais preciso e recomendado)
-    org_query = f"org:{sigla_lower}"
-    repos = get_github_repos(org_query)
-    if repos:
-        print(f"  ✅ Encontrados repos via organização '{sigla}'.")
-        return filtrar_ruins(repos)
+    org_query = f"org:{sigla_lower}{sufixo}"
 
     # 2. Busca por sigla e nome completo em nome/descrição com popularidade
     # Inclui o nome completo para cobrir mais casos
-    alt_query = f'"{sigla_lower}" in:name,description stars:>=1 OR "{nome_completo.lower()}" in:name,description stars:>=1'
-    repos = get_github_repos(alt_query)
-    if repos:
-        print(f"  ✅ Encontrados repos por sigla/nome em nome/descrição.")
-        return filtrar_ruins(repos)
+    alt_query = f'"{sigla_lower}" in:name,description stars:>=1 OR "{nome_completo.lower()}" in:name,description stars:>=1{sufixo}'
 
     # 3. Busca por nome ajustado (último recurso)
     # Melhorando o ajuste do nome para mais abrangência, removendo preposições comuns
     nome_alt = nome_completo.lower().replace("universidade", "uni").replace("instituto federal", "if")
     nome_alt = nome_alt.replace("de ", "").replace("da ", "").replace("do ", "").replace("das ", "").replace("dos ", "")
     # Remove espaços extras se houver
-    nome_alt = ' '.join(nome_alt.split()) 
-    nome_query = f'"{nome_alt}" in:description stars:>=1'
-    repos = get_github_repos(nome_query)
-    if repos:
-        print(f"  ✅ Encontrados repos por nome ajustado na descrição.")
-        return filtrar_ruins(repos)
-    
+    nome_alt = ' '.join(nome_alt.split())
+    nome_query = f'"{nome_alt}" in:description stars:>=1{sufixo}'
+
+    estrategias = [
+        (org_query, f"  ✅ Encontrados repos via organização '{sigla}'."),
+        (alt_query, "  ✅ Encontrados repos por sigla/nome em nome/descrição."),
+        (nome_query, "  ✅ Encontrados repos por nome ajustado na descrição."),
+    ]
+    return estrategias if estrategia is None else estrategias[estrategia:estrategia + 1]
+
+def estrategia_do_snapshot(sigla, nome_completo, repositorios):
+    """
+    Índice (em estrategias_busca) da estratégia que trouxe os repositórios de uma
+    instituição no último crawl completo, deduzido dos próprios repositórios, ou
+    None se ela não tem repositórios. O crawl para na primeira estratégia com
+    resultados, então: algum repositório da organização 'sigla' → org:; algum com
+    a sigla ou o nome completo no nome/descrição → sigla/nome; senão, nome ajustado.
+    """
+    if not repositorios:
+        return None
+    sigla_lower = sigla.lower()
+    for repo in repositorios:
+        # https://github.com/<dono>/<repositório>
+        partes = (repo.get('Link de Acesso') or '').split('/')
+        if len(partes) > 3 and partes[3].lower() == sigla_lower:
+            return 0
+    termos = (sigla_lower, (nome_completo or '').lower())
+    for repo in repositorios:
+        texto = f"{repo.get('Nome do Repositório') or ''} {repo.get('Descricao') or ''}".lower()
+        if any(termo and termo in texto for termo in termos):
+            return 1
+    return 2
+
+def buscar_repositorios_instituicao(sigla, nome_completo, filtro_extra=None, falhas=None, estrategia=None):
+    """
+    Busca repositórios para uma dada instituição usando múltiplas estratégias.
+    filtro_extra (ex.: "pushed:>2025-01-01T00:00:00Z") é anexado a todas as queries.
+    Com 'estrategia', só ela é tentada (veja estrategias_busca).
+    """
+    for query, mensagem in estrategias_busca(sigla, nome_completo, filtro_extra, estrategia):
+        repos = _com_resultados(get_github_repos(query, falhas=falhas))
+        if repos:
+            print(mensagem)
+            return filtrar_ruins(repos)
+
     print(f"  ⚠️ Nenhum repositório relevante encontrado para {sigla} após todas as tentativas.")
+    metricas.incrementar('busca.instituicoes_sem_resultado')
     return []
 
 def get_repo_details(repo):
@@ -145,6 +227,8 @@ def load_institutions_data(file_path):
     """
     Carrega os dados das instituições a partir de um arquivo CSV.
     """
+    import pandas as pd # Import tardio: só a leitura dos CSVs precisa do pandas
+
     try:
         # Assumindo que o CSV é separado por vírgulas e codificado em UTF-8
         return pd.read_csv(file_path, encoding='utf-8')
@@ -155,38 +239,160 @@ def load_institutions_data(file_path):
         print(f"Erro ao carregar '{file_path}': {e}")
         return pd.DataFrame()
 
-def generate_institutions_repos_json(df):
+def montar_instituicao(sigla, nome, url, repos_raw):
+    """
+    Desduplica os repositórios brutos de uma instituição e monta o seu registro.
+    Retorna None quando nenhum repositório é encontrado.
+    """
+    repos_dict = {}
+    for repo in repos_raw:
+        detalhes = get_repo_details(repo)
+        chave = (detalhes["Nome do Repositório"], detalhes["Link de Acesso"])
+        repos_dict[chave] = detalhes
+
+    if not repos_dict:
+        return None
+
+    return {
+        "Sigla": sigla,
+        "Nome Completo": nome,
+        "URL Oficial": url,
+        "Repositorios": list(repos_dict.values())
+    }
+
+def processar_instituicao(sigla, nome, url, filtro_extra=None, falhas=None, estrategia=None):
+    """
+    Busca e desduplica os repositórios de uma única instituição.
+    Retorna None quando nenhum repositório é encontrado.
+    """
+    print(f"🔍 Buscando repositórios para {sigla} ({nome})")
+    metricas.incrementar('busca.instituicoes')
+    return montar_instituicao(sigla, nome, url,
+                              buscar_repositorios_instituicao(sigla, nome, filtro_extra, falhas, estrategia))
+
+def registrar_no_diario(diario, sigla, nome, resultado, falhas):
+    """
+    Registra a instituição como concluída, a menos que alguma busca dela tenha
+    falhado: nesse caso o resultado (possivelmente incompleto) só vale para esta
+    execução e a instituição é buscada de novo com --resume.
+    """
+    if diario is None:
+        return
+    if falhas:
+        print(f"  ⚠️ {sigla}: {len(falhas)} buscas falharam; a instituição não foi registrada no diário.")
+        metricas.incrementar('busca.instituicoes_com_falha')
+        return
+    diario.registrar(sigla, nome, resultado)
+
+def processar_lote_graphql(linhas, filtro_extra=None, diario=None, estrategias_fixas=None):
+    """
+    Versão em lote de processar_com_diario para o backend GraphQL: as buscas
+    de todas as instituições de 'linhas' ainda fora do diário vão juntas em
+    poucas consultas (veja github_graphql.py). Retorna os resultados na ordem de 'linhas'.
+    'estrategias_fixas' é o de generate_institutions_repos_json.
+    """
+    fixas = estrategias_fixas or {}
+    pendentes = [linha for linha in linhas if diario is None or not diario.concluida(linha[0], linha[1])]
+    estrategias = {(sigla, nome): estrategias_busca(sigla, nome, filtro_extra, fixas.get(sigla))
+                   for sigla, nome, _ in pendentes}
+    for sigla, nome, _ in pendentes:
+        print(f"🔍 Buscando repositórios para {sigla} ({nome}) via GraphQL")
+    metricas.incrementar('busca.instituicoes', len(pendentes))
+    encontrados = obter_github_graphql().buscar_por_estrategias(
+        {chave: [query for query, _ in lista] for chave, lista in estrategias.items()})
+
+    resultados = []
+    for sigla, nome, url in linhas:
+        if (sigla, nome) not in encontrados:
+            resultados.append(diario.resultado(sigla, nome))
+            continue
+        fase, itens = encontrados[(sigla, nome)]
+        falhas = []
+        if fase is None and itens is None:
+            # A busca GraphQL falhou: refaz a instituição pela API REST, com todas as estratégias
+            print(f"  ⚠️ Busca GraphQL de {sigla} falhou. Usando a busca REST...")
+            metricas.incrementar('graphql.fallback_rest')
+            repos = buscar_repositorios_instituicao(sigla, nome, filtro_extra, falhas, fixas.get(sigla))
+        elif fase is None:
+            print(f"  ⚠️ Nenhum repositório relevante encontrado para {sigla} após todas as tentativas.")
+            metricas.incrementar('busca.instituicoes_sem_resultado')
+            repos = []
+        else:
+            query, mensagem = estrategias[(sigla, nome)][fase]
+            print(mensagem)
+            if itens is None:
+                # Acima do teto da busca: a API REST divide a query por data de criação
+                itens = get_github_repos(query, falhas=falhas)
+            repos = filtrar_ruins(itens)
+        resultado = montar_instituicao(sigla, nome, url, repos)
+        registrar_no_diario(diario, sigla, nome, resultado, falhas)
+        resultados.append(resultado)
+    return resultados
+
+def processar_com_diario(sigla, nome, url, filtro_extra=None, diario=None, estrategia=None):
+    """
+    processar_instituicao com checkpoint: instituições já registradas no diário
+    (DiarioColeta) são servidas dele, as demais são buscadas e registradas.
+    """
+    if diario is not None and diario.concluida(sigla, nome):
+        return diario.resultado(sigla, nome)
+    falhas = []
+    resultado = processar_instituicao(sigla, nome, url, filtro_extra, falhas, estrategia)
+    registrar_no_diario(diario, sigla, nome, resultado, falhas)
+    return resultado
+
+def generate_institutions_repos_json(df, max_workers=1, filtro_extra=None, diario=None, backend='rest',
+                                     estrategias_fixas=None):
     """
     Gera uma lista de dados de repositórios para cada instituição no DataFrame.
+
+    Com max_workers > 1 as instituições são buscadas em paralelo por um pool de
+    threads. Todos os workers compartilham o pool de tokens do cliente, com o
+    orçamento de rate limit de cada token (obter_github_client().budget), então o ganho
+    de velocidade não depende de estourar a cota.
+    A ordem das instituições na saída é a mesma do DataFrame.
+    filtro_extra é repassado a todas as queries (usado pela atualização incremental).
+    Com 'diario' (DiarioColeta), cada instituição concluída é gravada no checkpoint.
+    Com backend='graphql', as instituições são buscadas em lotes pela API GraphQL.
+    'estrategias_fixas' ({sigla: índice}, veja estrategia_do_snapshot) fixa a
+    única estratégia tentada para essas siglas; as demais usam todas.
     """
-    json_data = []
-    for index, row in df.iterrows():
-        sigla = row["Sigla"]
-        nome = row["Nome Completo"]
-        url = row["URL Oficial"]
-        print(f"🔍 Buscando repositórios para {sigla} ({nome})")
-        
-        repos_raw = buscar_repositorios_instituicao(sigla, nome)
-
-        repos_dict = {}
-        for repo in repos_raw:
-            detalhes = get_repo_details(repo)
-            chave = (detalhes["Nome do Repositório"], detalhes["Link de Acesso"])
-            repos_dict[chave] = detalhes
-
-        if repos_dict: # Apenas adiciona se repositórios foram encontrados para a instituição
-            json_data.append({
-                "Sigla": sigla,
-                "Nome Completo": nome,
-                "URL Oficial": url,
-                "Repositorios": list(repos_dict.values())
-            })
+    linhas = list(df[["Sigla", "Nome Completo", "URL Oficial"]].itertuples(index=False, name=None))
+    fixas = estrategias_fixas or {}
 
-    return json_data
+    if backend == 'graphql':
+        tamanho = obter_github_graphql().tamanho_lote
+        lotes = [linhas[i:i + tamanho] for i in range(0, len(linhas), tamanho)]
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            resultados = [resultado for lote in executor.map(lambda lote: processar_lote_graphql(lote, filtro_extra, diario, fixas), lotes)
+                          for resultado in lote]
+    elif max_workers <= 1:
+        resultados = [processar_com_diario(*linha, filtro_extra, diario, fixas.get(linha[0])) for linha in linhas]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resultados = list(executor.map(
+                lambda linha: processar_com_diario(*linha, filtro_extra, diario, fixas.get(linha[0])), linhas))
+
+    # Apenas mantém instituições para as quais repositórios foram encontrados
+    return [inst for inst in resultados if inst is not None]
 
 # === 3. Execução principal ===
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca repositórios de instituições federais no GitHub.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de instituições buscadas em paralelo (padrão: 1, modo sequencial).")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"Retoma uma coleta interrompida a partir do diário '{DIARIO_COLETA_PATH}'.")
+    parser.add_argument("--backend", choices=BACKENDS_BUSCA, default='rest',
+                        help="'graphql' busca várias instituições por consulta, só com os campos usados.")
+    parser.add_argument("--metricas", default=METRICAS_PATH, help="JSONL onde as métricas da execução são acrescentadas.")
+    parser.add_argument("--perfil", help="Diretório onde gravar o cProfile de cada etapa.")
+    args = parser.parse_args(argv)
+    metricas.configurar(args.perfil)
+    github_client = obter_github_client()
+    diario = DiarioColeta(retomar=args.resume, budget=github_client.budget)
+
     # Certifique-se de que o arquivo 'institutos_federais.csv' esteja no mesmo diretório
     df_if = load_institutions_data("institutos_federais.csv")
     
@@ -198,11 +404,15 @@ if __name__ == "__main__":
 
     if not df_if.empty:
         print("\n--- Processando Institutos Federais ---")
-        todos_dados.extend(generate_institutions_repos_json(df_if))
+        with metricas.etapa('busca'):
+            todos_dados.extend(generate_institutions_repos_json(df_if, max_workers=args.workers, diario=diario,
+                                                                backend=args.backend))
 
     # if not df_uf.empty:
     #     print("\n--- Processando Universidades Federais ---")
-    #     todos_dados.extend(generate_institutions_repos_json(df_uf))
+    #     todos_dados.extend(generate_institutions_repos_json(df_uf, max_workers=args.workers, diario=diario,
+    #                                                         backend=args.backend))
+    diario.finalizar()
 
     # Desduplicação final global de repositórios
     seen = set()
@@ -226,6 +436,21 @@ if __name__ == "__main__":
     try:
         with open("repositorios_federais_desduplicados_melhorado_v2.json", "w", encoding="utf-8") as f: # Novo nome de arquivo para V2
             json.dump(saida, f, ensure_ascii=False, indent=2)
+        metricas.registrar_arquivo("repositorios_federais_desduplicados_melhorado_v2.json")
         print("\n✅ Arquivo 'repositorios_federais_desduplicados_melhorado_v2.json' gerado com sucesso!")
     except Exception as e:
-        print(f"\n❌ Erro ao salvar o arquivo JSON: {e}")
\ No newline at end of file
+        print(f"\n❌ Erro ao salvar o arquivo JSON: {e}")
+
+    github_client.save_cache()
+    print(f"📡 Requisições ao GitHub: {github_client.stats['requests']} ({github_client.stats['not_modified']} servidas do cache via 304)")
+    if args.backend == 'graphql':
+        github_graphql = obter_github_graphql()
+        print(f"🧩 GraphQL: {github_graphql.stats['consultas']} consultas com {github_graphql.stats['buscas']} buscas, "
+              f"{github_graphql.stats['pontos']} pontos, {github_graphql.client.stats['bytes'] / 1024:.0f} KB")
+    if len(github_client.budget.requisicoes_por_token()) > 1:
+        print(f"🔑 Requisições por token: {github_client.budget.requisicoes_por_token()}")
+    metricas.salvar(args.metricas, 'consulta_if')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Gerador de datasets sintéticos no formato 'institutions_data', para medir como
+as etapas do pipeline escalam (veja benchmark.py).
+
+As instituições vêm dos CSVs em dados/. Os repositórios têm nomes e descrições
+montados a partir de modelos em português e inglês (com uma fração em outros
+idiomas, sem descrição ou com "N/A", como no crawl real), linguagens e licenças
+com a mesma distribuição aproximada dos snapshots do repositório, e uma fração
+de cópias quase idênticas (forks de material de curso). A geração é
+determinística pela semente e gravada em streaming, então 1M de repositórios
+não precisa caber em memória.
+
+    python dados_sinteticos.py --repos 100000 --saida .cache/benchmark/sintetico_100000.json
+"""
+import argparse
+import csv
+import os
+import random
+
+from fluxo_json import gravar_instituicoes
+
+ARQUIVOS_INSTITUICOES = ['dados/institutos_federais.csv', 'dados/universidades_federais.csv']
+
+LINGUAGENS = [('Python', 14), ('Java', 13), (None, 12), ('JavaScript', 10), ('HTML', 9), ('C', 9),
+              ('C++', 6), ('Jupyter Notebook', 6), ('TypeScript', 5), ('PHP', 4), ('CSS', 3),
+              ('Kotlin', 2), ('Dart', 2), ('C#', 2), ('R', 1), ('Go', 1), ('Shell', 1)]
+LICENCAS = [('N/A', 72), ('MIT', 16), ('GPL-3.0', 4), ('NOASSERTION', 2), ('Apache-2.0', 2),
+            ('GPL-2.0', 1), ('AGPL-3.0', 1), ('Unlicense', 1), ('BSD-3-Clause', 1)]
+
+TEMAS_PT = ['estrutura de dados', 'programação orientada a objetos', 'banco de dados', 'redes de computadores',
+            'sistemas operacionais', 'desenvolvimento web', 'aprendizado de máquina', 'computação gráfica',
+            'engenharia de software', 'algoritmos', 'inteligência artificial', 'robótica educacional',
+            'internet das coisas', 'processamento de imagens', 'segurança da informação', 'compiladores']
+TIPOS_PT = ['Material da disciplina de', 'Projeto integrador sobre', 'Trabalho de conclusão de curso em',
+            'Exercícios resolvidos de', 'Sistema acadêmico para', 'Aplicativo de apoio a', 'Notas de aula de',
+            'Laboratório de', 'Minicurso de', 'Pesquisa em']
+COMPLEMENTOS_PT = ['do curso técnico integrado', 'da graduação em sistemas de informação',
+                   'desenvolvido no campus', 'com exemplos práticos em sala de aula',
+                   'para o ensino médio integrado', 'usando metodologias ativas', 'do programa de extensão', '']
+TEMAS_EN = ['data structures', 'object oriented programming', 'databases', 'computer networks', 'operating systems',
+            'web development', 'machine learning', 'computer graphics', 'software engineering', 'algorithms',
+            'artificial intelligence', 'embedded systems', 'image processing', 'information security']
+TIPOS_EN = ['Course material for', 'Final project on', 'Solved exercises of', 'A simple tool for',
+            'Lecture notes on', 'Research code for', 'Workshop about', 'Student assignments in']
+COMPLEMENTOS_EN = ['at the federal institute', 'built with open source tools', 'for undergraduate students',
+                   'with step by step examples', 'developed during the semester', '']
+OUTROS_IDIOMAS = ['Proyecto de la asignatura de programación', 'Matériel de cours pour les étudiants',
+                  'Progetto di ricerca universitario', 'Datenbank Übungen für Studenten']
+PREFIXOS_NOME = ['aula', 'projeto', 'tcc', 'lab', 'trabalho', 'app', 'api', 'site', 'exercicios', 'sistema',
+                 'course', 'tutorial', 'workshop', 'bot', 'dashboard']
+
+
+def escolher_ponderado(rng, opcoes):
+    valores, pesos = zip(*opcoes)
+    return rng.choices(valores, weights=pesos, k=1)[0]
+
+
+def carregar_instituicoes(arquivos=ARQUIVOS_INSTITUICOES):
+    instituicoes = []
+    for caminho in arquivos:
+        if not os.path.exists(caminho):
+            continue
+        with open(caminho, 'r', encoding='utf-8') as f:
+            for linha in csv.DictReader(f):
+                instituicoes.append((linha['Sigla'], linha['Nome Completo'], linha['URL Oficial']))
+    return instituicoes or [('IFX', 'Instituto Federal Sintético', 'https://www.ifx.edu.br')]
+
+
+def gerar_descricao(rng, sigla):
+    sorteio = rng.random()
+    if sorteio < 0.08:
+        return None
+    if sorteio < 0.10:
+        return 'N/A'
+    if sorteio < 0.14:
+        return f"{rng.choice(OUTROS_IDIOMAS)} {sigla}"
+    if sorteio < 0.72:
+        partes = [rng.choice(TIPOS_PT), rng.choice(TEMAS_PT), rng.choice(COMPLEMENTOS_PT), f"({sigla})"]
+    else:
+        partes = [rng.choice(TIPOS_EN), rng.choice(TEMAS_EN), rng.choice(COMPLEMENTOS_EN), f"- {sigla}"]
+    return ' '.join(parte for parte in partes if parte)
+
+
+def gerar_repositorio(rng, sigla, indice):
+    nome = f"{rng.choice(PREFIXOS_NOME)}-{rng.choice(TEMAS_PT).split()[0]}-{indice}"
+    dono = f"{sigla.lower()}-{rng.randrange(1, 400)}"
+    ano = rng.randint(2015, 2025)
+    return {
+        'Nome do Repositório': nome,
+        'Descricao': gerar_descricao(rng, sigla),
+        'Linguagem Principal': escolher_ponderado(rng, LINGUAGENS),
+        'Estrelas': int(rng.paretovariate(1.2)) - 1,
+        'Licenca': escolher_ponderado(rng, LICENCAS),
+        'Ultima Atualizacao': f"{ano}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z",
+        'Link de Acesso': f"https://github.com/{dono}/{nome}",
+    }
+
+
+def gerar_instituicoes(total_repos, semente=0, fracao_copias=0.05, arquivos=ARQUIVOS_INSTITUICOES):
+    """
+    Gera as instituições com 'total_repos' repositórios no total, distribuídos
+    de forma desigual (algumas instituições concentram muitos repositórios).
+    Uma fração 'fracao_copias' repete o nome/descrição de um repositório
+    anterior com outro link (fork), e uma fração menor repete o link também
+    (duplicata exata, removida por desduplicar_global).
+    """
+    rng = random.Random(semente)
+    instituicoes = carregar_instituicoes(arquivos)
+    pesos = [rng.paretovariate(1.5) for _ in instituicoes]
+    soma = sum(pesos)
+    recentes = []
+    gerados = 0
+    for posicao, ((sigla, nome, url), peso) in enumerate(zip(instituicoes, pesos)):
+        restantes = total_repos - gerados
+        if posicao == len(instituicoes) - 1:
+            quantidade = restantes
+        else:
+            quantidade = min(restantes, round(total_repos * peso / soma))
+        if quantidade <= 0:
+            continue
+        repos = []
+        for _ in range(quantidade):
+            if recentes and rng.random() < fracao_copias:
+                original = rng.choice(recentes)
+                if rng.random() < 0.2:
+                    repo = dict(original)
+                else:
+                    dono = f"{sigla.lower()}-{rng.randrange(1, 400)}"
+                    repo = {**original, 'Link de Acesso': f"https://github.com/{dono}/{original['Nome do Repositório']}"}
+            else:
+                repo = gerar_repositorio(rng, sigla, gerados)
+                recentes.append(repo)
+                if len(recentes) > 5000:
+                    recentes.pop(rng.randrange(len(recentes)))
+            repos.append(repo)
+            gerados += 1
+        yield {'Sigla': sigla, 'Nome Completo': nome, 'URL Oficial': url, 'Repositorios': repos}
+
+
+def salvar_dataset(caminho, total_repos, semente=0, fracao_copias=0.05):
+    """
+    Grava o dataset em streaming (uma instituição por vez, uma por linha).
+    Retorna o caminho.
+    """
+    gravar_instituicoes(caminho, gerar_instituicoes(total_repos, semente, fracao_copias), indent=None)
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um dataset sintético no formato 'institutions_data'.")
+    parser.add_argument("--repos", type=int, default=10000, help="Número total de repositórios.")
+    parser.add_argument("--saida", help="Arquivo JSON (padrão: .cache/benchmark/sintetico_<repos>_<semente>.json).")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--fracao-copias", type=float, default=0.05, help="Fração de forks/cópias de repositórios.")
+    args = parser.parse_args(argv)
+
+    saida = args.saida or os.path.join('.cache', 'benchmark', f"sintetico_{args.repos}_{args.semente}.json")
+    salvar_dataset(saida, args.repos, args.semente, args.fracao_copias)
+    print(f"🧪 Dataset sintético com {args.repos} repositórios salvo em '{saida}' "
+          f"({os.path.getsize(saida) / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
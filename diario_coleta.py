@@ -0,0 +1,126 @@
+"""
+Diário (checkpoint) de uma coleta de repositórios no GitHub.
+
+consulta_if.generate_institutions_repos_json só devolve os dados ao final de
+todas as instituições; se o processo morre no meio (erro de rede, token
+expirado, cron encerrando uma espera longa de rate limit), todo o trabalho se
+perde. O diário é um arquivo JSONL só de acréscimos, com uma linha por
+instituição concluída (com o resultado e o estado do rate limit naquele
+momento). Com retomar=True, as instituições já registradas na execução
+interrompida não são buscadas de novo.
+
+    {"tipo": "inicio", "filtro": null, "inicio": "..."}
+    {"tipo": "instituicao", "Sigla": "IFB", "Nome Completo": "...", "resultado": {...}, "rate_limit": {...}}
+    {"tipo": "fim", "fim": "..."}
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+DIARIO_COLETA_PATH = os.path.join('.cache', 'diario_coleta.jsonl')
+
+
+def agora():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class DiarioColeta:
+    """
+    Checkpoint por instituição, seguro para os workers do crawler (cada linha é
+    gravada sob um lock e enviada ao disco com fsync).
+
+    Uma execução é retomada apenas se o diário existente for da mesma busca
+    ('filtro', ex.: "pushed:>2025-07-01" na atualização incremental) e não tiver
+    sido finalizado. Caso contrário, um diário novo é iniciado.
+    """
+
+    def __init__(self, caminho=DIARIO_COLETA_PATH, filtro=None, retomar=False, budget=None):
+        self.caminho = caminho
+        self.filtro = filtro
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._concluidas = {}
+        self.retomadas = 0
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        estado_rate_limit = self._carregar() if retomar else None
+        if self._concluidas:
+            print(f"⏯️ Retomando a coleta de '{caminho}': {len(self._concluidas)} instituições já concluídas.")
+            if budget is not None:
+                budget.restaurar(estado_rate_limit)
+            self._arquivo = open(caminho, 'a', encoding='utf-8')
+        else:
+            if retomar:
+                print(f"Aviso: Nenhuma coleta interrompida em '{caminho}' para esta busca. Começando do zero.")
+            self._arquivo = open(caminho, 'w', encoding='utf-8')
+            self._gravar({'tipo': 'inicio', 'filtro': filtro, 'inicio': agora()})
+
+    def _carregar(self):
+        """
+        Lê o diário existente. Retorna o último estado de rate limit registrado
+        e preenche self._concluidas, ou deixa-o vazio se o diário não servir.
+        """
+        if not os.path.exists(self.caminho):
+            return None
+        cabecalho = None
+        estado_rate_limit = None
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue  # Última linha truncada pela interrupção
+                tipo = registro.get('tipo')
+                if tipo == 'inicio':
+                    cabecalho = registro
+                elif tipo == 'instituicao':
+                    chave = (registro.get('Sigla'), registro.get('Nome Completo'))
+                    self._concluidas[chave] = registro.get('resultado')
+                    estado_rate_limit = registro.get('rate_limit') or estado_rate_limit
+                elif tipo == 'fim':
+                    self._concluidas.clear()
+                    return None
+
+        if cabecalho is None or cabecalho.get('filtro') != self.filtro:
+            self._concluidas.clear()
+            return None
+        return estado_rate_limit
+
+    def _gravar(self, registro):
+        with self._lock:
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            self._arquivo.flush()
+            os.fsync(self._arquivo.fileno())
+
+    def concluida(self, sigla, nome):
+        return (sigla, nome) in self._concluidas
+
+    def resultado(self, sigla, nome):
+        self.retomadas += 1
+        return self._concluidas[(sigla, nome)]
+
+    def registrar(self, sigla, nome, resultado):
+        """
+        Registra uma instituição concluída ('resultado' é o dict de
+        processar_instituicao, ou None quando nada foi encontrado).
+        """
+        registro = {'tipo': 'instituicao', 'Sigla': sigla, 'Nome Completo': nome, 'resultado': resultado}
+        if self.budget is not None:
+            registro['rate_limit'] = self.budget.estado()
+        self._gravar(registro)
+
+    def finalizar(self):
+        """
+        Marca a coleta como completa: uma nova execução com retomar=True começa do zero.
+        """
+        self._gravar({'tipo': 'fim', 'fim': agora()})
+        self.fechar()
+
+    def fechar(self):
+        with self._lock:
+            if not self._arquivo.closed:
+                self._arquivo.close()
@@ -0,0 +1,288 @@
+"""
+Enriquecimento opcional dos repositórios já filtrados com dados por repositório
+da API do GitHub:
+
+    GET /repos/{dono}/{repo}/languages              -> 'Linguagens' (% por linguagem)
+    GET /repos/{dono}/{repo}/stats/commit_activity  -> 'Commits Ultimo Ano' e
+                                                       'Commits Ultimas 12 Semanas'
+
+São duas requisições por repositório, então elas são feitas por um pool limitado
+de threads (com a sessão keep-alive e o orçamento de rate limit do GitHubClient)
+e guardadas em um cache em disco com validade (TTL). Um repositório só é
+consultado de novo quando a sua 'Ultima Atualizacao' muda ou quando a entrada
+do cache expira.
+
+As estatísticas de commits são calculadas pelo GitHub sob demanda: a primeira
+requisição responde HTTP 202 e os dados ficam prontos alguns segundos depois.
+Os repositórios com 202 são repetidos em rodadas, todos juntos, com espera
+crescente entre as rodadas.
+
+    python enriquecimento.py --entrada repositorios_federais_filtrado_idioma.json --workers 16
+    python pipeline.py --workers 4 --enriquecer
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from github_api import GitHubClient, tokens_do_ambiente
+from metricas import METRICAS_PATH, metricas
+
+ENRIQUECIMENTO_CACHE_PATH = os.path.join('.cache', 'enriquecimento.json')
+ENRIQUECIMENTO_PADRAO = {'workers': 8, 'ttl_dias': 7, 'rodadas_202': 5, 'espera_202': 2.0}
+LINK_GITHUB = 'https://github.com/'
+MAXIMO_LINGUAGENS = 5
+SEMANAS_RECENTES = 12
+
+
+def nome_completo_repositorio(link):
+    """
+    'dono/repo' a partir do 'Link de Acesso', ou None se não for um link do GitHub.
+    """
+    if not link or not link.startswith(LINK_GITHUB):
+        return None
+    partes = link[len(LINK_GITHUB):].strip('/').split('/')
+    return '/'.join(partes[:2]) if len(partes) >= 2 else None
+
+
+def resumir_linguagens(bytes_por_linguagem):
+    """
+    Percentual de cada linguagem (as MAXIMO_LINGUAGENS maiores), com uma casa decimal.
+    """
+    total = sum(bytes_por_linguagem.values())
+    if not total:
+        return {}
+    maiores = sorted(bytes_por_linguagem.items(), key=lambda par: par[1], reverse=True)[:MAXIMO_LINGUAGENS]
+    return {linguagem: round(100 * quantidade / total, 1) for linguagem, quantidade in maiores}
+
+
+def resumir_atividade(semanas):
+    """
+    Total de commits nas 52 semanas e nas SEMANAS_RECENTES últimas.
+    """
+    totais = [semana.get('total', 0) for semana in semanas or []]
+    return {'Commits Ultimo Ano': sum(totais), 'Commits Ultimas 12 Semanas': sum(totais[-SEMANAS_RECENTES:])}
+
+
+class Enriquecedor:
+    """
+    Busca e aplica 'Linguagens' e atividade de commits aos repositórios, com
+    cache em disco indexado pelo link. Uma entrada do cache vale enquanto a
+    'Ultima Atualizacao' do repositório for a mesma e tiver menos de 'ttl_dias'.
+    Contagens (do cache, buscados, respostas 202, falhas) ficam em self.stats.
+    """
+
+    def __init__(self, client=None, cache_path=ENRIQUECIMENTO_CACHE_PATH, workers=8, ttl_dias=7,
+                 rodadas_202=5, espera_202=2.0):
+        if client is None:
+            # Cota "core" (5000/h por token), separada da cota da busca: cliente próprio
+            from dotenv import load_dotenv
+            load_dotenv()
+            client = GitHubClient(tokens_do_ambiente(), cache_path=None, pool_size=max(workers, 1))
+        self.client = client
+        self.cache_path = cache_path
+        self.workers = max(workers, 1)
+        self.ttl = ttl_dias * 86400
+        self.rodadas_202 = rodadas_202
+        self.espera_202 = espera_202
+        self._cache = self._carregar_cache()
+        self.stats = {'cache': 0, 'buscados': 0, 'respostas_202': 0, 'falhas': 0}
+
+    def _carregar_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Aviso: Cache de enriquecimento '{self.cache_path}' ignorado: {e}")
+            return {}
+
+    def salvar_cache(self):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._cache, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.salvar_cache()
+
+    def _valida(self, repo):
+        entrada = self._cache.get(repo.get('Link de Acesso'))
+        return (entrada is not None and entrada.get('atualizacao') == repo.get('Ultima Atualizacao')
+                and time.time() - entrada.get('obtido_em', 0) < self.ttl)
+
+    def _buscar(self, caminho, tentativas=3):
+        """
+        GET de um recurso do repositório. Retorna (status, json): status None
+        indica falha transitória (rede, 5xx ou rate limit), que não vai para o cache.
+        """
+        for tentativa in range(tentativas):
+            try:
+                response = self.client.get(caminho)
+            except requests.exceptions.RequestException:
+                time.sleep(0.5 * (2 ** tentativa))
+                continue
+            if response.status_code in (200, 202):
+                return response.status_code, response.json() if response.content else None
+            if response.status_code == 204:
+                return 200, None  # Repositório vazio
+            if response.status_code >= 500:
+                time.sleep(0.5 * (2 ** tentativa))
+                continue
+            if response.status_code in (403, 429):
+                # O orçamento foi zerado pelos cabeçalhos: a próxima tentativa espera o reset em acquire()
+                continue
+            return response.status_code, None  # 404/409/451: sem dados para este repositório
+        return None, None
+
+    def _buscar_linguagens(self, nome):
+        status, corpo = self._buscar(f"/repos/{nome}/languages")
+        if status is None:
+            return None
+        return resumir_linguagens(corpo if status == 200 and isinstance(corpo, dict) else {})
+
+    def _buscar_atividade(self, nome):
+        """
+        Retorna o resumo da atividade, 202 se o GitHub ainda está calculando ou None em falha.
+        """
+        status, corpo = self._buscar(f"/repos/{nome}/stats/commit_activity")
+        if status == 202:
+            return 202
+        if status is None:
+            return None
+        return resumir_atividade(corpo if status == 200 and isinstance(corpo, list) else [])
+
+    def _buscar_todos(self, nomes):
+        """
+        Busca linguagens e atividade de 'nomes' no pool. Retorna
+        ({nome: linguagens}, {nome: atividade}), com None nas falhas.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futuro_linguagens = [executor.submit(self._buscar_linguagens, nome) for nome in nomes]
+            atividades = dict(zip(nomes, executor.map(self._buscar_atividade, nomes)))
+            linguagens = {nome: futuro.result() for nome, futuro in zip(nomes, futuro_linguagens)}
+
+            # Estatísticas sendo calculadas: todas as pendentes são repetidas juntas, em rodadas
+            espera = self.espera_202
+            for _ in range(self.rodadas_202):
+                calculando = [nome for nome, atividade in atividades.items() if atividade == 202]
+                if not calculando:
+                    break
+                self.stats['respostas_202'] += len(calculando)
+                metricas.incrementar('enriquecimento.respostas_202', len(calculando))
+                time.sleep(espera)
+                espera *= 2
+                atividades.update(zip(calculando, executor.map(self._buscar_atividade, calculando)))
+
+        for nome, atividade in atividades.items():
+            if atividade == 202:
+                atividades[nome] = None
+        return linguagens, atividades
+
+    def enriquecer(self, instituicoes):
+        """
+        Adiciona 'Linguagens', 'Commits Ultimo Ano' e 'Commits Ultimas 12 Semanas'
+        (in-place) aos repositórios de 'instituicoes'. Retorna quantos repositórios
+        foram enriquecidos.
+        """
+        repos = [repo for institution in instituicoes for repo in institution.get('Repositorios', [])
+                 if nome_completo_repositorio(repo.get('Link de Acesso'))]
+        anteriores = dict(self.stats)
+        pendentes = {}
+        for repo in repos:
+            if self._valida(repo):
+                self.stats['cache'] += 1
+            else:
+                pendentes[nome_completo_repositorio(repo['Link de Acesso'])] = repo
+
+        if pendentes:
+            print(f"🧬 Enriquecendo {len(pendentes)} repositórios ({self.stats['cache'] - anteriores['cache']} do cache) "
+                  f"com {self.workers} workers...")
+            nomes = list(pendentes)
+            with metricas.cronometrar('enriquecimento.busca'):
+                linguagens, atividades = self._buscar_todos(nomes)
+            agora = time.time()
+            for nome in nomes:
+                if linguagens[nome] is None or atividades[nome] is None:
+                    self.stats['falhas'] += 1
+                    continue
+                repo = pendentes[nome]
+                self._cache[repo['Link de Acesso']] = {
+                    'atualizacao': repo.get('Ultima Atualizacao'),
+                    'obtido_em': agora,
+                    'Linguagens': linguagens[nome],
+                    **atividades[nome],
+                }
+                self.stats['buscados'] += 1
+
+        enriquecidos = 0
+        for repo in repos:
+            entrada = self._cache.get(repo['Link de Acesso'])
+            if entrada is None or entrada.get('atualizacao') != repo.get('Ultima Atualizacao'):
+                continue
+            repo['Linguagens'] = entrada['Linguagens']
+            repo['Commits Ultimo Ano'] = entrada['Commits Ultimo Ano']
+            repo['Commits Ultimas 12 Semanas'] = entrada['Commits Ultimas 12 Semanas']
+            enriquecidos += 1
+
+        for chave in ('cache', 'buscados', 'falhas'):
+            metricas.incrementar(f"enriquecimento.{chave}", self.stats[chave] - anteriores[chave])
+        return enriquecidos
+
+    def relatorio(self):
+        print(f"🧬 Enriquecimento: {self.stats['buscados']} buscados, {self.stats['cache']} do cache, "
+              f"{self.stats['respostas_202']} respostas 202 repetidas, {self.stats['falhas']} falhas.")
+
+
+def opcoes_enriquecimento(args):
+    """
+    Converte os argumentos --enriquecer/--workers-enriquecimento no dict de opções do Enriquecedor.
+    """
+    if not args.enriquecer:
+        return None
+    return {'workers': args.workers_enriquecimento}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Adiciona linguagens e atividade de commits aos repositórios.")
+    parser.add_argument("--entrada", default='repositorios_federais_com_clusters_visualizado.json',
+                        help="JSON 'institutions_data' a enriquecer.")
+    parser.add_argument("--saida", help="Arquivo de saída (padrão: sobrescreve a entrada).")
+    parser.add_argument("--workers", type=int, default=ENRIQUECIMENTO_PADRAO['workers'],
+                        help="Requisições simultâneas à API do GitHub.")
+    parser.add_argument("--ttl-dias", type=float, default=ENRIQUECIMENTO_PADRAO['ttl_dias'],
+                        help="Validade das entradas do cache para repositórios sem alteração.")
+    parser.add_argument("--metricas", default=METRICAS_PATH, help="JSONL onde as métricas da execução são acrescentadas.")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.entrada, 'r', encoding='utf-8') as f:
+            full_data = json.load(f)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.entrada}' não foi encontrado.")
+    else:
+        with Enriquecedor(workers=args.workers, ttl_dias=args.ttl_dias) as enriquecedor:
+            enriquecedor.enriquecer(full_data.get('institutions_data', []))
+        enriquecedor.relatorio()
+        saida = args.saida or args.entrada
+        with open(saida, 'w', encoding='utf-8') as f:
+            json.dump(full_data, f, indent=2, ensure_ascii=False)
+        metricas.registrar_arquivo(saida)
+        print(f"✅ Repositórios enriquecidos salvos em '{saida}'")
+        metricas.salvar(args.metricas, 'enriquecimento')
+
+
+if __name__ == "__main__":
+    main()
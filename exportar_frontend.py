@@ -0,0 +1,353 @@
+"""
+Exporta os dados do mapa no formato consumido por index.html / scripts.js.
+
+Em vez do JSON completo e indentado, a página carrega:
+
+    dados_frontend/manifest.json           ponto de entrada (nome fixo): estatísticas
+                                           globais, top linguagens, top repositórios
+                                           ativos, clusters, opções dos filtros e o
+                                           índice de arquivos abaixo (primeira pintura)
+    dados_frontend/repositorios.<hash>.json
+                                           tabela completa minificada, em colunas com
+                                           chaves curtas e linguagem / licença /
+                                           instituição codificadas como índices
+    dados_frontend/busca.<hash>.json       índice invertido da busca geral (indice_busca.py)
+    dados_frontend/instituicoes/<sigla>.<hash>.json
+    dados_frontend/clusters/<id>.<hash>.json
+                                           a mesma tabela, só com os repositórios de
+                                           uma instituição ou de um cluster, buscada
+                                           quando o filtro correspondente é escolhido
+
+Os nomes com <hash> derivam do conteúdo: podem ser cacheados para sempre por
+navegadores e CDNs, e só os arquivos que mudaram são gravados a cada execução
+(os que deixam de ser referenciados pelo manifesto são removidos).
+
+Cada arquivo ganha variantes pré-comprimidas (.gz e, se o pacote brotli estiver
+instalado, .br) para servidores que servem arquivos estáticos comprimidos.
+
+    python exportar_frontend.py
+    python exportar_frontend.py --entrada repositorios_federais_com_clusters_visualizado.parquet
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+
+from indice_busca import construir_indice
+from snapshot_colunar import carregar_dados
+from metricas import metricas
+
+ARQUIVO_CLUSTERS = 'repositorios_federais_com_clusters_visualizado.json'
+DIRETORIO_FRONTEND = 'dados_frontend'
+ARQUIVO_MANIFESTO = 'manifest.json'
+DIRETORIO_INSTITUICOES = 'instituicoes'
+DIRETORIO_CLUSTERS = 'clusters'
+VERSAO_FORMATO = 1
+COMPRESSOES = ('gzip', 'brotli')
+EXTENSOES_COMPRESSAO = {'gzip': '.gz', 'brotli': '.br'}
+
+# Quase todos os links são do GitHub: o prefixo é guardado uma única vez
+LINK_BASE = 'https://github.com/'
+TOP_LINGUAGENS = 10
+TOP_REPOSITORIOS = 10
+
+
+def valor_valido(valor):
+    # Mesmo critério do scripts.js para linguagens/licenças: ignora vazios, 'N/A' e 'null'
+    return bool(valor) and valor not in ('N/A', 'null')
+
+
+# === 1. Tabela compacta ===
+
+class Dicionario:
+    """
+    Codifica valores repetidos como índices de uma lista (ordem de aparição).
+    """
+
+    def __init__(self):
+        self.valores = []
+        self._indices = {}
+
+    def codificar(self, valor):
+        if valor is None:
+            return None
+        if valor not in self._indices:
+            self._indices[valor] = len(self.valores)
+            self.valores.append(valor)
+        return self._indices[valor]
+
+
+def compactar_link(link):
+    if link and link.startswith(LINK_BASE):
+        return link[len(LINK_BASE):]
+    return link
+
+
+def compactar_repositorios(instituicoes):
+    """
+    Converte 'institutions_data' na tabela em colunas usada pelo front-end:
+
+        inst  [[sigla, nome completo], ...]     l/c  dicionários de linguagem/licença
+        n d e u h                               nome, descrição, estrelas, última
+                                                atualização, link (sem LINK_BASE)
+        i l c k                                 índices de instituição, linguagem,
+                                                licença e o Cluster_ID (null = ausente)
+        a                                       commits nas últimas 12 semanas
+                                                (null = sem enriquecimento)
+    """
+    dic_inst = Dicionario()
+    dic_ling = Dicionario()
+    dic_lic = Dicionario()
+    colunas = {chave: [] for chave in 'ndluehicka'}
+    for institution in instituicoes:
+        indice_inst = dic_inst.codificar((institution.get('Sigla'), institution.get('Nome Completo')))
+        for repo in institution.get('Repositorios', []):
+            colunas['n'].append(repo.get('Nome do Repositório'))
+            colunas['d'].append(repo.get('Descricao'))
+            colunas['l'].append(dic_ling.codificar(repo.get('Linguagem Principal')))
+            colunas['c'].append(dic_lic.codificar(repo.get('Licenca')))
+            colunas['e'].append(repo.get('Estrelas'))
+            colunas['u'].append(repo.get('Ultima Atualizacao'))
+            colunas['h'].append(compactar_link(repo.get('Link de Acesso')))
+            colunas['i'].append(indice_inst)
+            colunas['k'].append(repo.get('Cluster_ID'))
+            colunas['a'].append(repo.get('Commits Ultimas 12 Semanas'))
+
+    return {
+        'v': VERSAO_FORMATO,
+        'base': LINK_BASE,
+        'inst': [list(par) for par in dic_inst.valores],
+        'ling': dic_ling.valores,
+        'lic': dic_lic.valores,
+        **colunas,
+    }
+
+
+# === 2. Estatísticas pré-calculadas ===
+
+def calcular_estatisticas(instituicoes, cluster_descriptions):
+    """
+    Tudo o que a página mostra antes de ter a tabela de repositórios.
+    """
+    linguagens = Counter()
+    licencas = Counter()
+    repos_com_data = []
+    total = 0
+    for institution in instituicoes:
+        for repo in institution.get('Repositorios', []):
+            total += 1
+            if valor_valido(repo.get('Linguagem Principal')):
+                linguagens[repo['Linguagem Principal']] += 1
+            if valor_valido(repo.get('Licenca')):
+                licencas[repo['Licenca']] += 1
+            if repo.get('Ultima Atualizacao'):
+                repos_com_data.append({**repo, 'SiglaInstituicao': institution.get('Sigla')})
+
+    # Com o enriquecimento (enriquecimento.py), "mais ativos" é por commits recentes;
+    # sem ele, pela data da última atualização. Datas ISO 8601 em UTC podem ser ordenadas como texto.
+    repos_com_data.sort(key=lambda repo: (repo.get('Commits Ultimas 12 Semanas') or 0,
+                                          repo.get('Commits Ultimo Ano') or 0,
+                                          repo['Ultima Atualizacao']), reverse=True)
+    top_repos = [
+        {chave: repo.get(chave) for chave in ('Nome do Repositório', 'Link de Acesso', 'SiglaInstituicao',
+                                              'Linguagem Principal', 'Estrelas', 'Ultima Atualizacao',
+                                              'Commits Ultimas 12 Semanas')}
+        for repo in repos_com_data[:TOP_REPOSITORIOS]
+    ]
+    return {
+        'v': VERSAO_FORMATO,
+        'total': total,
+        'linguagem_mais_usada': linguagens.most_common(1)[0][0] if linguagens else 'N/A',
+        'licenca_mais_usada': licencas.most_common(1)[0][0] if licencas else 'N/A',
+        'top_linguagens': [{'language': lingua, 'count': contagem}
+                           for lingua, contagem in linguagens.most_common(TOP_LINGUAGENS)],
+        'top_repos': top_repos,
+        'linguagens': sorted(linguagens),
+        'licencas': sorted(licencas),
+        'cluster_descriptions': cluster_descriptions,
+    }
+
+
+# === 3. Gravação ===
+
+def serializar(dados):
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def comprimir(conteudo, compressao):
+    """
+    Retorna os bytes da variante comprimida, ou None se o formato não estiver
+    disponível (brotli é opcional).
+    """
+    if compressao == 'gzip':
+        # mtime=0 deixa a saída determinística: o mesmo conteúdo gera o mesmo .gz
+        return gzip.compress(conteudo, compresslevel=9, mtime=0)
+    if compressao == 'brotli':
+        try:
+            import brotli
+        except ImportError:
+            return None
+        return brotli.compress(conteudo, quality=11)
+    raise ValueError(f"Compressão desconhecida: {compressao}")
+
+
+def gravar_arquivo(caminho, conteudo, compressoes=COMPRESSOES, sobrescrever=True):
+    """
+    Grava 'conteudo' (bytes) e as variantes pré-comprimidas. Com
+    sobrescrever=False, arquivos que já existem são mantidos como estão (nomes
+    com hash de conteúdo). Retorna {caminho: bytes gravados} dos arquivos escritos.
+    """
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    variantes = [(caminho, lambda: conteudo)]
+    for compressao, extensao in zip(compressoes, (EXTENSOES_COMPRESSAO[c] for c in compressoes)):
+        variantes.append((caminho + extensao, lambda compressao=compressao: comprimir(conteudo, compressao)))
+
+    escritos = {}
+    for destino, gerar in variantes:
+        if not sobrescrever and os.path.exists(destino):
+            continue  # Mesmo hash, mesmo conteúdo: nem comprime de novo
+        dados = gerar()
+        if dados is None:
+            continue
+        tmp = f"{destino}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(dados)
+        os.replace(tmp, destino)
+        escritos[destino] = len(dados)
+    return escritos
+
+
+# === 4. Arquivos com hash de conteúdo (shards) ===
+
+def slug(texto):
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', texto.lower()).strip('-') or 'x'
+
+
+def nome_com_hash(prefixo, conteudo):
+    return f"{prefixo}.{hashlib.sha256(conteudo).hexdigest()[:12]}.json"
+
+
+def agrupar_shards(instituicoes):
+    """
+    Separa os repositórios por Sigla e por Cluster_ID, mantendo o formato
+    'institutions_data' (e a ordem original) dentro de cada grupo.
+    """
+    por_sigla = {}
+    por_cluster = {}
+    for institution in instituicoes:
+        cabecalho = {chave: valor for chave, valor in institution.items() if chave != 'Repositorios'}
+        repos = institution.get('Repositorios', [])
+        if repos:
+            por_sigla.setdefault(institution.get('Sigla'), []).append(institution)
+        grupos_cluster = {}
+        for repo in repos:
+            if repo.get('Cluster_ID') is not None:
+                grupos_cluster.setdefault(repo['Cluster_ID'], []).append(repo)
+        for cluster_id, repos_cluster in grupos_cluster.items():
+            por_cluster.setdefault(cluster_id, []).append({**cabecalho, 'Repositorios': repos_cluster})
+    return por_sigla, por_cluster
+
+
+def remover_obsoletos(diretorio, referenciados):
+    """
+    Apaga os arquivos com hash que o manifesto atual não referencia mais
+    (inclusive as variantes .gz/.br). Retorna quantos foram removidos.
+    """
+    padrao = re.compile(r'\.[0-9a-f]{12}\.json(\.gz|\.br)?$')
+    removidos = 0
+    for raiz, _, arquivos in os.walk(diretorio):
+        for arquivo in arquivos:
+            caminho = os.path.join(raiz, arquivo)
+            relativo = os.path.relpath(caminho, diretorio).replace(os.sep, '/')
+            base = re.sub(r'(\.gz|\.br)$', '', relativo)
+            if padrao.search(arquivo) and base not in referenciados:
+                os.remove(caminho)
+                removidos += 1
+    return removidos
+
+
+def exportar_frontend(full_data, diretorio=DIRETORIO_FRONTEND, compressoes=COMPRESSOES):
+    """
+    Gera o manifesto, a tabela completa e os shards por instituição e por
+    cluster a partir do documento com clusters. Retorna {caminho: bytes} dos
+    arquivos efetivamente gravados nesta execução.
+    """
+    instituicoes = full_data.get('institutions_data', [])
+    escritos = {}
+    referenciados = set()
+
+    def gravar_imutavel(prefixo, dados):
+        conteudo = serializar(dados)
+        relativo = nome_com_hash(prefixo, conteudo)
+        referenciados.add(relativo)
+        escritos.update(gravar_arquivo(os.path.join(diretorio, relativo), conteudo, compressoes,
+                                       sobrescrever=False))
+        return relativo
+
+    manifesto = calcular_estatisticas(instituicoes, full_data.get('cluster_descriptions', []))
+    manifesto['repositorios'] = gravar_imutavel('repositorios', compactar_repositorios(instituicoes))
+    # Índice invertido da busca geral, sobre as linhas da tabela completa
+    manifesto['busca'] = gravar_imutavel('busca', construir_indice(instituicoes))
+
+    por_sigla, por_cluster = agrupar_shards(instituicoes)
+    manifesto['instituicoes'] = []
+    slugs = set()
+    for sigla, grupo in por_sigla.items():
+        nome_arquivo = slug(sigla)
+        while nome_arquivo in slugs:  # Siglas diferentes com o mesmo slug
+            nome_arquivo += '-'
+        slugs.add(nome_arquivo)
+        manifesto['instituicoes'].append({
+            'sigla': sigla,
+            'nome': grupo[0].get('Nome Completo'),
+            'repos': sum(len(inst['Repositorios']) for inst in grupo),
+            'arquivo': gravar_imutavel(f"{DIRETORIO_INSTITUICOES}/{nome_arquivo}", compactar_repositorios(grupo)),
+        })
+    manifesto['clusters'] = [
+        {
+            'id': cluster_id,
+            'repos': sum(len(inst['Repositorios']) for inst in grupo),
+            'arquivo': gravar_imutavel(f"{DIRETORIO_CLUSTERS}/{cluster_id}", compactar_repositorios(grupo)),
+        }
+        for cluster_id, grupo in sorted(por_cluster.items())
+    ]
+
+    # O manifesto tem nome fixo e é o único arquivo reescrito sempre
+    escritos.update(gravar_arquivo(os.path.join(diretorio, ARQUIVO_MANIFESTO), serializar(manifesto), compressoes))
+    removidos = remover_obsoletos(diretorio, referenciados)
+
+    if 'brotli' in compressoes and comprimir(b'', 'brotli') is None:
+        print("Aviso: pacote 'brotli' não instalado; variantes .br não geradas.")
+    total = 1 + len(manifesto['instituicoes']) + len(manifesto['clusters'])
+    print(f"🌐 Front-end em '{diretorio}/': {total} arquivos de dados, "
+          f"{len(escritos)} gravados (com variantes), {removidos} obsoletos removidos.")
+    metricas.incrementar('escrita.bytes', sum(escritos.values()))
+    metricas.incrementar('escrita.arquivos', len(escritos))
+    metricas.definir('frontend.bytes', sum(escritos.values()))
+    return escritos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera os arquivos compactos consumidos por index.html.")
+    parser.add_argument("--entrada", default=ARQUIVO_CLUSTERS, help="JSON (ou snapshot .parquet/.arrow) com clusters.")
+    parser.add_argument("--saida", default=DIRETORIO_FRONTEND, help="Diretório de saída.")
+    parser.add_argument("--sem-compressao", action="store_true", help="Não gera as variantes .gz/.br.")
+    args = parser.parse_args(argv)
+
+    try:
+        dados = carregar_dados(args.entrada)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.entrada}' não foi encontrado.")
+    else:
+        exportar_frontend(dados, args.saida, () if args.sem_compressao else COMPRESSOES)
+
+
+if __name__ == "__main__":
+    main()
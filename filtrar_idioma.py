@@ -1,80 +1,202 @@
 import json
+import argparse
+import hashlib
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from langdetect import detect, DetectorFactory
 from langdetect import LangDetectException
-import re
+
+from filtros import filtrar_titulos
+from snapshot_colunar import FORMATOS, caminho_snapshot, carregar_dados, salvar_snapshot
+from fluxo_json import EscritorInstituicoes, iterar_instituicoes
+from metricas import METRICAS_PATH, metricas
 
 DetectorFactory.seed = 0
 
-custom_title_stopwords = [
-    'toad_-3-blooket','ifrs 9','l10n_tw_standard_ifrss','.config','FBA port to iOS',
-    'Best-Electronics-Appliances-for-Home-and-Kitchen---My-Home-Product-Guide', 'IFB-unix',
-    'BlooketPanel', 'IFRExtractor-RS', 'xxx','CA378-AOIS_USB3-IFB','IFB-FAIR-data-training',
-    'ifb-staff','Guide to excellent variety of Electronics Appliances','vapoursynth-colorbars-scripts',
-    'wiki-is-mostly-fake-radom-words-word-,genrationr-','XPS9570-Firmware-IFR','UEFI-Variable-Editer',
-    'IFRS 17','BlooketPanel','baidu','UEFI','ifrextractor-rs','wiki-is-mostly-fake-radom-words-word-genrationr-'
-]
+# Cache persistente de idiomas detectados, indexado pelo hash da descrição
+IDIOMAS_CACHE_PATH = os.path.join('.cache', 'idiomas_detectados.json')
+IDIOMAS_ACEITOS = ('pt', 'en') # Mantendo ambos 'pt' e 'en' como no seu filtro original
 
-def filter_repos_by_description_language(input_file, output_file):
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            full_data = json.load(f) # Renomeado para 'full_data' para clareza
-    except FileNotFoundError:
-        print(f"Erro: O arquivo '{input_file}' não foi encontrado.")
-        return
-    except json.JSONDecodeError:
-        print(f"Erro: O arquivo '{input_file}' não é um JSON válido.")
-        return
 
-    # AQUI ESTÁ A MUDANÇA PRINCIPAL: Acesse a lista de instituições corretamente
-    institutions_list = full_data.get('institutions_data', [])
-    if not institutions_list:
-        print(f"Aviso: Não foram encontradas informações de instituições na chave 'institutions_data' em '{input_file}'.")
-        return
+def _detectar_lote(descricoes):
+    """
+    Detecta o idioma de um lote de descrições (executado nos processos do pool).
+    Descrições em que o langdetect falha recebem "" (rejeitadas pelo filtro).
+    """
+    resultados = []
+    for description in descricoes:
+        try:
+            resultados.append(detect(description))
+        except LangDetectException:
+            resultados.append("")
+    return resultados
 
-    filtered_data = [] # Esta será a lista de instituições filtradas que será salva
-    total_repos_processed = 0
-    total_repos_kept = 0
 
-    # Itere sobre a lista de instituições
-    for institution in institutions_list: # <-- AQUI MUDOU: itera sobre a lista de dicionários de instituições
-        new_repos = []
-        institution_sigla = institution.get('Sigla', '').lower()
+class DetectorIdiomas:
+    """
+    Detecção de idioma com cache persistente e processamento paralelo.
 
-        # O restante do seu código dentro deste loop permanece o mesmo
-        for repo in institution.get('Repositorios', []): # Use .get() para repositórios também, caso esteja ausente
-            total_repos_processed += 1
-            repo_name = repo.get('Nome do Repositório', '').lower()
-            description = repo.get('Descricao')
-
-            # --- 1. FILTRO: Custom Stopwords no Título ---
-            found_title_stopword = False
-            for stop_word in custom_title_stopwords:
-                if stop_word.lower() in repo_name:
-                    found_title_stopword = True
-                    break
-            if found_title_stopword:
-                continue
+    Cada descrição é identificada pelo SHA-1 do seu texto; descrições já vistas
+    em execuções anteriores não passam de novo pelo langdetect. As que faltam
+    são agrupadas em lotes e, com workers > 1, distribuídas por um pool de
+    processos. Acertos, faltas (descrições únicas) e tempo gasto ficam em self.stats.
+    """
+
+    def __init__(self, cache_path=IDIOMAS_CACHE_PATH, workers=1, tamanho_lote=256):
+        self.cache_path = cache_path
+        self.workers = workers
+        self.tamanho_lote = tamanho_lote
+        self._cache = self._carregar_cache()
+        self._executor = None
+        self._vistos = set() # Descrições já contabilizadas nesta execução
+        self.stats = {'acertos': 0, 'faltas': 0, 'segundos': 0.0}
+
+    def _carregar_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Aviso: Cache de idiomas '{self.cache_path}' ignorado: {e}")
+            return {}
 
-            # --- 2. FILTRO: Siglas da Instituição não seguidas por espaço/hífen no Título ---
-            if institution_sigla:
-                if institution_sigla in repo_name:
-                    clean_match_pattern = r'\b' + re.escape(institution_sigla) + r'(?:[ \-]|$)'
-                    if not re.search(clean_match_pattern, repo_name):
-                        continue
-
-            # --- 3. FILTRO: Idioma da Descrição (lógica existente) ---
-            if description is None or description.strip() == '':
-                new_repos.append(repo)
-                total_repos_kept += 1
+    def salvar_cache(self):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(self._cache, f)
+
+    def fechar(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        self.salvar_cache()
+
+    def preparar(self, descricoes):
+        """
+        Garante que todas as descrições estejam no cache, detectando em lote
+        (e em paralelo, com workers > 1) apenas as que ainda faltam.
+        """
+        inicio = time.perf_counter()
+        faltantes = {}
+        for description in descricoes:
+            chave = hashlib.sha1(description.encode('utf-8')).hexdigest()
+            if chave in self._vistos:
                 continue
+            self._vistos.add(chave)
+            if chave in self._cache:
+                self.stats['acertos'] += 1
+            else:
+                faltantes[chave] = description
+        self.stats['faltas'] += len(faltantes)
+
+        if faltantes:
+            textos = list(faltantes.values())
+            lotes = [textos[i:i + self.tamanho_lote] for i in range(0, len(textos), self.tamanho_lote)]
+            if self.workers > 1 and len(lotes) > 1:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                resultados = self._executor.map(_detectar_lote, lotes)
+            else:
+                resultados = map(_detectar_lote, lotes)
+            idiomas = [lang for lote in resultados for lang in lote]
+            self._cache.update(zip(faltantes.keys(), idiomas))
+
+        segundos = time.perf_counter() - inicio
+        self.stats['segundos'] += segundos
+        metricas.registrar_tempo('filtro_idioma.deteccao', segundos)
+        metricas.incrementar('filtro_idioma.descricoes_detectadas', len(faltantes))
+
+    def detectar(self, descricoes):
+        """
+        Retorna a lista de idiomas (na mesma ordem de 'descricoes').
+        """
+        self.preparar(descricoes)
+        return [self._cache[hashlib.sha1(d.encode('utf-8')).hexdigest()] for d in descricoes]
+
+    def relatorio(self):
+        total = self.stats['acertos'] + self.stats['faltas']
+        taxa = (100 * self.stats['acertos'] / total) if total else 0
+        print(f"🔤 Detecção de idioma: {total} descrições, {self.stats['acertos']} do cache ({taxa:.0f}%), "
+              f"{self.stats['faltas']} detectadas em {self.stats['segundos']:.1f}s.")
 
-            try:
-                lang = detect(description)
-                if lang == 'pt' or lang == 'en': # Mantendo ambos 'pt' e 'en' como no seu filtro original
-                    new_repos.append(repo)
-                    total_repos_kept += 1
-            except LangDetectException:
-                pass 
+
+def descricoes_para_detectar(repos, institution_sigla):
+    """
+    Descrições não vazias dos repositórios que passam nos filtros de título,
+    usadas para pré-carregar o detector em lote.
+    """
+    return [
+        repo['Descricao'] for repo in filtrar_titulos(repos, institution_sigla)
+        if (repo.get('Descricao') or '').strip()
+    ]
+
+
+def filtrar_repositorios(repos, institution_sigla, detector):
+    """
+    Aplica os filtros de título (stopwords de config/filtros.json e sigla da
+    instituição, ver filtros.py) e de idioma da descrição a uma lista de repositórios.
+    O langdetect roda uma única vez, em lote, para as descrições que passaram no título.
+    """
+    # --- 1 e 2. FILTROS: Custom Stopwords e Siglas da Instituição no Título ---
+    candidatos = filtrar_titulos(repos, institution_sigla)
+
+    # --- 3. FILTRO: Idioma da Descrição (lógica existente) ---
+    # Repositórios sem descrição são mantidos
+    com_descricao = [repo for repo in candidatos if (repo.get('Descricao') or '').strip()]
+    idiomas = detector.detectar([repo['Descricao'] for repo in com_descricao])
+    aceitos = {id(repo) for repo, lang in zip(com_descricao, idiomas) if lang in IDIOMAS_ACEITOS}
+
+    mantidos = [
+        repo for repo in candidatos
+        if not (repo.get('Descricao') or '').strip() or id(repo) in aceitos
+    ]
+    metricas.incrementar('filtro_titulo.entrada', len(repos))
+    metricas.incrementar('filtro_titulo.saida', len(candidatos))
+    metricas.incrementar('filtro_idioma.entrada', len(candidatos))
+    metricas.incrementar('filtro_idioma.saida', len(mantidos))
+    return mantidos
+
+def filtrar_instituicoes(institutions_list, detector=None):
+    """
+    Filtra em memória uma lista de instituições (formato de 'institutions_data').
+    Retorna (instituicoes_filtradas, total_processados, total_mantidos).
+    """
+    if detector is None:
+        with DetectorIdiomas() as detector:
+            resultado = filtrar_instituicoes(institutions_list, detector)
+        detector.relatorio()
+        return resultado
+
+    filtered_data = []
+    total_repos_processed = 0
+    total_repos_kept = 0
+
+    # Detecta todas as descrições de uma vez, para que os lotes do pool cubram o dataset inteiro
+    detector.preparar([
+        description for institution in institutions_list
+        for description in descricoes_para_detectar(institution.get('Repositorios', []),
+                                                    institution.get('Sigla', '').lower())
+    ])
+
+    for institution in institutions_list:
+        institution_sigla = institution.get('Sigla', '').lower()
+        repos = institution.get('Repositorios', []) # Use .get() para repositórios também, caso esteja ausente
+        new_repos = filtrar_repositorios(repos, institution_sigla, detector)
+        total_repos_processed += len(repos)
+        total_repos_kept += len(new_repos)
 
         # Adiciona a instituição apenas se ela tiver repositórios após a filtragem
         # ou se você quiser manter a instituição mesmo com lista vazia (ajuste aqui)
@@ -83,19 +205,100 @@ def filter_repos_by_description_language(input_file, output_file):
             filtered_institution['Repositorios'] = new_repos
             filtered_data.append(filtered_institution)
 
+    return filtered_data, total_repos_processed, total_repos_kept
+
+def filtrar_fluxo(instituicoes, estatisticas, detector):
+    """
+    Gera as instituições filtradas de um fluxo (qualquer iterável), somando
+    repositórios processados e mantidos em 'estatisticas'.
+
+    As instituições são acumuladas até somarem descrições suficientes para
+    ocupar todos os workers do detector; então o lote é detectado de uma vez
+    e as instituições seguem adiante. A memória fica limitada ao tamanho do lote.
+    """
+    limite = detector.tamanho_lote * max(detector.workers, 1)
+    buffer = []
+    descricoes = []
+
+    def esvaziar():
+        detector.preparar(descricoes)
+        for institution in buffer:
+            institution_sigla = institution.get('Sigla', '').lower()
+            repos = institution.get('Repositorios', [])
+            new_repos = filtrar_repositorios(repos, institution_sigla, detector)
+            estatisticas['processados'] += len(repos)
+            estatisticas['mantidos'] += len(new_repos)
+            if new_repos:
+                yield {**institution, 'Repositorios': new_repos}
+        buffer.clear()
+        descricoes.clear()
+
+    for institution in instituicoes:
+        buffer.append(institution)
+        descricoes.extend(descricoes_para_detectar(institution.get('Repositorios', []),
+                                                   institution.get('Sigla', '').lower()))
+        if len(descricoes) >= limite:
+            yield from esvaziar()
+    yield from esvaziar()
+
+def filter_repos_by_description_language(input_file, output_file, workers=1, formato_snapshot=None):
+    # Leitura e escrita incrementais (fluxo_json): só um lote de instituições fica em memória
+    instituicoes = iterar_instituicoes(input_file) # JSON, .parquet ou .arrow
+    try:
+        primeira = next(instituicoes, None)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{input_file}' não foi encontrado.")
+        return
+    except json.JSONDecodeError:
+        print(f"Erro: O arquivo '{input_file}' não é um JSON válido.")
+        return
+
+    if primeira is None:
+        print(f"Aviso: Não foram encontradas informações de instituições na chave 'institutions_data' em '{input_file}'.")
+        return
+
+    estatisticas = {'processados': 0, 'mantidos': 0}
     try:
-        # AQUI ESTÁ A MUDANÇA PARA SALVAR: Envolva a lista filtrada na chave 'institutions_data'
-        output_json_structure = {"institutions_data": filtered_data}
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output_json_structure, f, indent=2, ensure_ascii=False)
-        print(f"Processamento concluído. {total_repos_kept} de {total_repos_processed} repositórios mantidos.")
-        print(f"O novo arquivo JSON foi salvo como '{output_file}'")
+        # Cada instituição filtrada é gravada assim que o seu lote sai do detector
+        with metricas.etapa('filtro_idioma'), DetectorIdiomas(workers=workers) as detector, \
+                EscritorInstituicoes(output_file) as escritor:
+            for filtered_institution in filtrar_fluxo(itertools.chain([primeira], instituicoes), estatisticas, detector):
+                escritor.escrever(filtered_institution)
+    except json.JSONDecodeError:
+        print(f"Erro: O arquivo '{input_file}' não é um JSON válido.")
+        return
     except IOError as e:
         print(f"Erro ao escrever o arquivo '{output_file}': {e}")
+        return
+    detector.relatorio()
+
+    metricas.registrar_arquivo(output_file)
+    print(f"Processamento concluído. {estatisticas['mantidos']} de {estatisticas['processados']} repositórios mantidos.")
+    print(f"O novo arquivo JSON foi salvo como '{output_file}'")
+
+    if formato_snapshot:
+        salvar_snapshot(carregar_dados(output_file), caminho_snapshot(output_file, formato_snapshot))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Filtra repositórios pelo título e pelo idioma da descrição.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processos usados na detecção de idioma (padrão: 1).")
+    parser.add_argument("--snapshot", choices=FORMATOS,
+                        help="Grava também um snapshot colunar da saída (requer pyarrow).")
+    parser.add_argument("--metricas", default=METRICAS_PATH, help="JSONL onde as métricas da execução são acrescentadas.")
+    parser.add_argument("--perfil", help="Diretório onde gravar o cProfile de cada etapa.")
+    args = parser.parse_args(argv)
+    metricas.configurar(args.perfil)
+
+    # Nome do arquivo de entrada e saída
+    # Use 'repositorios_federais_desduplicados.json' se você usou o código anterior para gerar um arquivo com essa estrutura
+    input_json_file = 'repositorios_federais.json' # Verifique se este é o nome correto do seu arquivo
+    output_json_file = 'repositorios_federais_filtrado_idioma.json'
+
+    filter_repos_by_description_language(input_json_file, output_json_file, workers=args.workers,
+                                         formato_snapshot=args.snapshot)
+    metricas.salvar(args.metricas, 'filtrar_idioma')
 
-# Nome do arquivo de entrada e saída
-# Use 'repositorios_federais_desduplicados.json' se você usou o código anterior para gerar um arquivo com essa estrutura
-input_json_file = 'repositorios_federais.json' # Verifique se este é o nome correto do seu arquivo
-output_json_file = 'repositorios_federais_filtrado_idioma.json'
 
-filter_repos_by_description_language(input_json_file, output_json_file)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+from metricas import metricas
+
+# Listas de bloqueio (stopwords de título e palavras "ruins") ficam em um arquivo
+# de configuração, para serem ajustadas sem editar o código
+FILTROS_CONFIG_PATH = os.getenv("FILTROS_CONFIG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "filtros.json"))
+
+
+# === 1. Carregamento e compilação das listas ===
+
+@lru_cache(maxsize=None)
+def carregar_listas(caminho=FILTROS_CONFIG_PATH):
+    """
+    Lê as listas de bloqueio do arquivo de configuração (JSON).
+    Retorna um dict {nome_da_lista: tupla_de_palavras}.
+    """
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        print(f"Aviso: Arquivo de filtros '{caminho}' não encontrado. Nenhuma lista de bloqueio será aplicada.")
+        return {}
+    return {nome: tuple(palavras) for nome, palavras in config.items()}
+
+
+@lru_cache(maxsize=None)
+def compilar_lista(palavras):
+    """
+    Compila uma lista de palavras em uma única regex de alternância, sem
+    diferenciar maiúsculas/minúsculas. Um único search() equivale a testar
+    'palavra in texto' para cada item da lista. Retorna None para lista vazia.
+    """
+    if not palavras:
+        return None
+    # Palavras mais longas primeiro, para que prefixos não escondam casamentos maiores
+    alternativas = sorted({re.escape(p.lower()) for p in palavras}, key=len, reverse=True)
+    return re.compile('|'.join(alternativas), re.IGNORECASE)
+
+
+def padrao_lista(nome, extras=None):
+    """
+    Regex compilada para uma lista do arquivo de configuração (mais palavras extras).
+    """
+    palavras = carregar_listas().get(nome, ())
+    if extras:
+        palavras = palavras + tuple(extras)
+    return compilar_lista(palavras)
+
+
+@lru_cache(maxsize=None)
+def padrao_sigla(sigla):
+    """
+    Regex (em cache) que aceita a sigla da instituição apenas como palavra
+    isolada, seguida de espaço, hífen ou fim do texto.
+    """
+    return re.compile(r'\b' + re.escape(sigla) + r'(?:[ \-]|$)')
+
+
+def contem_bloqueada(texto, padrao):
+    return padrao is not None and padrao.search(texto or "") is not None
+
+
+# === 2. API em lote ===
+
+def titulo_aceito(nome_repo, sigla, padrao_titulo):
+    """
+    Filtros de título: stopwords customizadas e sigla "colada" em outras letras.
+    """
+    nome_repo = (nome_repo or '').lower()
+    if contem_bloqueada(nome_repo, padrao_titulo):
+        return False
+    if sigla and sigla in nome_repo and not padrao_sigla(sigla).search(nome_repo):
+        return False
+    return True
+
+
+def filtrar_titulos(repos, sigla):
+    """
+    Filtra de uma vez a lista de repositórios de uma instituição (formato do JSON,
+    com 'Nome do Repositório') pelos filtros de título.
+    """
+    sigla = (sigla or '').lower()
+    padrao_titulo = padrao_lista('titulo_stopwords')
+    return [repo for repo in repos if titulo_aceito(repo.get('Nome do Repositório'), sigla, padrao_titulo)]
+
+
+def filtrar_ruins(repos, palavras_excluir=None):
+    """
+    Filtra repositórios brutos da API do GitHub ('name'/'description') pelas
+    palavras da lista 'palavras_ruins' e por popularidade mínima.
+    Aceita qualquer iterável e devolve um gerador.
+    """
+    padrao = padrao_lista('palavras_ruins', palavras_excluir)
+    entrada = saida = 0
+    try:
+        for repo in repos:
+            entrada += 1
+            if (not contem_bloqueada(repo.get('name'), padrao) and
+                    not contem_bloqueada(repo.get('description'), padrao) and
+                    (repo.get('stargazers_count', 0) > 0 or repo.get('forks_count', 0) > 0 or repo.get('watchers_count', 0) > 0)):
+                saida += 1
+                yield repo
+    finally:
+        # Contado uma vez por chamada, não por repositório
+        metricas.incrementar('filtro_ruins.entrada', entrada)
+        metricas.incrementar('filtro_ruins.saida', saida)
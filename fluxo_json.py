@@ -0,0 +1,221 @@
+"""
+Leitura e escrita incrementais dos documentos 'institutions_data'.
+
+json.load monta o documento inteiro em memória (e json.dump precisa dele
+inteiro para gravar). Aqui o arquivo é lido em blocos e cada instituição é
+decodificada e entregue assim que termina no texto, e a escrita grava uma
+instituição por vez, então o pico de memória fica na ordem da maior
+instituição, não do dataset:
+
+    for institution in iterar_instituicoes('repositorios_federais_filtrado_idioma.json'):
+        ...
+    for institution, repo in iterar_repositorios(caminho):
+        ...
+    with EscritorInstituicoes('saida.json', extras={'cluster_descriptions': descricoes}) as escritor:
+        for institution in instituicoes:
+            escritor.escrever(institution)
+
+A leitura percorre o nível superior do documento como um parser de eventos
+(chave, ':', valor, ',') e usa o decodificador C do módulo json apenas para
+cada elemento de 'institutions_data', sem dependências extras. Snapshots
+colunares (.parquet/.arrow) são lidos por snapshot_colunar.carregar_dados.
+"""
+import json
+import os
+
+from snapshot_colunar import carregar_dados, eh_colunar
+
+CHAVE_INSTITUICOES = 'institutions_data'
+TAMANHO_BLOCO = 1 << 16
+ESPACOS = ' \t\n\r'
+
+
+class _LeitorIncremental:
+    """
+    Buffer sobre o arquivo que decodifica um valor JSON por vez com raw_decode,
+    lendo mais blocos (em quantidade crescente) quando o valor ainda não está
+    completo no buffer.
+    """
+
+    def __init__(self, arquivo, tamanho_bloco=TAMANHO_BLOCO):
+        self.arquivo = arquivo
+        self.tamanho_bloco = tamanho_bloco
+        self.buffer = ''
+        self.posicao = 0
+        self.fim_arquivo = False
+        self._decoder = json.JSONDecoder()
+
+    def _ler_mais(self, minimo):
+        if self.fim_arquivo:
+            return False
+        bloco = self.arquivo.read(max(minimo, self.tamanho_bloco))
+        if not bloco:
+            self.fim_arquivo = True
+            return False
+        # Descarta o que já foi consumido antes de crescer o buffer
+        self.buffer = self.buffer[self.posicao:] + bloco
+        self.posicao = 0
+        return True
+
+    def proximo_caractere(self):
+        """
+        Pula espaços e retorna o próximo caractere significativo (sem consumi-lo).
+        """
+        while True:
+            while self.posicao < len(self.buffer) and self.buffer[self.posicao] in ESPACOS:
+                self.posicao += 1
+            if self.posicao < len(self.buffer):
+                return self.buffer[self.posicao]
+            if not self._ler_mais(self.tamanho_bloco):
+                raise json.JSONDecodeError("Fim inesperado do documento", self.buffer, self.posicao)
+
+    def esperar(self, caracteres):
+        caractere = self.proximo_caractere()
+        if caractere not in caracteres:
+            raise json.JSONDecodeError(f"Esperado um de {caracteres!r}", self.buffer, self.posicao)
+        self.posicao += 1
+        return caractere
+
+    def valor(self):
+        """
+        Decodifica o próximo valor completo. Um valor que termina no fim do buffer
+        pode estar truncado (ex.: um número), então só é aceito se houver texto depois dele.
+        """
+        self.proximo_caractere()
+        lido = len(self.buffer) - self.posicao
+        while True:
+            try:
+                valor, fim = self._decoder.raw_decode(self.buffer, self.posicao)
+                if fim < len(self.buffer) or self.fim_arquivo:
+                    self.posicao = fim
+                    return valor
+            except json.JSONDecodeError:
+                if self.fim_arquivo:
+                    raise
+            # Incompleto: lê pelo menos o que já havia, para o custo total ser linear
+            if not self._ler_mais(lido):
+                continue
+            lido = len(self.buffer) - self.posicao
+
+
+def _iterar_json(caminho, extras=None, chave=CHAVE_INSTITUICOES):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        leitor = _LeitorIncremental(f)
+        leitor.esperar('{')
+        if leitor.proximo_caractere() == '}':
+            return
+        while True:
+            nome = leitor.valor()
+            leitor.esperar(':')
+            if nome == chave:
+                leitor.esperar('[')
+                if leitor.proximo_caractere() == ']':
+                    leitor.posicao += 1
+                else:
+                    while True:
+                        yield leitor.valor()
+                        if leitor.esperar(',]') == ']':
+                            break
+            else:
+                # Outras chaves (cluster_descriptions, k_selection) só são guardadas se pedidas
+                valor = leitor.valor()
+                if extras is not None:
+                    extras[nome] = valor
+            if leitor.esperar(',}') == '}':
+                return
+
+
+def iterar_instituicoes(caminho, extras=None):
+    """
+    Gera as instituições de 'institutions_data' uma a uma. Como json.load,
+    levanta FileNotFoundError ou json.JSONDecodeError (na iteração).
+    Se 'extras' for um dict, recebe as demais chaves do documento; as que vêm
+    depois da lista só estão lá ao fim da iteração.
+    """
+    if eh_colunar(caminho):
+        full_data = carregar_dados(caminho)
+        if extras is not None:
+            extras.update((nome, valor) for nome, valor in full_data.items() if nome != CHAVE_INSTITUICOES)
+        yield from full_data.get(CHAVE_INSTITUICOES, [])
+        return
+    yield from _iterar_json(caminho, extras)
+
+
+def iterar_repositorios(caminho):
+    """
+    Gera pares (instituição, repositório), com a instituição sem a lista
+    'Repositorios' (o mesmo dict para todos os repositórios dela).
+    """
+    for institution in iterar_instituicoes(caminho):
+        repos = institution.pop('Repositorios', [])
+        for repo in repos:
+            yield institution, repo
+
+
+class EscritorInstituicoes:
+    """
+    Grava um documento {"institutions_data": [...], **extras} uma instituição
+    por vez. Com indent=2 o texto é idêntico ao de json.dump(documento,
+    indent=2, ensure_ascii=False); com indent=None cada instituição fica em uma
+    linha (mais compacto, para arquivos que não são versionados). O arquivo é escrito em '<caminho>.tmp'
+    e só substitui o destino ao final, então a entrada pode ser o próprio destino.
+    As chaves de 'extras' podem ser acrescentadas até o fechamento.
+    """
+
+    def __init__(self, caminho, extras=None, indent=2):
+        self.caminho = caminho
+        self.extras = dict(extras or {})
+        self.indent = indent
+        self.total = 0
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._tmp = f"{caminho}.tmp"
+        self._arquivo = open(self._tmp, 'w', encoding='utf-8')
+        self._arquivo.write('{\n  "institutions_data": [')
+
+    def _serializar(self, valor, nivel):
+        texto = json.dumps(valor, ensure_ascii=False, indent=self.indent)
+        if self.indent is None:
+            return texto
+        return texto.replace('\n', '\n' + ' ' * (self.indent * nivel))
+
+    def escrever(self, institution):
+        self._arquivo.write(',\n    ' if self.total else '\n    ')
+        self._arquivo.write(self._serializar(institution, 2))
+        self.total += 1
+
+    def fechar(self):
+        if self._arquivo.closed:
+            return
+        self._arquivo.write('\n  ]' if self.total else ']')
+        for chave, valor in self.extras.items():
+            self._arquivo.write(f',\n  {json.dumps(chave, ensure_ascii=False)}: {self._serializar(valor, 1)}')
+        self._arquivo.write('\n}' if self.indent is not None else '\n}\n')
+        self._arquivo.close()
+        os.replace(self._tmp, self.caminho)
+
+    def descartar(self):
+        if not self._arquivo.closed:
+            self._arquivo.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo_excecao, *exc):
+        if tipo_excecao is None:
+            self.fechar()
+        else:
+            self.descartar()
+
+
+def gravar_instituicoes(caminho, instituicoes, extras=None, indent=2):
+    """
+    Grava um iterável de instituições em 'caminho'. Retorna quantas foram gravadas.
+    """
+    with EscritorInstituicoes(caminho, extras, indent) as escritor:
+        for institution in instituicoes:
+            escritor.escrever(institution)
+    return escritor.total
@@ -0,0 +1,463 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metricas import metricas
+
+# === 1. Configuração compartilhada da API do GitHub ===
+# GITHUB_API_URL permite apontar os scripts para um servidor local que simula o GitHub
+# (veja github_simulado.py), útil para testar o crawler sem gastar a cota real.
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+# A API de busca devolve no máximo 1000 resultados por query (10 páginas de 100)
+SEARCH_RESULT_CAP = 1000
+# Data inicial usada ao dividir queries grandes por 'created:' (fundação do GitHub)
+SEARCH_START_DATE = date(2008, 1, 1)
+
+# Base SQLite onde o cliente guarda ETag/Last-Modified e o corpo (comprimido) de cada
+# resposta, usada para requisições condicionais entre execuções (ex.: refresh noturno do consulta.sh).
+# Cada entrada só é lida quando a sua URL é pedida. As buscas com 'pushed:>' mudam a cada
+# execução e nunca são revalidadas, então save_cache descarta as entradas sem uso há
+# HTTP_CACHE_MAX_AGE_DAYS dias e mantém no máximo HTTP_CACHE_MAX_ENTRIES (as usadas mais recentemente).
+HTTP_CACHE_PATH = os.getenv("GITHUB_HTTP_CACHE", os.path.join(".cache", "github_http_cache.sqlite"))
+HTTP_CACHE_MAX_AGE_DAYS = 14
+HTTP_CACHE_MAX_ENTRIES = 5000
+HTTP_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    body          BLOB NOT NULL,
+    used_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_used_at ON responses (used_at);
+"""
+
+
+# === 2. Orçamento de rate limit compartilhado entre threads ===
+
+def tokens_do_ambiente():
+    """
+    Tokens configurados no ambiente/.env: GITHUB_TOKENS=a,b,c (pool) ou,
+    na falta dele, o GITHUB_TOKEN único. Retorna uma lista (possivelmente vazia).
+    """
+    tokens = os.getenv("GITHUB_TOKENS") or os.getenv("GITHUB_TOKEN") or ""
+    return [token.strip() for token in tokens.split(",") if token.strip()]
+
+
+def chave_token(token):
+    """
+    Identificador do token que pode ir para logs e checkpoints (nunca o token em si).
+    """
+    return hashlib.sha1(token.encode("utf-8")).hexdigest()[:8] if token else "anonimo"
+
+
+class _SaldoToken:
+    def __init__(self, token):
+        self.token = token
+        self.remaining = None  # Desconhecido até a primeira resposta do servidor
+        self.reset_time = 0
+        self.in_flight = 0
+        self.requests = 0
+
+
+class RateLimitBudget:
+    """
+    Orçamento de requisições compartilhado por todos os workers do crawler.
+
+    Funciona como um token bucket por token de acesso, cujo saldo é definido
+    pelos cabeçalhos X-RateLimit-Remaining / X-RateLimit-Reset devolvidos pelo
+    GitHub. Cada requisição reserva em acquire() uma unidade do token com mais
+    saldo (o token escolhido é devolvido, para ir no cabeçalho Authorization) e
+    o saldo é corrigido em release() com os valores reais do servidor. Os workers
+    só esperam o reset quando todos os tokens do pool estão esgotados, em vez
+    de disparar requisições que cairiam no HTTP 403.
+    """
+
+    def __init__(self, safety_margin=1, tokens=None):
+        self._cond = threading.Condition()
+        self._saldos = [_SaldoToken(token) for token in (tokens or [None])]
+        self.safety_margin = safety_margin
+        self.sleep_seconds = 0.0
+        self._reset_anunciado = None
+
+    @property
+    def remaining(self):
+        conhecidos = [saldo.remaining for saldo in self._saldos if saldo.remaining is not None]
+        return sum(conhecidos) if conhecidos else None
+
+    def _escolher(self):
+        """
+        Saldo a usar na próxima requisição, ou None se for preciso esperar.
+        Tokens ainda sem informação de cota recebem uma requisição "sonda" por vez.
+        """
+        for saldo in self._saldos:
+            if saldo.remaining is None and saldo.in_flight == 0:
+                return saldo
+        disponiveis = [saldo for saldo in self._saldos if saldo.remaining is not None and saldo.remaining > 0]
+        if disponiveis:
+            return max(disponiveis, key=lambda saldo: saldo.remaining)
+        return None
+
+    def acquire(self):
+        """
+        Reserva uma requisição do orçamento, bloqueando até que algum token
+        tenha saldo. Retorna o token escolhido (None sem autenticação).
+        """
+        with self._cond:
+            while True:
+                saldo = self._escolher()
+                if saldo is not None:
+                    if saldo.remaining is not None:
+                        saldo.remaining -= 1
+                    break
+
+                if any(s.remaining is None for s in self._saldos):
+                    # Alguma sonda em andamento: espera a resposta dela
+                    self._cond.wait()
+                    continue
+
+                agora = time.time()
+                renovados = False
+                for s in self._saldos:
+                    if s.reset_time - agora + self.safety_margin <= 0:
+                        # A janela já foi renovada: volta ao modo "sonda" para reler a cota
+                        s.remaining = None
+                        renovados = True
+                if renovados:
+                    continue
+
+                proximo_reset = min(s.reset_time for s in self._saldos)
+                sleep_duration = proximo_reset - agora + self.safety_margin
+                if proximo_reset != self._reset_anunciado:
+                    # Um aviso por espera, não um por worker bloqueado
+                    self._reset_anunciado = proximo_reset
+                    print(f"🚨 Orçamento de rate limit esgotado em {len(self._saldos)} token(s). "
+                          f"Aguardando {sleep_duration:.0f} segundos até o reset.")
+                started = time.monotonic()
+                self._cond.wait(timeout=sleep_duration)
+                esperado = time.monotonic() - started
+                self.sleep_seconds += esperado
+                metricas.incrementar('github.espera_rate_limit_segundos', esperado)
+                metricas.incrementar('github.esperas_rate_limit')
+
+            saldo.in_flight += 1
+            saldo.requests += 1
+            return saldo.token
+
+    def release(self, headers=None, token=None):
+        """
+        Devolve a reserva feita em acquire() para 'token' e atualiza o saldo dele
+        com os cabeçalhos de rate limit da resposta (quando presentes).
+        """
+        with self._cond:
+            saldo = self._saldo(token)
+            saldo.in_flight = max(saldo.in_flight - 1, 0)
+            if headers is not None:
+                self._update_from_headers(saldo, headers)
+            self._cond.notify_all()
+
+    def _saldo(self, token):
+        for saldo in self._saldos:
+            if saldo.token == token:
+                return saldo
+        return self._saldos[0]
+
+    def estado(self):
+        """
+        Saldo e reset conhecidos de cada token (identificado por chave_token), em
+        formato serializável (gravado nos checkpoints do crawl).
+        """
+        with self._cond:
+            return {chave_token(saldo.token): {'remaining': saldo.remaining, 'reset_time': saldo.reset_time}
+                    for saldo in self._saldos}
+
+    def restaurar(self, estado):
+        """
+        Retoma o saldo de uma execução interrompida. Tokens cuja janela ainda não
+        foi renovada já começam esperando o reset em vez de gastar as primeiras
+        requisições em respostas 403.
+        """
+        if not estado:
+            return
+        with self._cond:
+            for saldo in self._saldos:
+                anterior = estado.get(chave_token(saldo.token))
+                if not anterior or anterior.get('remaining') is None:
+                    continue
+                if anterior.get('reset_time', 0) > time.time():
+                    saldo.remaining = anterior['remaining']
+                    saldo.reset_time = anterior['reset_time']
+            self._cond.notify_all()
+
+    def requisicoes_por_token(self):
+        with self._cond:
+            return {chave_token(saldo.token): saldo.requests for saldo in self._saldos}
+
+    def _update_from_headers(self, saldo, headers):
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_time = headers.get('X-RateLimit-Reset')
+        if remaining is None or reset_time is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset_time = int(reset_time)
+        except (TypeError, ValueError):
+            return
+
+        # O valor do servidor não enxerga as requisições ainda em andamento
+        server_remaining = max(remaining - saldo.in_flight, 0)
+        if saldo.remaining is None or reset_time > saldo.reset_time:
+            # Primeira leitura ou nova janela de rate limit
+            saldo.remaining = server_remaining
+        else:
+            saldo.remaining = min(saldo.remaining, server_remaining)
+        saldo.reset_time = max(saldo.reset_time, reset_time)
+
+
+# === 3. Cliente HTTP reutilizável com requisições condicionais ===
+
+class GitHubClient:
+    """
+    Cliente da API do GitHub com sessão keep-alive e cache de requisições condicionais.
+
+    Uma única requests.Session (com pool de conexões) é reaproveitada por todas as
+    chamadas, evitando um novo handshake TCP+TLS por query. Para cada URL são
+    guardados ETag/Last-Modified e o corpo da última resposta 200; as chamadas
+    seguintes enviam If-None-Match/If-Modified-Since e, quando o GitHub responde
+    304, o corpo é servido do cache local sem consumir a cota de busca.
+    """
+
+    def __init__(self, token=None, api_url=GITHUB_API_URL, cache_path=HTTP_CACHE_PATH,
+                 pool_size=10, timeout=30, budget=None):
+        self.api_url = api_url.rstrip("/")
+        self.cache_path = cache_path
+        self.timeout = timeout
+        # 'token' pode ser um token único ou a lista do pool (GITHUB_TOKENS=a,b,c)
+        tokens = [token] if isinstance(token, str) else list(token or [])
+        self.budget = budget or RateLimitBudget(tokens=tokens)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({'Accept': 'application/vnd.github.v3+json'})
+
+        self._cache_lock = threading.Lock()
+        self._cache_db = self._open_cache(create=False)
+        # Respostas novas e URLs revalidadas (304) desta execução: só vão para o disco em save_cache()
+        self._pending = {}
+        self._revalidated = set()
+        self.stats = {'requests': 0, 'not_modified': 0, 'bytes': 0}
+
+    def _open_cache(self, create):
+        if not self.cache_path or not (create or os.path.exists(self.cache_path)):
+            return None
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # As threads do crawler compartilham a conexão, sempre sob _cache_lock
+            db = sqlite3.connect(self.cache_path, check_same_thread=False)
+            db.executescript(HTTP_CACHE_SCHEMA)
+            return db
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Cache HTTP '{self.cache_path}' ignorado: {e}")
+            return None
+
+    def _cache_entry(self, cache_key):
+        # Chamado com _cache_lock
+        if cache_key in self._pending:
+            return self._pending[cache_key]
+        if self._cache_db is None:
+            return None
+        row = self._cache_db.execute("SELECT etag, last_modified, body FROM responses WHERE url = ?",
+                                     (cache_key,)).fetchone()
+        if row is None:
+            return None
+        return {'etag': row[0], 'last_modified': row[1], 'body': row[2]}
+
+    def save_cache(self):
+        """
+        Grava em disco as respostas novas desta execução, para serem revalidadas na
+        próxima, e descarta as entradas antigas (HTTP_CACHE_MAX_AGE_DAYS / HTTP_CACHE_MAX_ENTRIES).
+        """
+        if not self.cache_path:
+            return
+        with self._cache_lock:
+            if self._cache_db is None:
+                self._cache_db = self._open_cache(create=True)
+                if self._cache_db is None:
+                    return
+            now = time.time()
+            with self._cache_db:
+                self._cache_db.executemany(
+                    "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, used_at) VALUES (?, ?, ?, ?, ?)",
+                    [(key, entry['etag'], entry['last_modified'], entry['body'], now)
+                     for key, entry in self._pending.items()])
+                self._cache_db.executemany("UPDATE responses SET used_at = ? WHERE url = ?",
+                                           [(now, key) for key in self._revalidated])
+                self._cache_db.execute("DELETE FROM responses WHERE used_at < ?",
+                                       (now - HTTP_CACHE_MAX_AGE_DAYS * 86400,))
+                self._cache_db.execute(
+                    "DELETE FROM responses WHERE url NOT IN "
+                    "(SELECT url FROM responses ORDER BY used_at DESC LIMIT ?)", (HTTP_CACHE_MAX_ENTRIES,))
+            self._pending.clear()
+            self._revalidated.clear()
+
+    def get(self, url, params=None):
+        """
+        Faz um GET condicional. URLs relativas ("/search/repositories") são
+        resolvidas contra api_url. Respostas 304 são devolvidas como 200 com o
+        corpo do cache e o atributo from_cache=True.
+        """
+        if url.startswith("/"):
+            url = f"{self.api_url}{url}"
+        cache_key = requests.Request('GET', url, params=params).prepare().url
+
+        with self._cache_lock:
+            entry = self._cache_entry(cache_key)
+        conditional_headers = {}
+        if entry:
+            if entry.get('etag'):
+                conditional_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                conditional_headers['If-Modified-Since'] = entry['last_modified']
+
+        # O orçamento escolhe o token do pool com mais saldo para esta requisição
+        token = self.budget.acquire()
+        if token:
+            conditional_headers['Authorization'] = f'token {token}'
+        response = None
+        try:
+            with metricas.cronometrar('github.requisicao'):
+                response = self.session.get(url, params=params, headers=conditional_headers, timeout=self.timeout)
+        finally:
+            self.budget.release(response.headers if response is not None else None, token)
+        self._registrar_metricas(response)
+
+        with self._cache_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += len(response.content)
+            if response.status_code == 304 and entry:
+                self.stats['not_modified'] += 1
+                self._revalidated.add(cache_key)
+                response.status_code = 200
+                response._content = zlib.decompress(entry['body'])
+                response.from_cache = True
+                return response
+
+            response.from_cache = False
+            # Sem cache_path o cache nunca é gravado: guardar os corpos só faria a memória crescer
+            if self.cache_path and response.status_code == 200 and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+                self._pending[cache_key] = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'body': zlib.compress(response.content),
+                }
+        return response
+
+    def post(self, url, json_body):
+        """
+        POST sem cache (usado pelo backend GraphQL), com o mesmo orçamento de rate limit.
+        """
+        if url.startswith("/"):
+            url = f"{self.api_url}{url}"
+        token = self.budget.acquire()
+        headers = {'Authorization': f'bearer {token}'} if token else {}
+        response = None
+        try:
+            with metricas.cronometrar('github.requisicao'):
+                response = self.session.post(url, json=json_body, headers=headers, timeout=self.timeout)
+        finally:
+            self.budget.release(response.headers if response is not None else None, token)
+        self._registrar_metricas(response)
+        with self._cache_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += len(response.content)
+        response.from_cache = False
+        return response
+
+    @staticmethod
+    def _registrar_metricas(response):
+        metricas.incrementar('github.requisicoes')
+        metricas.incrementar('github.bytes_recebidos', len(response.content))
+        if response.status_code == 304:
+            metricas.incrementar('github.respostas_304')
+        elif response.status_code >= 400:
+            metricas.incrementar(f"github.http_{response.status_code}")
+
+
+# === 4. Paginação da API de busca ===
+
+def iter_search_items(fetch_page, query, per_page=100, max_workers=4):
+    """
+    Gera todos os itens de uma busca, página a página, sem manter o resultado
+    completo em memória.
+
+    fetch_page(query, page, per_page) deve devolver o JSON da página (dict) ou
+    None em caso de erro. A primeira página informa o total_count; as demais são
+    buscadas em paralelo (em vez de seguir o cabeçalho Link: rel="next" uma a uma),
+    limitadas ao teto de 1000 resultados da API. Quando a query passa desse teto,
+    ela é dividida automaticamente em intervalos de 'created:'.
+    """
+    first_page = fetch_page(query, 1, per_page)
+    if not first_page:
+        return
+
+    if first_page.get('total_count', 0) > SEARCH_RESULT_CAP and 'created:' not in query:
+        print(f"📅 '{query}' tem {first_page['total_count']} resultados (teto: {SEARCH_RESULT_CAP}). Dividindo por data de criação.")
+        yield from _iter_split_by_created(fetch_page, query, per_page, max_workers,
+                                          SEARCH_START_DATE, date.today())
+        return
+
+    yield from _iter_pages(fetch_page, query, first_page, per_page, max_workers)
+
+
+def _iter_pages(fetch_page, query, first_page, per_page, max_workers):
+    yield from first_page.get('items', [])
+
+    total = min(first_page.get('total_count', 0), SEARCH_RESULT_CAP)
+    last_page = math.ceil(total / per_page)
+    if last_page <= 1:
+        return
+
+    # Janela deslizante: no máximo max_workers páginas em voo/em memória ao mesmo tempo,
+    # entregues ao consumidor na ordem original
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for page in range(2, last_page + 1):
+            pending.append(executor.submit(fetch_page, query, page, per_page))
+            if len(pending) >= max_workers:
+                payload = pending.popleft().result()
+                if payload:
+                    yield from payload.get('items', [])
+        while pending:
+            payload = pending.popleft().result()
+            if payload:
+                yield from payload.get('items', [])
+
+
+def _iter_split_by_created(fetch_page, query, per_page, max_workers, start, end):
+    sub_query = f"{query} created:{start.isoformat()}..{end.isoformat()}"
+    first_page = fetch_page(sub_query, 1, per_page)
+    if not first_page:
+        return
+
+    if first_page.get('total_count', 0) > SEARCH_RESULT_CAP and start < end:
+        middle = start + (end - start) // 2
+        yield from _iter_split_by_created(fetch_page, query, per_page, max_workers, start, middle)
+        yield from _iter_split_by_created(fetch_page, query, per_page, max_workers, middle + timedelta(days=1), end)
+        return
+
+    yield from _iter_pages(fetch_page, sub_query, first_page, per_page, max_workers)
@@ -0,0 +1,219 @@
+"""
+Backend GraphQL (API v4 do GitHub) para a busca de repositórios das instituições.
+
+A busca REST (consulta_if.buscar_repositorios_instituicao) faz até três buscas
+separadas por instituição, e cada página traz dezenas de campos por repositório
+que get_repo_details descarta. Aqui:
+
+    - a consulta pede apenas os campos usados por get_repo_details e por
+      filtros.filtrar_ruins (forkCount entra só no filtro de popularidade);
+    - as buscas de várias instituições vão juntas em uma única consulta, cada
+      uma sob um alias (s0, s1, ...), em três fases: organização, sigla/nome e
+      nome ajustado, e só as instituições sem resultado passam para a fase seguinte;
+    - a paginação segue o endCursor de cada busca, também em lote.
+
+A cota passa a ser medida em pontos GraphQL (rateLimit.cost), não em buscas.
+Os nós são convertidos para o formato dos itens da API REST, então o restante
+do pipeline não muda. Buscas acima do teto de 1000 resultados caem para a busca
+REST, que sabe dividi-las por data de criação; buscas que falham (HTTP ou
+alias nulo com erros na resposta) também são refeitas pela busca REST.
+
+GITHUB_GRAPHQL_GRAVACOES=arquivo.jsonl grava cada par consulta/resposta, para
+que github_simulado.py --gravacoes arquivo.jsonl as reproduza depois sem rede.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from github_api import SEARCH_RESULT_CAP
+from metricas import metricas
+
+GRAPHQL_PATH = "/graphql"
+GRAVACOES_PATH = os.getenv("GITHUB_GRAPHQL_GRAVACOES")
+TAMANHO_LOTE_GRAPHQL = 5   # Instituições por consulta
+ITENS_POR_PAGINA = 100     # Máximo do GitHub para 'first' em search
+# A busca REST usa sort=stars&order=desc; no GraphQL a ordenação vai na própria query
+ORDENACAO = " sort:stars-desc"
+
+CAMPOS_REPOSITORIO = """
+            name
+            description
+            primaryLanguage { name }
+            stargazerCount
+            forkCount
+            licenseInfo { spdxId }
+            updatedAt
+            url
+"""
+
+_lock_gravacoes = threading.Lock()
+
+
+def chave_requisicao(corpo):
+    """
+    Identifica uma requisição GraphQL pelo conteúdo (usada nas gravações).
+    """
+    return hashlib.sha1(json.dumps(corpo, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def montar_consulta(quantidade):
+    """
+    Consulta com 'quantidade' buscas com alias, parametrizadas pelas variáveis
+    $q0.. (texto da busca) e $c0.. (cursor, nulo na primeira página).
+    """
+    parametros = ", ".join(f"$q{i}: String!, $c{i}: String" for i in range(quantidade))
+    buscas = "\n".join(
+        f"""  s{i}: search(query: $q{i}, type: REPOSITORY, first: {ITENS_POR_PAGINA}, after: $c{i}) {{
+    repositoryCount
+    pageInfo {{ hasNextPage endCursor }}
+    nodes {{ ... on Repository {{{CAMPOS_REPOSITORIO}        }} }}
+  }}"""
+        for i in range(quantidade)
+    )
+    return f"query({parametros}) {{\n{buscas}\n  rateLimit {{ cost remaining resetAt }}\n}}"
+
+
+def no_para_item(no):
+    """
+    Converte um nó Repository do GraphQL para o formato de item da busca REST.
+    """
+    licenca = no.get('licenseInfo')
+    return {
+        'name': no.get('name'),
+        'description': no.get('description'),
+        'language': (no.get('primaryLanguage') or {}).get('name'),
+        'stargazers_count': no.get('stargazerCount', 0),
+        'forks_count': no.get('forkCount', 0),
+        # Na API REST, watchers_count é o número de estrelas
+        'watchers_count': no.get('stargazerCount', 0),
+        'license': {'spdx_id': licenca.get('spdxId')} if licenca else None,
+        'updated_at': no.get('updatedAt'),
+        'html_url': no.get('url'),
+    }
+
+
+class GitHubGraphQL:
+    """
+    Executa buscas em lote pela API GraphQL usando um GitHubClient (sessão,
+    pool de tokens e orçamento de rate limit próprios da cota GraphQL).
+    Pontos gastos e consultas feitas ficam em self.stats.
+    """
+
+    def __init__(self, client, tamanho_lote=TAMANHO_LOTE_GRAPHQL, gravacoes=GRAVACOES_PATH):
+        self.client = client
+        self.tamanho_lote = tamanho_lote
+        self.gravacoes = gravacoes
+        self._lock = threading.Lock()
+        self.stats = {'consultas': 0, 'pontos': 0, 'buscas': 0}
+
+    def _executar(self, queries, cursores):
+        """
+        Uma requisição com várias buscas. Retorna a lista de resultados 'search'
+        (None para buscas que falharam: erro HTTP, ou alias nulo quando a resposta
+        traz 'errors', ex.: rate limit ou timeout; esses erros são registrados).
+        """
+        corpo = {
+            'query': montar_consulta(len(queries)),
+            'variables': {**{f"q{i}": q + ORDENACAO for i, q in enumerate(queries)},
+                          **{f"c{i}": c for i, c in enumerate(cursores)}},
+        }
+        for _ in range(3):
+            response = self.client.post(GRAPHQL_PATH, corpo)
+            if response.status_code == 200:
+                break
+            if response.status_code == 403 or response.status_code >= 500:
+                # 403: o orçamento já foi zerado pelos cabeçalhos; a próxima tentativa espera o reset
+                print(f"⚠️ GraphQL respondeu HTTP {response.status_code}. Tentando novamente...")
+                metricas.incrementar('github.retentativas')
+                continue
+            print(f"Erro HTTP inesperado ({response.status_code}) na consulta GraphQL: {response.text[:200]}")
+            return [None] * len(queries)
+        else:
+            return [None] * len(queries)
+
+        resposta = response.json()
+        if self.gravacoes:
+            with _lock_gravacoes, open(self.gravacoes, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'chave': chave_requisicao(corpo), 'resposta': resposta}, ensure_ascii=False) + '\n')
+
+        erros = resposta.get('errors') or []
+        if erros:
+            mensagens = "; ".join(str(erro.get('message', erro))[:120] for erro in erros[:3])
+            print(f"⚠️ GraphQL retornou {len(erros)} erros: {mensagens}")
+            metricas.incrementar('graphql.erros', len(erros))
+
+        dados = resposta.get('data') or {}
+        pontos = (dados.get('rateLimit') or {}).get('cost', 0)
+        with self._lock:
+            self.stats['consultas'] += 1
+            self.stats['buscas'] += len(queries)
+            self.stats['pontos'] += pontos
+        metricas.incrementar('graphql.consultas')
+        metricas.incrementar('graphql.buscas', len(queries))
+        metricas.incrementar('graphql.pontos', pontos)
+        return [dados.get(f"s{i}") for i in range(len(queries))]
+
+    def buscar_varias(self, queries):
+        """
+        Executa 'queries' (lista de textos de busca) em lote, seguindo os cursores
+        até o fim de cada uma. Retorna ({query: lista de itens no formato REST,
+        ou None para as buscas que passam do teto de resultados}, conjunto das
+        queries que falharam em alguma página).
+        """
+        itens = {query: [] for query in queries}
+        falhas = set()
+        pendentes = [(query, None) for query in dict.fromkeys(queries)]
+        while pendentes:
+            proximos = []
+            for inicio in range(0, len(pendentes), self.tamanho_lote):
+                lote = pendentes[inicio:inicio + self.tamanho_lote]
+                resultados = self._executar([q for q, _ in lote], [c for _, c in lote])
+                for (query, cursor), resultado in zip(lote, resultados):
+                    if resultado is None:
+                        # Uma página perdida deixaria a lista incompleta: a busca inteira é descartada
+                        falhas.add(query)
+                        continue
+                    if cursor is None and resultado.get('repositoryCount', 0) > SEARCH_RESULT_CAP:
+                        itens[query] = None
+                        continue
+                    itens[query].extend(no_para_item(no) for no in resultado.get('nodes') or [] if no)
+                    pagina = resultado.get('pageInfo') or {}
+                    if pagina.get('hasNextPage') and pagina.get('endCursor'):
+                        proximos.append((query, pagina['endCursor']))
+            pendentes = proximos
+        return itens, falhas
+
+    def buscar_por_estrategias(self, estrategias):
+        """
+        'estrategias' mapeia cada chave (instituição) para a sua lista ordenada de
+        queries de fallback. Em cada fase, as instituições ainda sem resultado
+        executam juntas a sua próxima query. Retorna {chave: (índice da
+        estratégia, itens)}, com (None, []) quando nenhuma query trouxe resultados.
+        As buscas acima do teto ficam com itens=None (para o chamador usar a busca REST),
+        e as instituições cuja busca falhou, com (None, None): o chamador as refaz
+        inteiras pela busca REST, em vez de tratá-las como sem repositórios.
+        """
+        resultado = {}
+        restantes = list(estrategias)
+        fase = 0
+        while restantes:
+            da_fase = [chave for chave in restantes if fase < len(estrategias[chave])]
+            for chave in restantes:
+                if fase >= len(estrategias[chave]):
+                    resultado[chave] = (None, [])
+            if not da_fase:
+                break
+            itens, falhas = self.buscar_varias([estrategias[chave][fase] for chave in da_fase])
+            restantes = []
+            for chave in da_fase:
+                if estrategias[chave][fase] in falhas:
+                    resultado[chave] = (None, None)
+                    continue
+                encontrados = itens[estrategias[chave][fase]]
+                if encontrados is None or encontrados:
+                    resultado[chave] = (fase, encontrados)
+                else:
+                    restantes.append(chave)
+            fase += 1
+        return resultado
@@ -0,0 +1,339 @@
+"""
+Servidor local que simula a API de busca do GitHub.
+
+Permite exercitar o crawler (consulta_if.py / app.py) sem gastar a cota real:
+
+    python github_simulado.py --porta 8765 --limite 30 --janela 60
+    GITHUB_API_URL=http://127.0.0.1:8765 GITHUB_TOKEN=falso python consulta_if.py --workers 8
+    GITHUB_API_URL=http://127.0.0.1:8765 GITHUB_TOKENS=a,b,c python consulta_if.py --workers 8
+
+As respostas são determinísticas (derivadas da query) e incluem os cabeçalhos
+X-RateLimit-* reais; quando o limite da janela é excedido o servidor responde
+HTTP 403 "rate limit exceeded", como o GitHub.
+
+POST /graphql responde às consultas em lote de github_graphql.py com os mesmos
+repositórios da busca REST. Com --gravacoes arquivo.jsonl (gerado com
+GITHUB_GRAPHQL_GRAVACOES), as respostas gravadas da API real são reproduzidas.
+
+    GITHUB_API_URL=http://127.0.0.1:8765 GITHUB_TOKEN=falso python consulta_if.py --backend graphql
+
+GET /repos/{dono}/{repo}/languages e /repos/{dono}/{repo}/stats/commit_activity
+atendem o enriquecimento (enriquecimento.py). Como no GitHub, o primeiro pedido
+de estatísticas de cada repositório responde 202 enquanto elas são "calculadas".
+"""
+import argparse
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class EstadoRateLimit:
+    """
+    Contador de requisições por janela fixa, compartilhado entre as threads do servidor.
+    Como no GitHub, cada token (cabeçalho Authorization) tem a sua própria cota.
+    """
+
+    def __init__(self, limite, janela):
+        self.limite = limite
+        self.janela = janela
+        self._lock = threading.Lock()
+        self._janelas = {}  # credencial -> [início da janela, requisições usadas]
+        self.total_requisicoes = 0
+        self.total_bloqueadas = 0
+        self.total_nao_modificadas = 0
+        self.estatisticas_calculadas = set()  # Repositórios cujo commit_activity já foi "calculado"
+
+    def consumir(self, credencial=None):
+        """
+        Consome uma requisição da janela atual da credencial.
+        Retorna (permitida, restantes, reset_epoch).
+        """
+        with self._lock:
+            agora = time.time()
+            janela = self._janelas.setdefault(credencial, [agora, 0])
+            if agora - janela[0] >= self.janela:
+                janela[:] = [agora, 0]
+            reset = int(janela[0] + self.janela)
+            self.total_requisicoes += 1
+            if janela[1] >= self.limite:
+                self.total_bloqueadas += 1
+                return False, 0, reset
+            janela[1] += 1
+            return True, self.limite - janela[1], reset
+
+
+def gerar_repositorios_falsos(query, quantidade):
+    """
+    Gera objetos de repositório no formato da API de busca, de forma determinística.
+    """
+    dono = query.split("org:", 1)[1].split()[0] if "org:" in query else "usuario"
+    itens = []
+    for i in range(quantidade):
+        nome = f"{dono}-projeto-{i}"
+        itens.append({
+            "name": nome,
+            "full_name": f"{dono}/{nome}",
+            "description": f"Sistema acadêmico {i} desenvolvido por {dono}",
+            "language": ["Python", "JavaScript", "Java", "C", None][i % 5],
+            "stargazers_count": (i * 7) % 50,
+            "forks_count": i % 3,
+            "watchers_count": (i * 7) % 50,
+            "license": {"spdx_id": "MIT"} if i % 2 == 0 else None,
+            "created_at": "2020-01-01T00:00:00Z",
+            "updated_at": "2025-01-01T00:00:00Z",
+            "pushed_at": "2025-01-01T00:00:00Z",
+            "html_url": f"https://github.com/{dono}/{nome}",
+        })
+    return itens
+
+
+REPOS_REGEX = re.compile(r"^/repos/([^/]+)/([^/]+)/(languages|stats/commit_activity)$")
+
+
+def gerar_linguagens_falsas(nome_completo):
+    """
+    Bytes por linguagem de um repositório, derivados do nome (como /languages).
+    """
+    semente = int(hashlib.sha1(nome_completo.encode("utf-8")).hexdigest(), 16)
+    linguagens = ["Python", "JavaScript", "HTML", "CSS", "Java", "Shell", "Jupyter Notebook"]
+    quantidade = semente % 4
+    return {linguagens[(semente >> (4 * i)) % len(linguagens)]: (semente >> (8 * i)) % 50000 + 100
+            for i in range(quantidade)}
+
+
+def gerar_atividade_falsa(nome_completo):
+    """
+    52 semanas de commits (formato de /stats/commit_activity), derivadas do nome.
+    """
+    semente = int(hashlib.sha1(nome_completo.encode("utf-8")).hexdigest(), 16)
+    inicio = 1704067200  # 2024-01-01
+    semanas = []
+    for i in range(52):
+        dias = [(semente >> ((i * 7 + d) % 150)) % 3 if (semente >> i) % 4 == 0 else 0 for d in range(7)]
+        semanas.append({"days": dias, "total": sum(dias), "week": inicio + i * 7 * 86400})
+    return semanas
+
+
+def total_resultados(query, max_resultados):
+    """
+    Quantidade total derivada da query: algumas buscas não retornam nada.
+    """
+    return int(hashlib.sha1(query.encode("utf-8")).hexdigest(), 16) % (max_resultados + 1)
+
+
+def item_para_no(item):
+    """
+    Converte um item da busca REST para um nó Repository do GraphQL.
+    """
+    return {
+        "name": item["name"],
+        "description": item["description"],
+        "primaryLanguage": {"name": item["language"]} if item["language"] else None,
+        "stargazerCount": item["stargazers_count"],
+        "forkCount": item["forks_count"],
+        "licenseInfo": {"spdxId": item["license"]["spdx_id"]} if item["license"] else None,
+        "updatedAt": item["updated_at"],
+        "url": item["html_url"],
+    }
+
+
+def responder_graphql(corpo, max_resultados):
+    """
+    Resposta sintética para as consultas de github_graphql.py: cada variável $qN
+    vira o alias sN, paginado pelo cursor $cN. Custo de 1 ponto por consulta.
+    """
+    variaveis = corpo.get("variables") or {}
+    por_pagina = int((re.search(r"first: (\d+)", corpo.get("query", "")) or [0, 100])[1])
+    dados = {}
+    for nome, query in variaveis.items():
+        indice = re.fullmatch(r"q(\d+)", nome)
+        if not indice:
+            continue
+        query = query.replace(" sort:stars-desc", "")
+        cursor = variaveis.get(f"c{indice[1]}")
+        inicio = int(base64.b64decode(cursor).decode().split(":")[1]) if cursor else 0
+        total = total_resultados(query, max_resultados)
+        itens = gerar_repositorios_falsos(query, total)[inicio:inicio + por_pagina]
+        fim = inicio + len(itens)
+        dados[f"s{indice[1]}"] = {
+            "repositoryCount": total,
+            "pageInfo": {"hasNextPage": fim < total,
+                         "endCursor": base64.b64encode(f"cursor:{fim}".encode()).decode() if itens else None},
+            "nodes": [item_para_no(item) for item in itens],
+        }
+    dados["rateLimit"] = {"cost": 1, "remaining": None, "resetAt": None}
+    return {"data": dados}
+
+
+def carregar_gravacoes(caminho):
+    """
+    Lê as respostas gravadas por github_graphql.py ({"chave", "resposta"} por linha).
+    """
+    gravacoes = {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            if linha.strip():
+                registro = json.loads(linha)
+                gravacoes[registro["chave"]] = registro["resposta"]
+    return gravacoes
+
+
+def criar_handler(estado, latencia, max_resultados, gravacoes=None):
+    class GitHubSimuladoHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass  # Silencia o log padrão por requisição
+
+        def _responder(self, status, corpo, cabecalhos=None, motivo=None):
+            dados = json.dumps(corpo).encode("utf-8")
+            self.send_response(status, motivo)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            for chave, valor in (cabecalhos or {}).items():
+                self.send_header(chave, valor)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if latencia:
+                time.sleep(latencia)
+
+            url = urlparse(self.path)
+            repo = REPOS_REGEX.match(url.path)
+            if repo:
+                self._responder_repositorio(f"{repo.group(1)}/{repo.group(2)}", repo.group(3))
+                return
+            if url.path != "/search/repositories":
+                self._responder(404, {"message": "Not Found"})
+                return
+
+            params = parse_qs(url.query)
+            query = params.get("q", [""])[0]
+            per_page = int(params.get("per_page", ["30"])[0])
+            page = int(params.get("page", ["1"])[0])
+
+            total = total_resultados(query, max_resultados)
+            inicio = (page - 1) * per_page
+            itens = gerar_repositorios_falsos(query, total)[inicio:inicio + per_page]
+            corpo = {"total_count": total, "incomplete_results": False, "items": itens}
+            etag = '"' + hashlib.sha1(json.dumps(corpo).encode("utf-8")).hexdigest() + '"'
+
+            # Requisições condicionais com ETag válido não consomem a cota, como no GitHub
+            if self.headers.get("If-None-Match") == etag:
+                estado.total_nao_modificadas += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            permitida, restantes, reset = estado.consumir(self.headers.get("Authorization"))
+            cabecalhos = {
+                "X-RateLimit-Limit": str(estado.limite),
+                "X-RateLimit-Remaining": str(restantes),
+                "X-RateLimit-Reset": str(reset),
+            }
+            if not permitida:
+                self._responder(403, {"message": "API rate limit exceeded"}, cabecalhos, motivo="rate limit exceeded")
+                return
+
+            cabecalhos["ETag"] = etag
+            self._responder(200, corpo, cabecalhos)
+
+        def _responder_repositorio(self, nome_completo, recurso):
+            permitida, restantes, reset = estado.consumir(self.headers.get("Authorization"))
+            cabecalhos = {
+                "X-RateLimit-Limit": str(estado.limite),
+                "X-RateLimit-Remaining": str(restantes),
+                "X-RateLimit-Reset": str(reset),
+            }
+            if not permitida:
+                self._responder(403, {"message": "API rate limit exceeded"}, cabecalhos, motivo="rate limit exceeded")
+                return
+            if recurso == "languages":
+                self._responder(200, gerar_linguagens_falsas(nome_completo), cabecalhos)
+                return
+            with estado._lock:
+                calculada = nome_completo in estado.estatisticas_calculadas
+                estado.estatisticas_calculadas.add(nome_completo)
+            if not calculada:
+                self._responder(202, {}, cabecalhos)
+                return
+            self._responder(200, gerar_atividade_falsa(nome_completo), cabecalhos)
+
+        def do_POST(self):
+            if latencia:
+                time.sleep(latencia)
+            if urlparse(self.path).path != "/graphql":
+                self._responder(404, {"message": "Not Found"})
+                return
+            tamanho = int(self.headers.get("Content-Length", 0))
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+
+            permitida, restantes, reset = estado.consumir(self.headers.get("Authorization"))
+            cabecalhos = {
+                "X-RateLimit-Limit": str(estado.limite),
+                "X-RateLimit-Remaining": str(restantes),
+                "X-RateLimit-Reset": str(reset),
+                "X-RateLimit-Resource": "graphql",
+            }
+            if not permitida:
+                self._responder(403, {"message": "API rate limit exceeded"}, cabecalhos, motivo="rate limit exceeded")
+                return
+
+            if gravacoes is not None:
+                # Mesma chave de github_graphql.chave_requisicao
+                chave = hashlib.sha1(json.dumps(corpo, sort_keys=True).encode("utf-8")).hexdigest()
+                if chave not in gravacoes:
+                    self._responder(404, {"message": "Consulta sem resposta gravada"}, cabecalhos)
+                    return
+                self._responder(200, gravacoes[chave], cabecalhos)
+                return
+            self._responder(200, responder_graphql(corpo, max_resultados), cabecalhos)
+
+    return GitHubSimuladoHandler
+
+
+def iniciar_servidor(porta=8765, limite=30, janela=60, latencia=0.0, max_resultados=150, gravacoes=None):
+    """
+    Cria o servidor simulado (sem iniciá-lo). Use serve_forever() ou uma thread.
+    'gravacoes' é o caminho de um JSONL de respostas GraphQL gravadas.
+    """
+    estado = EstadoRateLimit(limite, janela)
+    respostas = carregar_gravacoes(gravacoes) if gravacoes else None
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), criar_handler(estado, latencia, max_resultados, respostas))
+    servidor.estado = estado
+    return servidor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local que simula a API de busca do GitHub.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--limite", type=int, default=30, help="Requisições permitidas por janela.")
+    parser.add_argument("--janela", type=int, default=60, help="Duração da janela de rate limit, em segundos.")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latência artificial por requisição, em segundos.")
+    parser.add_argument("--max-resultados", type=int, default=150, help="Máximo de repositórios por query.")
+    parser.add_argument("--gravacoes", help="JSONL com respostas GraphQL gravadas (GITHUB_GRAPHQL_GRAVACOES).")
+    args = parser.parse_args(argv)
+
+    servidor = iniciar_servidor(args.porta, args.limite, args.janela, args.latencia, args.max_resultados,
+                                args.gravacoes)
+    print(f"🧪 GitHub simulado em http://127.0.0.1:{args.porta} (limite {args.limite}/{args.janela}s)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        estado = servidor.estado
+        print(f"Requisições: {estado.total_requisicoes}, bloqueadas (403): {estado.total_bloqueadas}, "
+              f"não modificadas (304): {estado.total_nao_modificadas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Índice invertido da busca geral do index.html, gerado junto com os arquivos do
+front-end (exportar_frontend.py).
+
+Cada repositório é identificado pela sua linha na tabela completa
+(repositorios.<hash>.json). Os tokens de nome, descrição, linguagem, licença,
+sigla e nome da instituição são normalizados com texto.tokens_busca (minúsculas,
+sem acentos e sem palavras funcionais; os da instituição são todos mantidos,
+para que "ufam python" traga só a UFAM). O índice guarda:
+
+    termos    lista ordenada de termos: a busca por prefixo é uma busca binária
+              seguida de uma varredura dos termos que começam com o prefixo
+    postings  para cada termo, as linhas em ordem crescente, codificadas como
+              diferenças (delta) para encolher o JSON
+    stop      stopwords normalizadas, descartadas também da consulta
+"""
+import bisect
+
+from texto import STOPWORDS_BUSCA, tokens_busca
+
+VERSAO_INDICE = 1
+CAMPOS_BUSCA = ('Nome do Repositório', 'Descricao', 'Linguagem Principal', 'Licenca')
+
+
+def construir_indice(instituicoes):
+    """
+    Monta o índice na mesma ordem de linhas de exportar_frontend.compactar_repositorios.
+    """
+    postings = {}
+    linha = 0
+    for institution in instituicoes:
+        tokens_instituicao = set(tokens_busca(institution.get('Sigla'), stopwords=())) | \
+                             set(tokens_busca(institution.get('Nome Completo'), stopwords=()))
+        for repo in institution.get('Repositorios', []):
+            tokens = set(tokens_instituicao)
+            for campo in CAMPOS_BUSCA:
+                valor = repo.get(campo)
+                if valor and valor != 'N/A':
+                    tokens.update(tokens_busca(valor))
+            for token in tokens:
+                postings.setdefault(token, []).append(linha)
+            linha += 1
+
+    termos = sorted(postings)
+    return {
+        'v': VERSAO_INDICE,
+        'n': linha,
+        'termos': termos,
+        'postings': [codificar_delta(postings[termo]) for termo in termos],
+        'stop': sorted(STOPWORDS_BUSCA),
+    }
+
+
+def codificar_delta(linhas):
+    anterior = 0
+    deltas = []
+    for linha in linhas:
+        deltas.append(linha - anterior)
+        anterior = linha
+    return deltas
+
+
+def buscar(indice, consulta):
+    """
+    Implementação de referência da consulta feita em scripts.js: cada token da
+    consulta casa por prefixo e os tokens são combinados com E. Retorna as
+    linhas encontradas, ou None quando a consulta não tem tokens úteis.
+    """
+    tokens = tokens_busca(consulta)
+    if not tokens:
+        return None
+    resultado = None
+    for token in tokens:
+        encontrados = set()
+        posicao = bisect.bisect_left(indice['termos'], token)
+        while posicao < len(indice['termos']) and indice['termos'][posicao].startswith(token):
+            linha = 0
+            for delta in indice['postings'][posicao]:
+                linha += delta
+                encontrados.add(linha)
+            posicao += 1
+        resultado = encontrados if resultado is None else resultado & encontrados
+    return sorted(resultado)
@@ -0,0 +1,199 @@
+"""
+Métricas estruturadas de uma execução (contadores, tempos e bytes gravados) e
+perfil opcional por etapa com cProfile.
+
+Os módulos registram no objeto global 'metricas':
+
+    metricas.incrementar('github.requisicoes')
+    with metricas.cronometrar('clusterizacao.vetorizacao'):
+        ...
+    fluxo = metricas.medir_fluxo('desduplicacao', fluxo)
+
+e cada script, ao final, acrescenta uma linha com o relatório em
+METRICAS_PATH (JSONL, uma execução por linha):
+
+    python pipeline.py --workers 4 --metricas .cache/metricas_execucoes.jsonl --perfil perfis/
+
+Com --perfil DIR, cada etapa marcada com metricas.etapa(nome) grava DIR/<nome>.prof
+(abra com 'python -m pstats' ou snakeviz). O cProfile só enxerga a thread que
+executa a etapa: o trabalho feito nos workers do crawler não aparece no perfil.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+METRICAS_PATH = os.getenv("METRICAS_PATH", os.path.join('.cache', 'metricas_execucoes.jsonl'))
+
+
+def agora():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class Metricas:
+    """
+    Registro de métricas seguro para threads. 'contadores' acumulam valores
+    (requisições, retentativas, segundos de espera, bytes), 'tempos' acumulam
+    segundos e número de chamadas de cada trecho cronometrado e 'valores' guardam
+    o último valor de medidas pontuais (ex.: número de clusters).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.perfil_dir = None
+        self._perfil_ativo = False
+        self.zerar()
+
+    def zerar(self):
+        with self._lock:
+            self.inicio = agora()
+            self._inicio_relogio = time.perf_counter()
+            self.contadores = {}
+            self.tempos = {}
+            self.valores = {}
+            self._fluxos = []
+
+    def configurar(self, perfil_dir=None):
+        """
+        Ativa o cProfile por etapa, gravando os perfis em 'perfil_dir'.
+        """
+        self.perfil_dir = perfil_dir
+        if perfil_dir:
+            os.makedirs(perfil_dir, exist_ok=True)
+
+    # --- Registro ---
+
+    def incrementar(self, nome, valor=1):
+        with self._lock:
+            self.contadores[nome] = self.contadores.get(nome, 0) + valor
+
+    def definir(self, nome, valor):
+        with self._lock:
+            self.valores[nome] = valor
+
+    def registrar_tempo(self, nome, segundos):
+        with self._lock:
+            tempo = self.tempos.setdefault(nome, {'segundos': 0.0, 'chamadas': 0})
+            tempo['segundos'] += segundos
+            tempo['chamadas'] += 1
+
+    def registrar_arquivo(self, caminho):
+        """
+        Soma o tamanho de um arquivo gravado em 'escrita.bytes' (e por arquivo).
+        """
+        try:
+            tamanho = os.path.getsize(caminho)
+        except OSError:
+            return
+        self.incrementar('escrita.bytes', tamanho)
+        self.incrementar('escrita.arquivos')
+        self.definir(f"escrita.{os.path.basename(caminho)}", tamanho)
+
+    @contextmanager
+    def cronometrar(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, time.perf_counter() - inicio)
+
+    @contextmanager
+    def etapa(self, nome):
+        """
+        Cronometra uma etapa em 'etapa.<nome>' e, com perfil ativo, grava o
+        cProfile dela. Etapas aninhadas entram no perfil da etapa externa.
+        """
+        perfil = None
+        if self.perfil_dir and not self._perfil_ativo:
+            perfil = cProfile.Profile()
+            self._perfil_ativo = True
+            perfil.enable()
+        try:
+            with self.cronometrar(f"etapa.{nome}"):
+                yield
+        finally:
+            if perfil is not None:
+                perfil.disable()
+                self._perfil_ativo = False
+                caminho = os.path.join(self.perfil_dir, f"{nome}.prof")
+                perfil.dump_stats(caminho)
+                print(f"🔬 Perfil da etapa '{nome}' salvo em '{caminho}'")
+
+    def medir_fluxo(self, nome, instituicoes):
+        """
+        Repassa um fluxo de instituições contando instituições e repositórios que
+        saem da etapa 'nome' e o tempo gasto até cada instituição ficar pronta.
+        As etapas de um pipeline de geradores rodam intercaladas, então o tempo
+        medido inclui as etapas anteriores; no relatório, cada etapa do fluxo
+        aparece com o tempo próprio (descontado o da etapa anterior) e com os
+        repositórios que entraram e saíram dela.
+        """
+        # Registrada já aqui (e não na primeira iteração) para manter a ordem das etapas
+        with self._lock:
+            medida = {'nome': nome, 'segundos': 0.0, 'instituicoes': 0, 'repos': 0}
+            self._fluxos.append(medida)
+        return self._repassar(medida, instituicoes)
+
+    @staticmethod
+    def _repassar(medida, instituicoes):
+        iterador = iter(instituicoes)
+        while True:
+            inicio = time.perf_counter()
+            try:
+                institution = next(iterador)
+            except StopIteration:
+                medida['segundos'] += time.perf_counter() - inicio
+                return
+            medida['segundos'] += time.perf_counter() - inicio
+            medida['instituicoes'] += 1
+            medida['repos'] += len(institution.get('Repositorios', []))
+            yield institution
+
+    # --- Relatório ---
+
+    def relatorio(self, script=None):
+        with self._lock:
+            etapas_fluxo = []
+            anterior = None
+            for medida in self._fluxos:
+                etapas_fluxo.append({
+                    'etapa': medida['nome'],
+                    'repos_entrada': anterior['repos'] if anterior else None,
+                    'repos_saida': medida['repos'],
+                    'instituicoes_saida': medida['instituicoes'],
+                    'segundos': round(medida['segundos'] - (anterior['segundos'] if anterior else 0.0), 4),
+                })
+                anterior = medida
+            return {
+                'script': script,
+                'inicio': self.inicio,
+                'fim': agora(),
+                'segundos': round(time.perf_counter() - self._inicio_relogio, 4),
+                'contadores': {nome: round(valor, 4) if isinstance(valor, float) else valor
+                               for nome, valor in sorted(self.contadores.items())},
+                'tempos': {nome: {'segundos': round(tempo['segundos'], 4), 'chamadas': tempo['chamadas']}
+                           for nome, tempo in sorted(self.tempos.items())},
+                'valores': dict(sorted(self.valores.items())),
+                'fluxo': etapas_fluxo,
+            }
+
+    def salvar(self, caminho=METRICAS_PATH, script=None):
+        """
+        Acrescenta o relatório desta execução em 'caminho' (JSONL). Retorna o relatório.
+        """
+        relatorio = self.relatorio(script)
+        if not caminho:
+            return relatorio
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with open(caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(relatorio, ensure_ascii=False) + '\n')
+        print(f"📈 Métricas da execução acrescentadas a '{caminho}'")
+        return relatorio
+
+
+metricas = Metricas()
@@ -0,0 +1,272 @@
+"""
+Pipeline unificado: busca → desduplicação → filtro de idioma → clusterização.
+
+As etapas são geradores encadeados sobre um fluxo de instituições (cada uma com
+a sua lista de 'Repositorios'), então os dados passam uma única vez pela memória,
+sem os JSONs intermediários que app.py / filtrar_idioma.py / clusterizador.py
+gravam e releem. Os arquivos intermediários só são escritos com --salvar-intermediarios.
+
+    python pipeline.py --workers 4
+    python pipeline.py --entrada repositorios_federais_desduplicados_melhorado.json
+    python pipeline.py --entrada repositorios_federais_desduplicados_melhorado.parquet --snapshot parquet
+    python pipeline.py --entrada repositorios_federais_desduplicados_melhorado.json --quase-duplicatas
+    python pipeline.py --entrada repositorios_federais_desduplicados_melhorado.json --perfil perfis/
+
+As métricas de cada execução (requisições, esperas de rate limit, repositórios
+que entram e saem de cada filtro, tempos de vetorização/ajuste e bytes gravados)
+são acrescentadas a .cache/metricas_execucoes.jsonl (veja metricas.py).
+
+Os scripts originais continuam funcionando como etapas isoladas.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from filtrar_idioma import DetectorIdiomas, filtrar_fluxo
+from clusterizador import (AUTO_K_PADRAO, BACKENDS, METRICAS_K, MODOS, clusterizar_instituicoes,
+                           opcoes_auto_k, reaproveitar_clusters)
+from remove_duplicadas import desduplicar_global
+from quase_duplicatas import (QUASE_DUPLICATAS_PADRAO, RELATORIO_DUPLICATAS_PATH, DetectorQuaseDuplicatas,
+                              desduplicar_similares, opcoes_quase_duplicatas)
+from snapshot_colunar import FORMATOS, caminho_snapshot, salvar_snapshot
+from fluxo_json import EscritorInstituicoes, iterar_instituicoes
+from exportar_frontend import DIRETORIO_FRONTEND, exportar_frontend
+from banco_repositorios import BANCO_PATH, BancoRepositorios
+from metricas import METRICAS_PATH, metricas
+from enriquecimento import ENRIQUECIMENTO_PADRAO, Enriquecedor, opcoes_enriquecimento
+
+ARQUIVOS_INSTITUICOES = ['dados/institutos_federais.csv', 'dados/universidades_federais.csv']
+ARQUIVO_DESDUPLICADO = 'repositorios_federais_desduplicados_melhorado.json'
+ARQUIVO_FILTRADO = 'repositorios_federais_filtrado_idioma.json'
+ARQUIVO_CLUSTERS = 'repositorios_federais_com_clusters_visualizado.json'
+
+
+# === 1. Fontes ===
+
+def etapa_busca(arquivos_csv=ARQUIVOS_INSTITUICOES, max_workers=1, retomar=False, backend_busca='rest'):
+    """
+    Gera as instituições buscadas no GitHub, na ordem dos CSVs.
+    O import é tardio para que --entrada não carregue o cliente HTTP; o token só
+    é exigido aqui, na criação do cliente (sem ele, a execução termina com status 1).
+    Cada instituição concluída vai para o diário da coleta; com retomar=True,
+    as já concluídas na execução interrompida não são buscadas de novo.
+    Com backend_busca='graphql', as instituições são buscadas em lotes.
+    """
+    from consulta_if import (load_institutions_data, processar_com_diario, processar_lote_graphql,
+                             obter_github_client, obter_github_graphql)
+    from diario_coleta import DiarioColeta
+
+    github_client = obter_github_client()
+    diario = DiarioColeta(retomar=retomar, budget=github_client.budget)
+    for caminho in arquivos_csv:
+        df = load_institutions_data(caminho)
+        if df.empty:
+            continue
+        linhas = list(df[["Sigla", "Nome Completo", "URL Oficial"]].itertuples(index=False, name=None))
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            if backend_busca == 'graphql':
+                tamanho = obter_github_graphql().tamanho_lote
+                lotes = [linhas[i:i + tamanho] for i in range(0, len(linhas), tamanho)]
+                resultados = (instituicao for lote in executor.map(lambda lote: processar_lote_graphql(lote, diario=diario), lotes)
+                              for instituicao in lote)
+            else:
+                resultados = executor.map(lambda linha: processar_com_diario(*linha, diario=diario), linhas)
+            for instituicao in resultados:
+                if instituicao is not None:
+                    yield instituicao
+    diario.finalizar()
+    github_client.save_cache()
+
+
+def etapa_leitura(caminho):
+    """
+    Gera as instituições de um JSON (ou snapshot .parquet/.arrow) já existente
+    no formato 'institutions_data'. O JSON é lido incrementalmente (fluxo_json),
+    sem carregar o documento inteiro.
+    """
+    yield from iterar_instituicoes(caminho)
+
+
+# === 2. Transformações ===
+
+def etapa_filtro_idioma(instituicoes, estatisticas, detector):
+    """
+    Aplica os filtros de filtrar_idioma.py a cada instituição do fluxo, em
+    lotes do tamanho do pool do detector (veja filtrar_idioma.filtrar_fluxo).
+    """
+    return filtrar_fluxo(instituicoes, estatisticas, detector)
+
+
+def etapa_gravar(instituicoes, caminho):
+    """
+    Repassa o fluxo adiante enquanto grava cada instituição em 'caminho',
+    sem montar o documento inteiro em memória. O texto é o mesmo de
+    json.dump(indent=2), como nos demais arquivos versionados.
+    """
+    with EscritorInstituicoes(caminho) as escritor:
+        for institution in instituicoes:
+            escritor.escrever(institution)
+            yield institution
+    metricas.registrar_arquivo(caminho)
+    print(f"💾 Etapa intermediária salva em '{caminho}'")
+
+
+def etapa_banco(instituicoes, banco, execucao_id):
+    """
+    Repassa o fluxo adiante enquanto faz o upsert de cada instituição na base SQLite.
+    """
+    for institution in instituicoes:
+        banco.salvar_instituicao(institution, execucao_id)
+        yield institution
+    banco.conexao.commit()
+
+
+# === 3. Execução ===
+
+def executar_pipeline(entrada=None, saida=ARQUIVO_CLUSTERS, num_clusters=15,
+                      max_workers=1, salvar_intermediarios=False, workers_idioma=1,
+                      backend='tfidf', modo='refit', auto_k=None, formato_snapshot=None,
+                      diretorio_frontend=None, quase_duplicatas=None, banco=None, retomar=False,
+                      backend_busca='rest', enriquecimento=None):
+    fluxo = etapa_leitura(entrada) if entrada else etapa_busca(max_workers=max_workers, retomar=retomar,
+                                                               backend_busca=backend_busca)
+    # Cada etapa do fluxo é medida (repositórios que entram/saem e tempo próprio)
+    fluxo = metricas.medir_fluxo('leitura' if entrada else 'busca', fluxo)
+
+    fluxo = metricas.medir_fluxo('desduplicacao', desduplicar_global(fluxo))
+    execucao_id = None
+    if banco is not None:
+        execucao_id = banco.iniciar_execucao('importacao' if entrada else 'completa')
+        fluxo = metricas.medir_fluxo('banco', etapa_banco(fluxo, banco, execucao_id))
+    detector_duplicatas = None
+    if quase_duplicatas is not None:
+        # Forks e espelhos com nome/descrição quase iguais (MinHash/LSH)
+        opcoes = {**QUASE_DUPLICATAS_PADRAO, **quase_duplicatas}
+        relatorio_duplicatas = opcoes.pop('relatorio', RELATORIO_DUPLICATAS_PATH)
+        detector_duplicatas = DetectorQuaseDuplicatas(**opcoes)
+        fluxo = metricas.medir_fluxo('quase_duplicatas', desduplicar_similares(fluxo, detector_duplicatas))
+    if salvar_intermediarios:
+        fluxo = metricas.medir_fluxo('gravar_desduplicado', etapa_gravar(fluxo, ARQUIVO_DESDUPLICADO))
+
+    estatisticas = {'processados': 0, 'mantidos': 0}
+    with DetectorIdiomas(workers=workers_idioma) as detector:
+        fluxo = metricas.medir_fluxo('filtro_idioma', etapa_filtro_idioma(fluxo, estatisticas, detector))
+        if salvar_intermediarios:
+            fluxo = metricas.medir_fluxo('gravar_filtrado', etapa_gravar(fluxo, ARQUIVO_FILTRADO))
+
+        # A clusterização precisa do conjunto completo (ajuste do TF-IDF/KMeans),
+        # então o fluxo é materializado apenas aqui, uma única vez.
+        with metricas.etapa('fluxo'):
+            institutions_data = list(fluxo)
+    detector.relatorio()
+    if detector_duplicatas is not None:
+        detector_duplicatas.relatorio()
+        if relatorio_duplicatas:
+            detector_duplicatas.salvar_relatorio(relatorio_duplicatas)
+    print(f"Filtro de idioma: {estatisticas['mantidos']} de {estatisticas['processados']} repositórios mantidos.")
+
+    if enriquecimento is not None:
+        # Linguagens e atividade de commits só dos repositórios que passaram nos filtros
+        with metricas.etapa('enriquecimento'), Enriquecedor(**{**ENRIQUECIMENTO_PADRAO, **enriquecimento}) as enriquecedor:
+            enriquecedor.enriquecer(institutions_data)
+        enriquecedor.relatorio()
+
+    if modo == 'assign':
+        # Repositórios inalterados mantêm o Cluster_ID da saída anterior
+        reaproveitar_clusters(institutions_data, saida)
+    relatorio = {}
+    with metricas.etapa('clusterizacao'):
+        cluster_descriptions = clusterizar_instituicoes(institutions_data, num_clusters, backend, modo=modo,
+                                                        auto_k=auto_k, relatorio=relatorio)
+    if cluster_descriptions is None:
+        return
+
+    resultado = {"institutions_data": institutions_data, "cluster_descriptions": cluster_descriptions}
+    if 'k_selection' in relatorio:
+        resultado['k_selection'] = relatorio['k_selection']
+    with metricas.etapa('gravacao'):
+        # Mesmo texto de json.dump(resultado, indent=2), gravado uma instituição por vez
+        extras = {chave: valor for chave, valor in resultado.items() if chave != 'institutions_data'}
+        with EscritorInstituicoes(saida, extras) as escritor:
+            for institution in institutions_data:
+                escritor.escrever(institution)
+        metricas.registrar_arquivo(saida)
+        if banco is not None:
+            banco.substituir_clusters(institutions_data, cluster_descriptions, execucao_id)
+            # O fluxo é o conjunto completo: o que não passou por etapa_banco não existe mais
+            removidos = banco.remover_nao_vistos(execucao_id)
+            banco.finalizar_execucao(execucao_id)
+            if removidos:
+                print(f"🗄️ {removidos} repositórios ausentes nesta execução removidos da base.")
+        if formato_snapshot:
+            salvar_snapshot(resultado, caminho_snapshot(saida, formato_snapshot))
+    if diretorio_frontend:
+        with metricas.etapa('frontend'):
+            exportar_frontend(resultado, diretorio_frontend)
+    print(f"\n✅ Pipeline concluído. Resultado salvo em '{saida}'.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline completo do mapa de código público em uma única passada.")
+    parser.add_argument("--entrada", help="JSON 'institutions_data' (ou snapshot .parquet/.arrow) já existente (pula a busca no GitHub).")
+    parser.add_argument("--saida", default=ARQUIVO_CLUSTERS, help="Arquivo final com clusters.")
+    parser.add_argument("--clusters", type=int, default=15, help="Número de clusters do KMeans.")
+    parser.add_argument("--backend", choices=BACKENDS, default='tfidf', help="Backend de clusterização.")
+    parser.add_argument("--modo", choices=MODOS, default='refit',
+                        help="'refit' reajusta o modelo mantendo os IDs antigos; 'assign' só atribui repositórios novos/alterados.")
+    parser.add_argument("--workers", type=int, default=1, help="Instituições buscadas em paralelo.")
+    parser.add_argument("--backend-busca", choices=('rest', 'graphql'), default='rest',
+                        help="API usada na busca no GitHub ('graphql' agrupa várias instituições por consulta).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma a busca no GitHub de uma execução interrompida (diário em .cache/).")
+    parser.add_argument("--workers-idioma", type=int, default=1, help="Processos usados na detecção de idioma.")
+    parser.add_argument("--salvar-intermediarios", action="store_true",
+                        help="Grava também os JSONs desduplicado e filtrado por idioma.")
+    parser.add_argument("--snapshot", choices=FORMATOS,
+                        help="Grava também um snapshot colunar da saída final (requer pyarrow).")
+    parser.add_argument("--frontend", nargs='?', const=DIRETORIO_FRONTEND,
+                        help=f"Gera os arquivos compactos do index.html (padrão: {DIRETORIO_FRONTEND}/).")
+    parser.add_argument("--quase-duplicatas", action="store_true",
+                        help="Descarta também forks/espelhos com nome e descrição quase iguais (MinHash/LSH).")
+    parser.add_argument("--limiar-similaridade", type=float, default=QUASE_DUPLICATAS_PADRAO['limiar'],
+                        help="Similaridade de Jaccard mínima para --quase-duplicatas.")
+    parser.add_argument("--relatorio-duplicatas", default=RELATORIO_DUPLICATAS_PATH,
+                        help="JSON com os grupos de quase-duplicatas encontrados.")
+    parser.add_argument("--banco", nargs='?', const=BANCO_PATH,
+                        help=f"Grava repositórios, execução e clusters também na base SQLite (padrão: {BANCO_PATH}); "
+                             "os que a execução não encontrou são removidos dela.")
+    parser.add_argument("--enriquecer", action="store_true",
+                        help="Adiciona linguagens e atividade de commits de cada repositório (cache em .cache/).")
+    parser.add_argument("--workers-enriquecimento", type=int, default=ENRIQUECIMENTO_PADRAO['workers'],
+                        help="Requisições simultâneas do enriquecimento.")
+    parser.add_argument("--auto-k", action="store_true", help="Escolhe o número de clusters por varredura paralela de k.")
+    parser.add_argument("--k-min", type=int, default=AUTO_K_PADRAO['k_min'])
+    parser.add_argument("--k-max", type=int, default=AUTO_K_PADRAO['k_max'])
+    parser.add_argument("--k-passo", type=int, default=AUTO_K_PADRAO['passo'])
+    parser.add_argument("--metrica", choices=METRICAS_K, default=AUTO_K_PADRAO['metrica'])
+    parser.add_argument("--orcamento-segundos", type=float, default=AUTO_K_PADRAO['orcamento_segundos'],
+                        help="Tempo máximo da varredura de k.")
+    parser.add_argument("--workers-k", dest="workers_k", type=int, default=AUTO_K_PADRAO['workers'],
+                        help="Processos da varredura de k.")
+    parser.add_argument("--metricas", default=METRICAS_PATH,
+                        help="JSONL onde as métricas da execução (contadores, tempos, bytes) são acrescentadas.")
+    parser.add_argument("--perfil", help="Diretório onde gravar o cProfile de cada etapa (<etapa>.prof).")
+    args = parser.parse_args(argv)
+    metricas.configurar(args.perfil)
+
+    banco = BancoRepositorios(args.banco) if args.banco else None
+    try:
+        executar_pipeline(entrada=args.entrada, saida=args.saida, num_clusters=args.clusters,
+                          max_workers=args.workers, salvar_intermediarios=args.salvar_intermediarios,
+                          workers_idioma=args.workers_idioma, backend=args.backend,
+                          modo=args.modo, auto_k=opcoes_auto_k(args), formato_snapshot=args.snapshot,
+                          diretorio_frontend=args.frontend, quase_duplicatas=opcoes_quase_duplicatas(args),
+                          banco=banco, retomar=args.resume, backend_busca=args.backend_busca,
+                          enriquecimento=opcoes_enriquecimento(args))
+    finally:
+        if banco is not None:
+            banco.fechar()
+    metricas.salvar(args.metricas, 'pipeline')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Detecção de quase-duplicatas (forks, espelhos e cópias do mesmo material de
+curso publicados por várias instituições) com MinHash + LSH.
+
+A desduplicação de remove_duplicadas.py só descarta repositórios com o mesmo
+(nome, link). Aqui cada repositório vira o conjunto de k-gramas de caracteres
+do seu nome + descrição normalizados (minúsculas, sem acentos e sem stopwords)
+e recebe uma assinatura MinHash. As assinaturas são cortadas em bandas (LSH):
+só repositórios que caem no mesmo balde em alguma banda são comparados, então
+o custo é linear no número de repositórios, não quadrático.
+
+Um repositório cuja similaridade de Jaccard estimada com algum repositório já
+mantido é >= limiar é descartado como duplicata dele (o primeiro visto fica,
+como em desduplicar_global). Os grupos encontrados ficam em detector.grupos e
+podem ser gravados com salvar_relatorio().
+
+    python quase_duplicatas.py --entrada repositorios_federais_desduplicados_melhorado.json
+    python pipeline.py --quase-duplicatas --limiar-similaridade 0.85
+"""
+import argparse
+import json
+
+import numpy as np
+
+from texto import TOKEN_BUSCA_REGEX, STOPWORDS_BUSCA, normalizar_busca
+
+RELATORIO_DUPLICATAS_PATH = 'quase_duplicatas.json'
+QUASE_DUPLICATAS_PADRAO = {
+    'limiar': 0.8,              # Jaccard mínimo para considerar duplicata
+    'num_permutacoes': 128,     # Tamanho da assinatura MinHash
+    'tamanho_shingle': 5,       # k dos k-gramas de caracteres
+    'minimo_caracteres': 30,    # Textos mais curtos (ex.: só "site") não são comparados
+    'semente': 1,
+}
+_PRIMO_MISTURA = np.uint64(0x100000001B3)
+
+
+def tokens_assinatura(repo):
+    """
+    Texto normalizado de nome + descrição usado nos shingles. Nomes como
+    "aula-python" e "Aula_Python" resultam no mesmo texto.
+    """
+    partes = [repo.get('Nome do Repositório'), repo.get('Descricao')]
+    texto = normalizar_busca(' '.join(p for p in partes if p and p != 'N/A'))
+    return ' '.join(token for token in TOKEN_BUSCA_REGEX.findall(texto) if token not in STOPWORDS_BUSCA)
+
+
+def escolher_bandas(num_permutacoes, limiar):
+    """
+    Escolhe (bandas, linhas por banda) cujo limiar do LSH, (1/b)^(1/r), é o maior
+    que não passa de 'limiar': os candidatos são depois conferidos pela
+    similaridade estimada, então é melhor errar para o lado de mais candidatos.
+    """
+    melhor = (num_permutacoes, 1)
+    melhor_limiar = 0.0
+    for linhas in range(1, num_permutacoes + 1):
+        bandas = num_permutacoes // linhas
+        limiar_lsh = (1 / bandas) ** (1 / linhas)
+        if melhor_limiar < limiar_lsh <= limiar:
+            melhor, melhor_limiar = (bandas, linhas), limiar_lsh
+    return melhor
+
+
+class DetectorQuaseDuplicatas:
+    """
+    Índice LSH incremental das assinaturas MinHash dos repositórios mantidos.
+
+    As assinaturas são calculadas em lote (uma instituição por vez) com numpy:
+    os k-gramas de todos os textos do lote viram hashes de 64 bits de uma só vez
+    e cada permutação é um hash multiplicativo (a*h + b) >> 32, reduzido por
+    repositório com np.minimum.reduceat. As contagens ficam em self.stats.
+    """
+
+    def __init__(self, limiar=0.8, num_permutacoes=128, tamanho_shingle=5, minimo_caracteres=30, semente=1):
+        self.limiar = limiar
+        self.tamanho_shingle = tamanho_shingle
+        self.minimo_caracteres = max(minimo_caracteres, tamanho_shingle)
+        self.bandas, self.linhas = escolher_bandas(num_permutacoes, limiar)
+        self.num_permutacoes = self.bandas * self.linhas
+
+        gerador = np.random.default_rng(semente)
+        maximo = np.iinfo(np.uint64).max
+        # 'a' ímpar: a multiplicação módulo 2^64 é então uma bijeção
+        self._a = gerador.integers(1, maximo, self.num_permutacoes, dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self._b = gerador.integers(0, maximo, self.num_permutacoes, dtype=np.uint64, endpoint=True)
+
+        self._baldes = [{} for _ in range(self.bandas)]
+        self._assinaturas = []   # Assinaturas dos repositórios mantidos (índice = id do representante)
+        self._representantes = []
+        self.grupos = {}         # id do representante -> lista de duplicatas
+        self.stats = {'repositorios': 0, 'comparaveis': 0, 'candidatos': 0, 'duplicatas': 0}
+
+    # --- Assinaturas ---
+
+    def _hashes_shingles(self, textos):
+        """
+        Hashes de todos os k-gramas de bytes de 'textos' e, para cada hash, o
+        índice do texto de origem. k-gramas que cruzam a fronteira entre dois
+        textos são descartados.
+        """
+        k = self.tamanho_shingle
+        codificados = [texto.encode('utf-8') for texto in textos]
+        tamanhos = np.fromiter((len(c) for c in codificados), dtype=np.int64, count=len(codificados))
+        inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+        dados = np.frombuffer(b''.join(codificados), dtype=np.uint8).astype(np.uint64)
+
+        janelas = len(dados) - k + 1
+        if janelas <= 0:
+            return np.empty(0, np.uint64), np.empty(0, np.int64)
+        hashes = np.zeros(janelas, dtype=np.uint64)
+        for j in range(k):
+            hashes = hashes * _PRIMO_MISTURA + dados[j:j + janelas]
+        # Mistura final (splitmix64) para espalhar os bits antes das permutações
+        hashes ^= hashes >> np.uint64(30)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(27)
+        hashes *= np.uint64(0x94D049BB133111EB)
+        hashes ^= hashes >> np.uint64(31)
+
+        origem = np.searchsorted(inicios, np.arange(janelas), side='right') - 1
+        validos = np.arange(janelas) + k <= inicios[origem] + tamanhos[origem]
+        return hashes[validos], origem[validos]
+
+    def assinaturas(self, textos):
+        """
+        Matriz (len(textos), num_permutacoes) de assinaturas MinHash (uint32).
+        Textos sem nenhum k-grama ficam com a assinatura máxima em todas as posições.
+        """
+        resultado = np.full((len(textos), self.num_permutacoes), np.iinfo(np.uint32).max, dtype=np.uint32)
+        hashes, origem = self._hashes_shingles(textos)
+        if len(hashes) == 0:
+            return resultado
+        # 'origem' é crescente: cada texto ocupa um trecho contíguo de 'hashes'
+        textos_com_shingles, inicios = np.unique(origem, return_index=True)
+        deslocamento = np.uint64(32)
+        for i in range(self.num_permutacoes):
+            valores = (hashes * self._a[i] + self._b[i]) >> deslocamento
+            resultado[textos_com_shingles, i] = np.minimum.reduceat(valores, inicios)
+        return resultado
+
+    # --- Índice LSH ---
+
+    def _candidatos(self, assinatura):
+        candidatos = set()
+        for banda, baldes in enumerate(self._baldes):
+            chave = assinatura[banda * self.linhas:(banda + 1) * self.linhas].tobytes()
+            candidatos.update(baldes.get(chave, ()))
+        return candidatos
+
+    def _indexar(self, assinatura, descricao):
+        identificador = len(self._assinaturas)
+        self._assinaturas.append(assinatura)
+        self._representantes.append(descricao)
+        for banda, baldes in enumerate(self._baldes):
+            chave = assinatura[banda * self.linhas:(banda + 1) * self.linhas].tobytes()
+            baldes.setdefault(chave, []).append(identificador)
+
+    def filtrar(self, repos, sigla=None):
+        """
+        Retorna os repositórios de 'repos' que não são quase-duplicatas de nenhum
+        repositório já mantido (deste lote ou de lotes anteriores). Os mantidos
+        entram no índice.
+        """
+        self.stats['repositorios'] += len(repos)
+        textos = [tokens_assinatura(repo) for repo in repos]
+        comparaveis = [i for i, texto in enumerate(textos) if len(texto) >= self.minimo_caracteres]
+        self.stats['comparaveis'] += len(comparaveis)
+        matriz = self.assinaturas([textos[i] for i in comparaveis])
+
+        duplicados = set()
+        for linha, i in enumerate(comparaveis):
+            assinatura = matriz[linha]
+            melhor, similaridade = None, 0.0
+            for candidato in self._candidatos(assinatura):
+                self.stats['candidatos'] += 1
+                estimativa = float(np.mean(self._assinaturas[candidato] == assinatura))
+                if estimativa >= self.limiar and estimativa > similaridade:
+                    melhor, similaridade = candidato, estimativa
+            repo = repos[i]
+            descricao = {'Sigla': sigla, 'Nome do Repositório': repo.get('Nome do Repositório'),
+                         'Link de Acesso': repo.get('Link de Acesso')}
+            if melhor is None:
+                self._indexar(assinatura, descricao)
+            else:
+                duplicados.add(i)
+                self.grupos.setdefault(melhor, []).append({**descricao, 'similaridade': round(similaridade, 3)})
+        self.stats['duplicatas'] += len(duplicados)
+        return [repo for i, repo in enumerate(repos) if i not in duplicados]
+
+    # --- Relatórios ---
+
+    def grupos_encontrados(self):
+        """
+        Lista de grupos {representante, duplicatas}, dos maiores para os menores.
+        """
+        grupos = [{'representante': self._representantes[identificador], 'duplicatas': duplicatas}
+                  for identificador, duplicatas in self.grupos.items()]
+        return sorted(grupos, key=lambda grupo: len(grupo['duplicatas']), reverse=True)
+
+    def salvar_relatorio(self, caminho=RELATORIO_DUPLICATAS_PATH):
+        relatorio = {
+            'limiar': self.limiar,
+            'bandas': self.bandas,
+            'linhas_por_banda': self.linhas,
+            'estatisticas': self.stats,
+            'grupos': self.grupos_encontrados(),
+        }
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"📝 Relatório de quase-duplicatas salvo em '{caminho}'")
+
+    def relatorio(self):
+        print(f"🧬 Quase-duplicatas (Jaccard >= {self.limiar}, {self.bandas} bandas x {self.linhas} linhas): "
+              f"{self.stats['duplicatas']} de {self.stats['repositorios']} repositórios descartados "
+              f"em {len(self.grupos)} grupos ({self.stats['candidatos']} comparações).")
+
+
+def desduplicar_similares(instituicoes, detector):
+    """
+    Etapa de pipeline: gera as instituições sem as quase-duplicatas de
+    repositórios vistos antes no fluxo. Instituições que ficam vazias são descartadas.
+    """
+    for institution in instituicoes:
+        repos = detector.filtrar(institution.get('Repositorios', []), institution.get('Sigla'))
+        if repos:
+            yield {**institution, 'Repositorios': repos}
+
+
+def opcoes_quase_duplicatas(args):
+    """
+    Converte os argumentos --quase-duplicatas/--limiar-similaridade/--relatorio-duplicatas
+    no dict de opções.
+    """
+    if not args.quase_duplicatas:
+        return None
+    return {'limiar': args.limiar_similaridade, 'relatorio': args.relatorio_duplicatas}
+
+
+def main(argv=None):
+    from snapshot_colunar import carregar_dados
+
+    parser = argparse.ArgumentParser(description="Remove quase-duplicatas (forks, espelhos) com MinHash/LSH.")
+    parser.add_argument("--entrada", default='repositorios_federais_desduplicados_melhorado.json',
+                        help="JSON 'institutions_data' (ou snapshot .parquet/.arrow).")
+    parser.add_argument("--saida", default='repositorios_federais_sem_quase_duplicatas.json')
+    parser.add_argument("--relatorio", default=RELATORIO_DUPLICATAS_PATH, help="JSON com os grupos encontrados.")
+    parser.add_argument("--limiar", type=float, default=QUASE_DUPLICATAS_PADRAO['limiar'],
+                        help="Similaridade de Jaccard mínima para descartar um repositório.")
+    parser.add_argument("--permutacoes", type=int, default=QUASE_DUPLICATAS_PADRAO['num_permutacoes'])
+    parser.add_argument("--shingle", type=int, default=QUASE_DUPLICATAS_PADRAO['tamanho_shingle'],
+                        help="Tamanho dos k-gramas de caracteres.")
+    parser.add_argument("--minimo-caracteres", type=int, default=QUASE_DUPLICATAS_PADRAO['minimo_caracteres'])
+    args = parser.parse_args(argv)
+
+    full_data = carregar_dados(args.entrada)
+    detector = DetectorQuaseDuplicatas(limiar=args.limiar, num_permutacoes=args.permutacoes,
+                                       tamanho_shingle=args.shingle, minimo_caracteres=args.minimo_caracteres)
+    full_data['institutions_data'] = list(desduplicar_similares(full_data.get('institutions_data', []), detector))
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(full_data, f, indent=2, ensure_ascii=False)
+    detector.relatorio()
+    detector.salvar_relatorio(args.relatorio)
+
+
+if __name__ == "__main__":
+    main()
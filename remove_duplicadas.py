@@ -1,31 +1,57 @@
+import argparse
 import json
 
+from fluxo_json import EscritorInstituicoes, iterar_instituicoes
+
+def desduplicar_global(instituicoes):
+    """
+    Gera as instituições com desduplicação global por (nome, link): um repositório
+    que aparece em várias instituições fica apenas na primeira. Instituições que
+    ficam sem repositórios únicos são descartadas. Funciona sobre qualquer iterável,
+    então pode ser usada como etapa de um pipeline em streaming.
+    """
+    vistos = set()
+    for instituicao_data in instituicoes:
+        repositorios_unicos = []
+        for repo in instituicao_data.get('Repositorios', []):
+            chave_repo = (repo.get('Nome do Repositório'), repo.get('Link de Acesso'))
+            if chave_repo not in vistos:
+                repositorios_unicos.append(repo)
+                vistos.add(chave_repo)
+        if repositorios_unicos:
+            yield {**instituicao_data, 'Repositorios': repositorios_unicos}
+
+def remover_duplicatas_instituicao(instituicao_data):
+    """
+    Remove os repositórios repetidos (mesmo nome e link) dentro de uma instituição.
+    """
+    repositorios = instituicao_data.get('Repositorios', [])
+    repositorios_unicos = []
+    vistos = set() # Usar um conjunto para armazenar tuplas (nome, link)
+
+    for repo in repositorios:
+        nome_repo = repo.get('Nome do Repositório')
+        link_acesso = repo.get('Link de Acesso')
+
+        # Criar uma chave única para identificar o repositório
+        chave_repo = (nome_repo, link_acesso)
+
+        if chave_repo not in vistos:
+            repositorios_unicos.append(repo)
+            vistos.add(chave_repo)
+
+    instituicao_data['Repositorios'] = repositorios_unicos
+    return instituicao_data
+
 def remover_duplicatas_repositorios(caminho_arquivo_entrada, caminho_arquivo_saida):
     try:
-        with open(caminho_arquivo_entrada, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-
-        for instituicao_data in dados.get('institutions_data', []):
-            repositorios = instituicao_data.get('Repositorios', [])
-            repositorios_unicos = []
-            vistos = set() # Usar um conjunto para armazenar tuplas (nome, link)
-
-            for repo in repositorios:
-                nome_repo = repo.get('Nome do Repositório')
-                link_acesso = repo.get('Link de Acesso')
-
-                # Criar uma chave única para identificar o repositório
-                chave_repo = (nome_repo, link_acesso)
-
-                if chave_repo not in vistos:
-                    repositorios_unicos.append(repo)
-                    vistos.add(chave_repo)
-            
-            instituicao_data['Repositorios'] = repositorios_unicos
-
-        with open(caminho_arquivo_saida, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, indent=2, ensure_ascii=False) # ensure_ascii=False para manter unicode
-        
+        # Uma instituição por vez: o arquivo de entrada não é carregado inteiro em memória
+        outras_chaves = {}
+        with EscritorInstituicoes(caminho_arquivo_saida) as escritor:
+            for instituicao_data in iterar_instituicoes(caminho_arquivo_entrada, outras_chaves):
+                escritor.escrever(remover_duplicatas_instituicao(instituicao_data))
+            escritor.extras.update(outras_chaves) # cluster_descriptions etc. seguem para a saída
+
         print(f"Duplicatas removidas e arquivo salvo em: {caminho_arquivo_saida}")
 
     except FileNotFoundError:
@@ -35,7 +61,14 @@ def remover_duplicatas_repositorios(caminho_arquivo_entrada, caminho_arquivo_sai
     except Exception as e:
         print(f"Ocorreu um erro inesperado: {e}")
 
-# Exemplo de uso:
-# substitua 'repositorios_federais_com_clusters_visualizado.json' pelo nome do seu arquivo de entrada
-# e 'repositorios_sem_duplicatas.json' pelo nome do arquivo de saída desejado.
-remover_duplicatas_repositorios('repositorios_federais_com_clusters_visualizado.json', 'repositorios_sem_duplicatas.json')
\ No newline at end of file
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove repositórios repetidos dentro de cada instituição.")
+    parser.add_argument("entrada", nargs='?', default='repositorios_federais_com_clusters_visualizado.json',
+                        help="JSON 'institutions_data' de entrada.")
+    parser.add_argument("saida", nargs='?', default='repositorios_sem_duplicatas.json', help="Arquivo de saída.")
+    args = parser.parse_args(argv)
+    remover_duplicatas_repositorios(args.entrada, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const generalSearchInput = document.getElementById('generalSearchInput');
     const languageFilter = document.getElementById('languageFilter');
     const licenseFilter = document.getElementById('licenseFilter');
+    const institutionFilter = document.getElementById('institutionFilter');
+    const clusterFilter = document.getElementById('clusterFilter');
     const clearFiltersBtn = document.getElementById('clearFilters');
 
     // Elementos para Estatísticas Globais
@@ -44,6 +46,18 @@ document.addEventListener('DOMContentLoaded', () => {
     let availableLanguages = new Set();
     let availableLicenses = new Set();
 
+    // Arquivos gerados por exportar_frontend.py; o JSON completo fica como alternativa
+    const MANIFEST_URL = 'dados_frontend/manifest.json';
+    const FULL_JSON_URL = 'repositorios_federais_com_clusters_visualizado.json';
+    let manifest = null; // Estatísticas pré-calculadas + índice dos shards (null = JSON completo)
+    let precomputedTopRepos = null; // Top repositórios ativos já calculados no build
+    const shardCache = new Map(); // URL do shard -> Promise com os repositórios expandidos
+    let datasetRequest = 0; // Descarta respostas de shards que chegam fora de ordem
+    let currentDatasetPath = null; // Arquivo cujos repositórios estão em allFlattenedRepos
+    let listingVisible = false; // A tabela completa só é baixada quando a listagem sem filtros aparece na tela
+    let searchIndexPromise = null; // Índice invertido da busca geral (indice_busca.py), baixado na primeira busca
+    let searchIndex = null;
+
     // Variáveis de estado para ordenação da tabela principal
     let currentSortColumn = null;
     let currentSortDirection = 'asc'; // 'asc' ou 'desc'
@@ -59,8 +73,241 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // === Lógica de Carregamento de Dados ===
     async function fetchAndProcessData() {
+        let manifestResponse;
         try {
-            const response = await fetch('repositorios_federais_com_clusters_visualizado.json');
+            manifestResponse = await fetch(MANIFEST_URL, { cache: 'no-cache' });
+        } catch (error) {
+            manifestResponse = null;
+        }
+        if (!manifestResponse || !manifestResponse.ok) {
+            // Sem os arquivos compactos: carrega o JSON completo e calcula tudo no navegador
+            return fetchFullJsonData();
+        }
+
+        try {
+            manifest = await manifestResponse.json();
+            manifest.baseUrl = manifestResponse.url;
+
+            // --- Primeira pintura: apenas as estatísticas pré-calculadas (arquivo pequeno) ---
+            clusterDescriptions = manifest.cluster_descriptions || [];
+            calculatedTop5Languages = manifest.top_linguagens || [];
+            precomputedTopRepos = manifest.top_repos || [];
+
+            populateFilter(languageFilter, manifest.linguagens || []);
+            populateFilter(licenseFilter, manifest.licencas || []);
+            populateShardFilters(
+                (manifest.instituicoes || []).map(inst => ({ value: inst.sigla, label: `${inst.sigla} (${inst.repos})` })),
+                (manifest.clusters || []).map(cluster => ({ value: String(cluster.id), label: `Cluster ${cluster.id} (${cluster.repos})` }))
+            );
+            populateClustersTable();
+            displayTop5LanguagesTable(calculatedTop5Languages);
+
+            // --- Depois: só os repositórios que os filtros pedem (shard, ou a tabela completa quando a listagem aparece) ---
+            applyUrlFilters();
+            observeListing();
+            await loadDatasetAndDisplay(true);
+
+        } catch (error) {
+            console.error("Erro ao carregar ou processar os dados:", error);
+        }
+    }
+
+    // Escolhe o menor arquivo que contém todos os repositórios dos filtros de instituição/cluster
+    function datasetPathForFilters() {
+        if (generalSearchInput.value.trim()) {
+            // O índice de busca aponta para linhas da tabela completa
+            return manifest.repositorios;
+        }
+        const candidates = [];
+        const institution = (manifest.instituicoes || []).find(inst => inst.sigla === institutionFilter.value);
+        const cluster = (manifest.clusters || []).find(c => String(c.id) === clusterFilter.value);
+        if (institution) candidates.push(institution);
+        if (cluster) candidates.push(cluster);
+        if (candidates.length === 0 || shardCache.has(manifest.repositorios)) {
+            // Sem filtro, ou a tabela completa já foi baixada (listagem exibida antes): nada de novo a buscar
+            return manifest.repositorios;
+        }
+        candidates.sort((a, b) => a.repos - b.repos);
+        return candidates[0].arquivo;
+    }
+
+    function loadShard(path) {
+        if (!shardCache.has(path)) {
+            const request = fetch(new URL(path, manifest.baseUrl))
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`Erro ao carregar '${path}': ${response.statusText} (Status: ${response.status})`);
+                    }
+                    return response.json();
+                })
+                .then(expandCompactRepos);
+            request.catch(() => shardCache.delete(path)); // Permite tentar de novo
+            shardCache.set(path, request);
+        }
+        return shardCache.get(path);
+    }
+
+    async function loadDatasetAndDisplay(resetPage = false) {
+        if (!manifest) {
+            applyFiltersAndDisplay(resetPage);
+            return;
+        }
+        const requestId = ++datasetRequest;
+        try {
+            const path = datasetPathForFilters();
+            if (path === manifest.repositorios && !shardCache.has(path) && !listingVisible && !hasRepoFilters()) {
+                // Listagem sem filtros ainda fora da tela: as estatísticas do manifest bastam
+                displayManifestSummary();
+                return;
+            }
+            const [repos] = await Promise.all([
+                loadShard(path),
+                generalSearchInput.value.trim() ? loadSearchIndex() : null
+            ]);
+            if (requestId !== datasetRequest) return; // Outro filtro foi escolhido enquanto baixava
+            allFlattenedRepos = repos;
+            currentDatasetPath = path;
+            applyFiltersAndDisplay(resetPage);
+        } catch (error) {
+            allReposTbody.innerHTML = `<tr><td colspan="8" class="error-message">Erro ao carregar a tabela de repositórios.</td></tr>`;
+            console.error("Erro ao carregar os repositórios:", error);
+        }
+    }
+
+    // Filtros que só podem ser respondidos com a lista de repositórios (não há shard por linguagem/licença)
+    function hasRepoFilters() {
+        return Boolean(generalSearchInput.value.trim() || languageFilter.value || licenseFilter.value ||
+                       Array.from(allReposFilterInputs).some(input => input.value.trim()));
+    }
+
+    // Primeira pintura sem filtros: estatísticas e top repositórios do manifest, sem baixar a tabela completa
+    function displayManifestSummary() {
+        allFlattenedRepos = [];
+        currentDatasetPath = null;
+        currentFilteredAndSortedRepos = [];
+        currentPage = 1;
+        totalReposGlobal.textContent = manifest.total;
+        filteredReposCount.textContent = manifest.total;
+        mostUsedLanguageGlobal.textContent = manifest.linguagem_mais_usada;
+        mostUsedLicenseGlobal.textContent = manifest.licenca_mais_usada;
+        displayTop10ActiveRepos(precomputedTopRepos);
+        allReposTbody.innerHTML = `<tr><td colspan="8" class="no-results-message">Os ${manifest.total} repositórios são carregados ao chegar a esta tabela.</td></tr>`;
+        updatePaginationControls();
+    }
+
+    // Baixa a tabela completa quando a listagem entra na tela (ou logo, sem IntersectionObserver)
+    function observeListing() {
+        if (!('IntersectionObserver' in window)) {
+            listingVisible = true;
+            return;
+        }
+        const observer = new IntersectionObserver(entries => {
+            if (!entries.some(entry => entry.isIntersecting)) return;
+            observer.disconnect();
+            listingVisible = true;
+            if (currentDatasetPath === null) loadDatasetAndDisplay(false);
+        }, { rootMargin: '200px' });
+        observer.observe(allReposTable);
+    }
+
+    function loadSearchIndex() {
+        if (!manifest || !manifest.busca) return Promise.resolve(null);
+        if (!searchIndexPromise) {
+            searchIndexPromise = fetch(new URL(manifest.busca, manifest.baseUrl))
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`Erro ao carregar o índice de busca: ${response.statusText} (Status: ${response.status})`);
+                    }
+                    return response.json();
+                })
+                .then(index => {
+                    index.stop = new Set(index.stop);
+                    searchIndex = index;
+                    return index;
+                })
+                .catch(error => {
+                    // Sem índice, a busca continua funcionando pela varredura do texto
+                    console.error(error);
+                    searchIndexPromise = null;
+                    return null;
+                });
+        }
+        return searchIndexPromise;
+    }
+
+    // Mesma normalização de texto.tokens_busca: minúsculas, sem acentos, sem palavras funcionais (index.stop)
+    function searchTokens(text, stop) {
+        const normalized = (text || '').toLowerCase().normalize('NFKD').replace(/[\u0300-\u036f]/g, '');
+        return (normalized.match(/[\p{L}\p{N}]+/gu) || []).filter(token => !stop.has(token));
+    }
+
+    function lowerBound(sortedTerms, prefix) {
+        let low = 0;
+        let high = sortedTerms.length;
+        while (low < high) {
+            const middle = (low + high) >> 1;
+            if (sortedTerms[middle] < prefix) low = middle + 1; else high = middle;
+        }
+        return low;
+    }
+
+    // Cada token da consulta casa por prefixo; os tokens são combinados com E.
+    // Retorna um Uint8Array com 1 nas linhas encontradas, ou null se a consulta não tiver tokens úteis.
+    function querySearchIndex(index, query) {
+        const tokens = searchTokens(query, index.stop);
+        if (tokens.length === 0) return null;
+        let result = null;
+        for (const token of tokens) {
+            const marks = new Uint8Array(index.n);
+            for (let pos = lowerBound(index.termos, token); pos < index.termos.length && index.termos[pos].startsWith(token); pos++) {
+                let row = 0;
+                for (const delta of index.postings[pos]) {
+                    row += delta;
+                    marks[row] = 1;
+                }
+            }
+            if (result) {
+                for (let i = 0; i < index.n; i++) result[i] &= marks[i];
+            } else {
+                result = marks;
+            }
+        }
+        return result;
+    }
+
+    // Permite links diretos como index.html?instituicao=UFC ou index.html?cluster=3
+    function applyUrlFilters() {
+        const params = new URLSearchParams(window.location.search);
+        if (params.has('instituicao')) institutionFilter.value = params.get('instituicao');
+        if (params.has('cluster')) clusterFilter.value = params.get('cluster');
+    }
+
+    // Converte a tabela em colunas de exportar_frontend.py de volta para objetos com as chaves do JSON original
+    function expandCompactRepos(data) {
+        const repos = new Array(data.n.length);
+        for (let j = 0; j < data.n.length; j++) {
+            const institution = data.inst[data.i[j]] || [null, null];
+            const link = data.h[j];
+            repos[j] = {
+                'Nome do Repositório': data.n[j],
+                'Descricao': data.d[j],
+                'Linguagem Principal': data.l[j] === null ? null : data.ling[data.l[j]],
+                'Estrelas': data.e[j],
+                'Licenca': data.c[j] === null ? null : data.lic[data.c[j]],
+                'Ultima Atualizacao': data.u[j],
+                'Link de Acesso': link && !/^https?:\/\//.test(link) ? data.base + link : link,
+                'Cluster_ID': data.k[j] === null ? 'N/A' : data.k[j],
+                'Commits Ultimas 12 Semanas': data.a ? data.a[j] : null,
+                'Instituicao': institution[1],
+                'SiglaInstituicao': institution[0]
+            };
+        }
+        return repos;
+    }
+
+    async function fetchFullJsonData() {
+        try {
+            const response = await fetch(FULL_JSON_URL);
             if (!response.ok) {
                 // Atualiza todas as mensagens de erro se o arquivo não puder ser carregado
                 allReposTbody.innerHTML = `<tr><td colspan="8" class="error-message">Erro ao carregar os dados: Arquivo 'repositorios_federais_com_clusters_visualizado.json' não encontrado ou inacessível. Verifique o caminho e nome do arquivo.</td></tr>`;
@@ -111,6 +358,11 @@ document.addEventListener('DOMContentLoaded', () => {
 
             populateFilter(languageFilter, Array.from(availableLanguages).sort());
             populateFilter(licenseFilter, Array.from(availableLicenses).sort());
+            populateShardFilters(
+                Array.from(new Set(allFlattenedRepos.map(repo => repo.SiglaInstituicao))).sort().map(sigla => ({ value: sigla, label: sigla })),
+                [...clusterDescriptions].sort((a, b) => a.id - b.id).map(cluster => ({ value: String(cluster.id), label: `Cluster ${cluster.id}` }))
+            );
+            applyUrlFilters();
             
             populateClustersTable(); // Popula a tabela de clusters
             displayTop5LanguagesTable(calculatedTop5Languages); // Passa os dados calculados
@@ -134,6 +386,18 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    function populateShardFilters(institutionOptions, clusterOptions) {
+        [[institutionFilter, institutionOptions, 'Todas'], [clusterFilter, clusterOptions, 'Todos']].forEach(([selectElement, options, allLabel]) => {
+            selectElement.innerHTML = `<option value="">${allLabel}</option>`;
+            options.forEach(({ value, label }) => {
+                const option = document.createElement('option');
+                option.value = value;
+                option.textContent = label;
+                selectElement.appendChild(option);
+            });
+        });
+    }
+
     function getMostCommon(list) {
         if (list.length === 0) return 'N/A';
         const counts = {};
@@ -156,7 +420,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const allLanguages = reposToConsider.map(repo => repo['Linguagem Principal']).filter(l => l && l !== 'N/A' && l !== 'null');
         const allLicenses = reposToConsider.map(repo => repo.Licenca).filter(l => l && l !== 'N/A' && l !== 'null');
 
-        totalReposGlobal.textContent = allFlattenedRepos.length; // Total geral sem filtros
+        totalReposGlobal.textContent = manifest ? manifest.total : allFlattenedRepos.length; // Total geral sem filtros
         filteredReposCount.textContent = totalRepos; // Total de repos filtrados
         mostUsedLanguageGlobal.textContent = getMostCommon(allLanguages);
         mostUsedLicenseGlobal.textContent = getMostCommon(allLicenses);
@@ -186,8 +450,10 @@ document.addEventListener('DOMContentLoaded', () => {
 
         // Note: top 10 ativos ainda usa allFlattenedRepos, não os filtrados da tabela principal.
         // Se quiser que seja os 10 mais ativos *dentre os filtrados*, mude reposData para currentFilteredAndSortedRepos
+        // Com o enriquecimento (commits recentes), ordena pela atividade real; sem ele, pela última atualização
         const activeRepos = reposData.filter(repo => repo['Ultima Atualizacao'])
-                                     .sort((a, b) => new Date(b['Ultima Atualizacao']).getTime() - new Date(a['Ultima Atualizacao']).getTime());
+                                     .sort((a, b) => ((b['Commits Ultimas 12 Semanas'] || 0) - (a['Commits Ultimas 12 Semanas'] || 0)) ||
+                                                     (new Date(b['Ultima Atualizacao']).getTime() - new Date(a['Ultima Atualizacao']).getTime()));
 
         const top10Repos = activeRepos.slice(0, 10);
 
@@ -202,7 +468,9 @@ document.addEventListener('DOMContentLoaded', () => {
             row.insertCell().textContent = repo.SiglaInstituicao || 'N/A';
             row.insertCell().textContent = repo['Linguagem Principal'] || 'N/A';
             row.insertCell().textContent = `${repo.Estrelas} ⭐`;
-            row.insertCell().textContent = repo['Ultima Atualizacao'] ? new Date(repo['Ultima Atualizacao']).toLocaleDateString('pt-BR') : 'N/A';
+            const data = repo['Ultima Atualizacao'] ? new Date(repo['Ultima Atualizacao']).toLocaleDateString('pt-BR') : 'N/A';
+            const commits = repo['Commits Ultimas 12 Semanas'];
+            row.insertCell().textContent = commits ? `${data} (${commits} commits em 12 semanas)` : data;
         });
     }
 
@@ -281,10 +549,16 @@ document.addEventListener('DOMContentLoaded', () => {
 
         // --- 1. Aplicar Filtros Globais (Busca Geral, Linguagem, Licença) ---
         const generalSearchTerm = generalSearchInput.value.toLowerCase().trim();
+        // Com o índice pré-gerado a busca é uma consulta ao índice, sem varrer o texto de cada repositório
+        const useSearchIndex = generalSearchTerm && searchIndex && manifest &&
+                               currentDatasetPath === manifest.repositorios && allFlattenedRepos.length === searchIndex.n;
+        const searchMatches = useSearchIndex ? querySearchIndex(searchIndex, generalSearchTerm) : null;
         const selectedLanguage = languageFilter.value;
         const selectedLicense = licenseFilter.value;
+        const selectedInstitution = institutionFilter.value;
+        const selectedCluster = clusterFilter.value;
 
-        dataToProcess = dataToProcess.filter(repo => {
+        dataToProcess = dataToProcess.filter((repo, rowIndex) => {
             const repoName = (repo['Nome do Repositório'] || '').toLowerCase();
             const repoDesc = (repo.Descricao || '').toLowerCase();
             const repoInst = (repo.Instituicao || '').toLowerCase();
@@ -293,13 +567,14 @@ document.addEventListener('DOMContentLoaded', () => {
             const repoLicense = (repo.Licenca || '').toLowerCase();
 
             // Filtro de busca geral (busca em várias colunas)
-            const matchesGeneralSearch = !generalSearchTerm || 
+            const matchesGeneralSearch = !generalSearchTerm ||
+                                         (searchMatches ? searchMatches[rowIndex] === 1 :
                                          repoName.includes(generalSearchTerm) ||
                                          repoDesc.includes(generalSearchTerm) ||
                                          repoInst.includes(generalSearchTerm) ||
                                          repoSiglaInst.includes(generalSearchTerm) ||
                                          repoLang.includes(generalSearchTerm) ||
-                                         repoLicense.includes(generalSearchTerm);
+                                         repoLicense.includes(generalSearchTerm));
 
             // Filtro por linguagem
             const matchesLanguage = !selectedLanguage || repoLang === selectedLanguage.toLowerCase();
@@ -307,7 +582,11 @@ document.addEventListener('DOMContentLoaded', () => {
             // Filtro por licença
             const matchesLicense = !selectedLicense || repoLicense === selectedLicense.toLowerCase();
 
-            return matchesGeneralSearch && matchesLanguage && matchesLicense;
+            // Filtros de instituição e cluster (também escolhem qual shard é baixado)
+            const matchesInstitution = !selectedInstitution || repo.SiglaInstituicao === selectedInstitution;
+            const matchesCluster = !selectedCluster || String(repo.Cluster_ID) === selectedCluster;
+
+            return matchesGeneralSearch && matchesLanguage && matchesLicense && matchesInstitution && matchesCluster;
         });
 
         // --- 2. Aplicar Filtros por Coluna (novos inputs) ---
@@ -387,19 +666,21 @@ document.addEventListener('DOMContentLoaded', () => {
 
         // --- 5. Atualizar Estatísticas e Renderizar Tabelas ---
         updateGlobalStatistics(currentFilteredAndSortedRepos); // Estatísticas com base nos dados filtrados (total antes da paginação)
-        displayTop10ActiveRepos(allFlattenedRepos); // Top 10 ainda é global, usa todos os dados
+        displayTop10ActiveRepos(precomputedTopRepos || allFlattenedRepos); // Top 10 ainda é global, usa todos os dados
         displayAllReposTable(reposToDisplay); // Renderiza a tabela principal APENAS com a página atual
         updatePaginationControls(); // Atualiza os botões e info da paginação
     }
 
     // === Event Listeners ===
-    generalSearchInput.addEventListener('input', () => applyFiltersAndDisplay(true)); // Passa true para resetar a página
-    languageFilter.addEventListener('change', () => applyFiltersAndDisplay(true)); // Passa true para resetar a página
-    licenseFilter.addEventListener('change', () => applyFiltersAndDisplay(true)); // Passa true para resetar a página
+    generalSearchInput.addEventListener('input', () => loadDatasetAndDisplay(true)); // Pode baixar o índice de busca; reseta a página
+    languageFilter.addEventListener('change', () => loadDatasetAndDisplay(true)); // Pode baixar a tabela completa; reseta a página
+    licenseFilter.addEventListener('change', () => loadDatasetAndDisplay(true));
+    institutionFilter.addEventListener('change', () => loadDatasetAndDisplay(true)); // Pode baixar outro shard
+    clusterFilter.addEventListener('change', () => loadDatasetAndDisplay(true));
     
     // Event listeners para os novos inputs de filtro por coluna
     allReposFilterInputs.forEach(input => {
-        input.addEventListener('input', () => applyFiltersAndDisplay(true)); // Passa true para resetar a página
+        input.addEventListener('input', () => loadDatasetAndDisplay(true)); // Pode baixar a tabela completa; reseta a página
     });
 
     clearFiltersBtn.addEventListener('click', () => {
@@ -407,6 +688,8 @@ document.addEventListener('DOMContentLoaded', () => {
         generalSearchInput.value = '';
         languageFilter.value = '';
         licenseFilter.value = '';
+        institutionFilter.value = '';
+        clusterFilter.value = '';
         
         // Limpa os inputs de filtro por coluna
         allReposFilterInputs.forEach(input => {
@@ -429,7 +712,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // Reseta a paginação para a primeira página
         currentPage = 1; // Já está sendo feito explicitamente aqui, mas a chamada abaixo também fará
 
-        applyFiltersAndDisplay(true); // Re-aplica filtros e re-renderiza, reseta a página
+        loadDatasetAndDisplay(true); // Volta à tabela completa (ou ao resumo do manifest, se ela ainda não foi baixada) e reseta a página
     });
 
     // Event listeners para ordenação dos cabeçalhos da tabela principal
@@ -468,7 +751,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 // Ao mudar a ordenação, reseta para a primeira página
                 // currentPage = 1; // Isso será tratado pelo applyFiltersAndDisplay(true)
 
-                applyFiltersAndDisplay(true); // Chama a função que filtra e ordena, reseta a página
+                loadDatasetAndDisplay(true); // Filtra e ordena (baixando a tabela, se ainda não veio), reseta a página
             });
         }
     });
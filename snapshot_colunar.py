@@ -0,0 +1,221 @@
+"""
+Snapshots colunares (Parquet / Arrow IPC) da tabela achatada de repositórios.
+
+Os JSONs do pipeline repetem as chaves ("Nome do Repositório", "Link de Acesso",
+...) em cada registro e são indentados. Aqui cada repositório vira uma linha e
+cada campo uma coluna, com os dados da instituição (Sigla, Nome Completo, URL
+Oficial) repetidos por linha e codificados como dicionário. Os demais campos
+do documento (cluster_descriptions, k_selection, ...) ficam nos metadados do schema.
+
+    .parquet          compressão zstd, o menor em disco
+    .arrow / .feather Arrow IPC sem compressão, lido por memory-map (zero cópia)
+
+As etapas podem carregar só as colunas de que precisam (colunas=[...]).
+pyarrow é uma dependência opcional, importada apenas quando um snapshot é usado.
+"""
+import json
+import os
+
+from metricas import metricas
+
+EXTENSOES_PARQUET = ('.parquet',)
+EXTENSOES_ARROW = ('.arrow', '.feather')
+FORMATOS = ('parquet', 'arrow')
+
+COLUNAS_INSTITUICAO = ('Sigla', 'Nome Completo', 'URL Oficial')
+# Posição da instituição em institutions_data: a mesma Sigla aparece em várias
+# entradas seguidas (campi), então só ela não basta para reagrupar as linhas
+COLUNA_INDICE = 'Indice Instituicao'
+COLUNAS_AGRUPAMENTO = (COLUNA_INDICE,) + COLUNAS_INSTITUICAO
+COLUNAS_REPOSITORIO = ('Nome do Repositório', 'Descricao', 'Linguagem Principal', 'Estrelas',
+                       'Licenca', 'Ultima Atualizacao', 'Link de Acesso', 'Cluster_ID')
+# Campos que só existem em parte dos repositórios: nulo na tabela = chave ausente no JSON
+COLUNAS_OPCIONAIS = ('Cluster_ID', 'Linguagens', 'Commits Ultimo Ano', 'Commits Ultimas 12 Semanas')
+# Dicts {chave: número} com chaves diferentes por repositório: coluna map<string, double>
+# (como struct, cada repositório voltaria com as chaves de todos os outros)
+COLUNAS_MAPA = ('Linguagens',)
+CHAVE_METADADOS = b'mapa_codigo_publico'
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Snapshots colunares precisam do pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+def eh_colunar(caminho):
+    return str(caminho).lower().endswith(EXTENSOES_PARQUET + EXTENSOES_ARROW)
+
+
+def caminho_snapshot(caminho_json, formato='parquet'):
+    """
+    Caminho do snapshot colunar "irmão" de um JSON do pipeline
+    (repositorios.json -> repositorios.parquet).
+    """
+    return f"{os.path.splitext(caminho_json)[0]}.{formato}"
+
+
+# === 1. Escrita ===
+
+def tabela_instituicoes(full_data):
+    """
+    Achata {"institutions_data": [...], ...} em uma pyarrow.Table (uma linha por repositório).
+    """
+    pa = _pyarrow()
+    instituicoes = full_data.get('institutions_data', [])
+
+    colunas_repo = list(COLUNAS_REPOSITORIO)
+    for institution in instituicoes:
+        for repo in institution.get('Repositorios', []):
+            colunas_repo.extend(chave for chave in repo if chave not in colunas_repo)
+
+    valores = {coluna: [] for coluna in COLUNAS_AGRUPAMENTO + tuple(colunas_repo)}
+    for indice, institution in enumerate(instituicoes):
+        for repo in institution.get('Repositorios', []):
+            valores[COLUNA_INDICE].append(indice)
+            for coluna in COLUNAS_INSTITUICAO:
+                valores[coluna].append(institution.get(coluna))
+            for coluna in colunas_repo:
+                valores[coluna].append(repo.get(coluna))
+
+    arrays = {}
+    for coluna, lista in valores.items():
+        if coluna not in COLUNAS_AGRUPAMENTO and all(valor is None for valor in lista):
+            continue  # Ex.: Cluster_ID antes da clusterização
+        tipo = None
+        if coluna == COLUNA_INDICE:
+            tipo = pa.int32()
+        elif coluna in COLUNAS_MAPA:
+            tipo = pa.map_(pa.string(), pa.float64())
+        array = pa.array(lista, tipo)
+        if coluna in COLUNAS_INSTITUICAO:
+            array = array.dictionary_encode()
+        arrays[coluna] = array
+
+    extras = {chave: valor for chave, valor in full_data.items() if chave != 'institutions_data'}
+    metadados = {CHAVE_METADADOS: json.dumps(extras, ensure_ascii=False).encode('utf-8')}
+    if not arrays or not valores['Sigla']:
+        schema = pa.schema([(COLUNA_INDICE, pa.int32())] +
+                           [(coluna, pa.string()) for coluna in COLUNAS_INSTITUICAO], metadata=metadados)
+        return schema.empty_table()
+    return pa.table(arrays).replace_schema_metadata(metadados)
+
+
+def salvar_snapshot(full_data, caminho):
+    """
+    Grava o documento no formato colunar indicado pela extensão de 'caminho'.
+    """
+    pa = _pyarrow()
+    tabela = tabela_instituicoes(full_data)
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    if str(caminho).lower().endswith(EXTENSOES_PARQUET):
+        pa.parquet.write_table(tabela, caminho, compression='zstd')
+    else:
+        # Sem compressão para que a leitura possa mapear o arquivo direto na memória
+        pa.feather.write_feather(tabela, caminho, compression='uncompressed')
+    metricas.registrar_arquivo(caminho)
+    print(f"🗃️ Snapshot colunar salvo em '{caminho}' ({os.path.getsize(caminho) / 1024:.0f} KB)")
+
+
+# === 2. Leitura ===
+
+def ler_tabela(caminho, colunas=None):
+    """
+    Lê o snapshot como pyarrow.Table, apenas com as colunas pedidas (None = todas).
+    Colunas pedidas que não existem no arquivo são ignoradas.
+    """
+    pa = _pyarrow()
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(caminho)
+    if str(caminho).lower().endswith(EXTENSOES_PARQUET):
+        schema = pa.parquet.read_schema(caminho)
+    else:
+        with pa.memory_map(caminho) as fonte:
+            schema = pa.ipc.open_file(fonte).schema
+    if colunas is not None:
+        colunas = [coluna for coluna in colunas if coluna in schema.names]
+
+    if str(caminho).lower().endswith(EXTENSOES_PARQUET):
+        return pa.parquet.read_table(caminho, columns=colunas, memory_map=True)
+    return pa.feather.read_table(caminho, columns=colunas, memory_map=True)
+
+
+def ler_dataframe(caminho, colunas=None):
+    """
+    Lê o snapshot como pandas.DataFrame (uma linha por repositório).
+    """
+    return ler_tabela(caminho, colunas).to_pandas()
+
+
+def carregar_snapshot(caminho, colunas=None):
+    """
+    Reconstrói o documento {"institutions_data": [...], ...} a partir do snapshot.
+    Com 'colunas', cada repositório traz apenas esses campos (as colunas da
+    instituição são sempre lidas para reagrupar as linhas). Instituições sem
+    repositórios não têm linhas e, portanto, não voltam.
+    """
+    if colunas is not None:
+        colunas = list(COLUNAS_AGRUPAMENTO) + [coluna for coluna in colunas if coluna not in COLUNAS_AGRUPAMENTO]
+    tabela = ler_tabela(caminho, colunas)
+
+    metadados = (tabela.schema.metadata or {}).get(CHAVE_METADADOS)
+    full_data = {"institutions_data": []}
+    full_data.update(json.loads(metadados) if metadados else {})
+
+    dados = {coluna: tabela.column(coluna).to_pylist() for coluna in tabela.column_names}
+    colunas_repo = [coluna for coluna in tabela.column_names if coluna not in COLUNAS_AGRUPAMENTO]
+    institution = None
+    indice_atual = None
+    for i in range(tabela.num_rows):
+        if institution is None or dados[COLUNA_INDICE][i] != indice_atual:
+            indice_atual = dados[COLUNA_INDICE][i]
+            institution = {coluna: dados[coluna][i] for coluna in COLUNAS_INSTITUICAO}
+            institution['Repositorios'] = []
+            full_data['institutions_data'].append(institution)
+        repo = {}
+        for coluna in colunas_repo:
+            valor = dados[coluna][i]
+            if valor is None and coluna in COLUNAS_OPCIONAIS:
+                continue
+            if coluna in COLUNAS_MAPA:
+                valor = dict(valor)  # to_pylist() devolve os mapas como lista de pares
+            repo[coluna] = valor
+        institution['Repositorios'].append(repo)
+    return full_data
+
+
+def carregar_dados(caminho, colunas=None):
+    """
+    Carrega um documento do pipeline em JSON ou em snapshot colunar (pela extensão).
+    A projeção de colunas só se aplica aos snapshots; o JSON é sempre lido inteiro.
+    """
+    if eh_colunar(caminho):
+        return carregar_snapshot(caminho, colunas)
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Converte um JSON do pipeline em snapshot colunar (ou vice-versa).")
+    parser.add_argument("entrada", help="Arquivo .json, .parquet ou .arrow.")
+    parser.add_argument("saida", help="Arquivo de saída (.parquet, .arrow ou .json).")
+    args = parser.parse_args(argv)
+
+    dados = carregar_dados(args.entrada)
+    if eh_colunar(args.saida):
+        salvar_snapshot(dados, args.saida)
+    else:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from indice_busca import buscar, construir_indice
+
+
+def repositorio(nome, descricao, linguagem='Python'):
+    return {'Nome do Repositório': nome, 'Descricao': descricao, 'Linguagem Principal': linguagem,
+            'Licenca': 'MIT'}
+
+
+INSTITUICOES = [
+    {'Sigla': 'UFAM', 'Nome Completo': 'Universidade Federal do Amazonas',
+     'Repositorios': [repositorio('sigaa-scraper', 'Coleta de notas'),
+                      repositorio('site-dept', 'Página do departamento', 'HTML')]},
+    {'Sigla': 'IFB', 'Nome Completo': 'Instituto Federal de Brasília',
+     'Repositorios': [repositorio('api-biblioteca', 'API web de gestão de dados da biblioteca'),
+                      repositorio('tcc-ufam-estudo', 'Estudo comparativo', 'Java')]},
+]
+
+
+def test_sigla_da_instituicao_restringe_a_busca():
+    indice = construir_indice(INSTITUICOES)
+    # Linha 3 cita 'ufam' no nome, mas é Java: só o repositório Python da UFAM casa
+    assert buscar(indice, 'ufam python') == [0]
+    assert buscar(indice, 'UFAM') == [0, 1, 3]
+
+
+def test_termos_de_dominio_ficam_no_indice():
+    indice = construir_indice(INSTITUICOES)
+    for termo in ('api', 'web', 'dados', 'gestao', 'tcc'):
+        assert buscar(indice, termo) is not None, termo
+    assert buscar(indice, 'api web') == [2]
+
+
+def test_palavras_funcionais_sao_descartadas_da_consulta():
+    indice = construir_indice(INSTITUICOES)
+    assert buscar(indice, 'de') is None
+    assert buscar(indice, 'instituto federal de brasilia') == [2, 3]
@@ -0,0 +1,121 @@
+"""
+Normalização de texto compartilhada: stopwords (NLTK + lista personalizada) e a
+tokenização usada na clusterização (clusterizador.py) e no índice de busca do
+front-end (indice_busca.py).
+"""
+import json
+import os
+import re
+import unicodedata
+
+# As stopwords do NLTK (português e inglês) ficam em um arquivo local, para que
+# importar este módulo não carregue o nltk nem dependa de rede (nltk.download)
+STOPWORDS_PATH = os.getenv("STOPWORDS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "stopwords.json"))
+IDIOMAS_STOPWORDS = ('portuguese', 'english')
+
+
+def carregar_stopwords_nltk(caminho=STOPWORDS_PATH):
+    """
+    Lê as listas de stopwords do arquivo local. Se ele não existir, as listas
+    vêm do corpus do NLTK (baixado apenas se faltar) e são gravadas em 'caminho'
+    para as próximas execuções. Retorna {idioma: lista_de_palavras}.
+    """
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+
+    import nltk
+    from nltk.corpus import stopwords
+    try:
+        stopwords.words('portuguese')
+    except LookupError:
+        print("Baixando NLTK stopwords...")
+        nltk.download('stopwords')
+    listas = {idioma: stopwords.words(idioma) for idioma in IDIOMAS_STOPWORDS}
+    diretorio = os.path.dirname(caminho)
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(listas, f, indent=2, ensure_ascii=False)
+    print(f"💾 Stopwords do NLTK salvas em '{caminho}'")
+    return listas
+
+
+# --- O código de preprocess_text e stopwords PERSONALIZADAS é o mesmo que antes ---
+custom_stopwords = [
+    'projeto', 'disciplina', 'desenvolvimento', 'sistema', 'sistemas',
+    'computação', 'ciência', 'federal', 'universidade', 'trabalho',
+    'dados', 'estrutura', 'web', 'aplicação', 'implementação', 'gestão',
+    'curso', 'repositório', 'ufam', 'tcc', 'site', 'código', 'api', 'app',
+    'base', 'uso', 'para', 'com', 'um', 'uma', 'este', 'esta', 'disponibiliza',
+    'Toad_-3-Blooket', 'IFRS 9','l10n_tw_standard_ifrss', 'unbound', '.config',
+    'durante','FBA port to iOS'
+]
+_stopwords_nltk = carregar_stopwords_nltk()
+portuguese_stopwords = set(_stopwords_nltk['portuguese'])
+english_stopwords = set(_stopwords_nltk['english'])
+all_stopwords = portuguese_stopwords.union(english_stopwords).union(set(custom_stopwords))
+
+# Tokens = sequências de \w em minúsculas: o mesmo que re.sub(r'\W', ' ') + split()
+TOKEN_REGEX = re.compile(r'\w+')
+STOPWORDS = frozenset(all_stopwords)
+
+
+def preprocess_text(text):
+    if text is None:
+        return ""
+    return ' '.join([word for word in TOKEN_REGEX.findall(text.lower()) if word not in STOPWORDS])
+
+
+def preprocess_textos(textos):
+    """
+    Versão em lote de preprocess_text para o corpus inteiro. Uma única regex
+    compilada extrai os tokens (em vez de dois re.sub + split por texto) e as
+    stopwords são filtradas contra um frozenset; o custo é linear no corpus.
+    """
+    findall = TOKEN_REGEX.findall
+    stopwords_ = STOPWORDS
+    return [
+        ' '.join([word for word in findall(text.lower()) if word not in stopwords_]) if text is not None else ""
+        for text in textos
+    ]
+
+
+
+# --- Normalização para busca (índice do front-end) ---
+# Além do pré-processamento acima, a busca ignora acentos ("gestao" encontra
+# "gestão") e separa tokens no '_'. scripts.js aplica a mesma normalização à consulta.
+# Só palavras funcionais são descartadas: a lista personalizada da clusterização tem
+# termos que o usuário busca ('ufam', 'api', 'dados', ...), e as listas do NLTK em
+# config/stopwords.json também ('web', 'estado', 'trabalho' e as linguagens 'c', 'r', 'go').
+TOKEN_BUSCA_REGEX = re.compile(r'[^\W_]+')
+PALAVRAS_FUNCIONAIS_BUSCA = (
+    'a', 'o', 'as', 'os', 'um', 'uma', 'uns', 'umas', 'de', 'da', 'das', 'do', 'dos', 'em', 'na', 'nas',
+    'no', 'nos', 'num', 'numa', 'ao', 'aos', 'à', 'às', 'por', 'pela', 'pelas', 'pelo', 'pelos', 'para',
+    'pra', 'com', 'sem', 'sob', 'sobre', 'entre', 'até', 'e', 'ou', 'mas', 'nem', 'que', 'se', 'como',
+    'é', 'são', 'seu', 'sua', 'seus', 'suas', 'este', 'esta', 'esse', 'essa', 'isso', 'isto',
+    'an', 'the', 'of', 'in', 'on', 'at', 'to', 'for', 'from', 'by', 'with', 'and', 'or', 'but', 'is',
+    'are', 'was', 'were', 'be', 'been', 'its', 'this', 'that', 'these', 'those', 'into', 'my', 'your',
+)
+
+
+def remover_acentos(texto):
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def normalizar_busca(texto):
+    return remover_acentos((texto or '').lower())
+
+
+STOPWORDS_BUSCA = frozenset(normalizar_busca(palavra) for palavra in PALAVRAS_FUNCIONAIS_BUSCA)
+
+
+def tokens_busca(texto, stopwords=STOPWORDS_BUSCA):
+    """
+    Tokens de 'texto' para o índice de busca: minúsculas, sem acentos e sem
+    'stopwords' (as palavras funcionais; um conjunto vazio mantém todos os tokens).
+    """
+    return [token for token in TOKEN_BUSCA_REGEX.findall(normalizar_busca(texto)) if token not in stopwords]